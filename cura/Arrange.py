@@ -0,0 +1,193 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import numpy
+
+##  Packs convex hulls onto the build plate using a rasterized occupancy grid.
+#
+#   The build plate is divided in square cells. Two grids are kept: one with the cells covered by the hulls of the
+#   placed objects and one with the cells covered by their head hulls, the disallowed areas and anything else an
+#   object may not be placed on. To find a place for a new object, its hull and head hull are rasterized and
+#   correlated with these grids for every possible offset at once (using FFTs), after which the free offset
+#   closest to the centre of the plate is picked.
+#
+#   All coordinates are 2D (x, z) build plate coordinates, the same as the points of a convex hull Polygon.
+class Arrange:
+    ##  The maximum number of cells along one side of the grid.
+    _max_grid_size = 512
+
+    ##  Create an empty build plate.
+    #
+    #   \param minimum The (x, z) coordinate of the minimum corner of the build plate.
+    #   \param maximum The (x, z) coordinate of the maximum corner of the build plate.
+    #   \param resolution The size of a grid cell in mm. It is increased if the grid would become too large.
+    def __init__(self, minimum, maximum, resolution = 1.0):
+        self._minimum = numpy.array(minimum, dtype = numpy.float64)
+        size = numpy.array(maximum, dtype = numpy.float64) - self._minimum
+        self._resolution = max(resolution, float(numpy.max(size)) / self._max_grid_size)
+        self._shape = tuple(int(cells) for cells in numpy.maximum(numpy.floor(size / self._resolution), 1))
+        self._centre = self._minimum + size / 2
+
+        # Cells covered by the hulls of placed objects. Head hulls of new objects may not overlap with these.
+        self._occupied = numpy.zeros(self._shape, dtype = numpy.float64)
+        # Cells covered by head hulls and disallowed areas. Hulls of new objects may not overlap with these.
+        self._blocked = numpy.zeros(self._shape, dtype = numpy.float64)
+
+        self._occupied_spectrum = None
+        self._blocked_spectrum = None
+
+    def getResolution(self):
+        return self._resolution
+
+    ##  Mark an area of the build plate as unavailable, like a disallowed area.
+    #
+    #   \param points The points of the convex area.
+    def addArea(self, points):
+        self._stamp(self._blocked, points)
+        self._blocked_spectrum = None
+
+    ##  Mark the space taken by an object as occupied.
+    #
+    #   \param hull_points The points of the convex hull of the object.
+    #   \param head_points The points of the head hull of the object, if it has one.
+    #   \param translation Optional (x, z) translation to apply to the hulls first.
+    def occupy(self, hull_points, head_points = None, translation = None):
+        if head_points is None:
+            head_points = hull_points
+        if translation is not None:
+            hull_points = numpy.asarray(hull_points, dtype = numpy.float64) + translation
+            head_points = numpy.asarray(head_points, dtype = numpy.float64) + translation
+
+        self._stamp(self._occupied, hull_points)
+        self._stamp(self._blocked, head_points)
+        self._occupied_spectrum = None
+        self._blocked_spectrum = None
+
+    ##  Find the free position closest to the centre of the build plate for an object.
+    #
+    #   \param hull_points The points of the convex hull of the object.
+    #   \param head_points The points of the head hull of the object, if it has one.
+    #   \return The (x, z) translation that moves the object to its new position, or None if it does not fit.
+    def findPlace(self, hull_points, head_points = None):
+        hull_points = numpy.asarray(hull_points, dtype = numpy.float64)
+        if head_points is None:
+            head_points = hull_points
+        head_points = numpy.asarray(head_points, dtype = numpy.float64)
+
+        # Rasterize both hulls in a common frame, anchored at the minimum corner of their combined bounding box.
+        anchor = numpy.minimum(numpy.min(hull_points, axis = 0), numpy.min(head_points, axis = 0))
+        extent = numpy.maximum(numpy.max(hull_points, axis = 0), numpy.max(head_points, axis = 0)) - anchor
+        shape = tuple(int(cells) for cells in numpy.ceil(extent / self._resolution) + 1)
+        if shape[0] > self._shape[0] or shape[1] > self._shape[1]:
+            return None
+
+        hull_mask = self._rasterize(hull_points - anchor, shape)
+        head_mask = self._rasterize(head_points - anchor, shape)
+
+        if self._occupied_spectrum is None:
+            self._occupied_spectrum = numpy.fft.rfft2(self._occupied)
+        if self._blocked_spectrum is None:
+            self._blocked_spectrum = numpy.fft.rfft2(self._blocked)
+
+        # Number of overlapping cells for every offset of the anchor; only offsets where the shape stays on the
+        # build plate are valid.
+        valid = (self._shape[0] - shape[0] + 1, self._shape[1] - shape[1] + 1)
+        collisions = self._correlate(self._blocked_spectrum, hull_mask)[:valid[0], :valid[1]]
+        collisions += self._correlate(self._occupied_spectrum, head_mask)[:valid[0], :valid[1]]
+        free = collisions < 0.5
+        if not numpy.any(free):
+            return None
+
+        # Pick the free offset that puts the centre of the hull closest to the centre of the build plate.
+        hull_centre = (numpy.min(hull_points, axis = 0) + numpy.max(hull_points, axis = 0)) / 2 - anchor
+        x_positions = self._minimum[0] + numpy.arange(valid[0]) * self._resolution + hull_centre[0] - self._centre[0]
+        z_positions = self._minimum[1] + numpy.arange(valid[1]) * self._resolution + hull_centre[1] - self._centre[1]
+        distances = x_positions[:, numpy.newaxis] ** 2 + z_positions[numpy.newaxis, :] ** 2
+        distances[~free] = numpy.inf
+        x_index, z_index = numpy.unravel_index(numpy.argmin(distances), distances.shape)
+
+        new_anchor = self._minimum + numpy.array([x_index, z_index]) * self._resolution
+        return new_anchor - anchor
+
+    ##  Find a place for an object and mark it as occupied.
+    #
+    #   \return The (x, z) translation that moves the object to its new position, or None if it does not fit.
+    def place(self, hull_points, head_points = None):
+        translation = self.findPlace(hull_points, head_points)
+        if translation is not None:
+            self.occupy(hull_points, head_points, translation)
+        return translation
+
+    ##  Check whether an area is entirely on free cells of the build plate.
+    #
+    #   Since areas are rasterized conservatively, an area for which this returns False might still be free. It
+    #   can be used as a fast test that only needs an exact check if it fails.
+    #
+    #   \param points The points of the convex area.
+    #   \return True if none of the cells the area might cover are occupied and the area lies on the build plate.
+    def isAreaFree(self, points):
+        points = numpy.asarray(points, dtype = numpy.float64)
+        if len(points) < 3:
+            return True
+
+        cell_minimum = numpy.floor((numpy.min(points, axis = 0) - self._minimum) / self._resolution).astype(int)
+        cell_maximum = numpy.ceil((numpy.max(points, axis = 0) - self._minimum) / self._resolution).astype(int) + 1
+        if numpy.any(cell_minimum < 0) or numpy.any(cell_maximum > self._shape):
+            return False
+
+        offset = self._minimum + cell_minimum * self._resolution
+        mask = self._rasterize(points - offset, tuple(cell_maximum - cell_minimum))
+        region = self._blocked[cell_minimum[0]:cell_maximum[0], cell_minimum[1]:cell_maximum[1]]
+        return not numpy.any(region[mask > 0] > 0)
+
+    def _correlate(self, spectrum, mask):
+        padded = numpy.zeros(self._shape, dtype = numpy.float64)
+        padded[:mask.shape[0], :mask.shape[1]] = mask
+        return numpy.fft.irfft2(spectrum * numpy.conj(numpy.fft.rfft2(padded)), s = self._shape)
+
+    ##  Add a polygon to a grid, in build plate coordinates.
+    def _stamp(self, grid, points):
+        points = numpy.asarray(points, dtype = numpy.float64)
+        if len(points) < 3:
+            return
+
+        cell_minimum = numpy.floor((numpy.min(points, axis = 0) - self._minimum) / self._resolution).astype(int)
+        cell_minimum = numpy.maximum(cell_minimum, 0)
+        cell_maximum = numpy.ceil((numpy.max(points, axis = 0) - self._minimum) / self._resolution).astype(int) + 1
+        cell_maximum = numpy.minimum(cell_maximum, self._shape)
+        if numpy.any(cell_maximum <= cell_minimum):
+            return
+
+        offset = self._minimum + cell_minimum * self._resolution
+        mask = self._rasterize(points - offset, tuple(cell_maximum - cell_minimum))
+        region = grid[cell_minimum[0]:cell_maximum[0], cell_minimum[1]:cell_maximum[1]]
+        region[mask > 0] = 1.0
+
+    ##  Conservatively rasterize a convex polygon.
+    #
+    #   A cell is marked if any part of it might be covered by the polygon. Cell (i, j) covers the area from
+    #   (i, j) * resolution to (i + 1, j + 1) * resolution in the coordinates of the points.
+    #
+    #   \return A float array of the given shape with 1 for covered cells and 0 elsewhere.
+    def _rasterize(self, points, shape):
+        centres_x = (numpy.arange(shape[0]) + 0.5) * self._resolution
+        centres_z = (numpy.arange(shape[1]) + 0.5) * self._resolution
+        centres_x, centres_z = numpy.meshgrid(centres_x, centres_z, indexing = "ij")
+
+        # Orient the edges so that the inside of the polygon is on the left.
+        signed_area = numpy.sum(points[:, 0] * numpy.roll(points[:, 1], -1) - numpy.roll(points[:, 0], -1) * points[:, 1])
+        if signed_area < 0:
+            points = points[::-1]
+
+        # A cell may be covered if its centre is no further than half its diagonal outside of every edge.
+        margin = self._resolution * 0.7072
+        mask = numpy.ones(shape, dtype = numpy.bool_)
+        for start, end in zip(points, numpy.roll(points, -1, axis = 0)):
+            edge = end - start
+            length = numpy.sqrt(numpy.sum(edge * edge))
+            if length < 1e-9:
+                continue
+            distance = (edge[0] * (centres_z - start[1]) - edge[1] * (centres_x - start[0])) / length
+            mask &= distance >= -margin
+
+        return mask.astype(numpy.float64)
@@ -13,6 +13,9 @@ from UM.Math.Polygon import Polygon
 from UM.View.RenderBatch import RenderBatch
 from UM.View.GL.OpenGL import OpenGL
 
+from cura.Arrange import Arrange
+from cura.PolygonCollision import PolygonCollision
+
 import numpy
 
 
@@ -35,6 +38,13 @@ class BuildVolume(SceneNode):
         self._disallowed_areas = []
         self._disallowed_area_mesh = None
 
+        # Disallowed areas extended with the skirt size, by the machine areas, skirt size and machine size.
+        self._disallowed_area_cache = {}
+
+        # Rasterized keep-out mask and collision data of the disallowed areas, created when they are first needed.
+        self._keep_out_mask = None
+        self._disallowed_area_collision = None
+
         self.setCalculateBoundingBox(False)
         self._volume_aabb = None
 
@@ -56,6 +66,35 @@ class BuildVolume(SceneNode):
 
     def setDisallowedAreas(self, areas):
         self._disallowed_areas = areas
+        self._keep_out_mask = None
+        self._disallowed_area_collision = None
+
+    ##  Check for a list of convex hulls which of them intersect with a disallowed area.
+    #
+    #   The hulls are first checked against a rasterized mask of the disallowed areas. Only hulls that touch a cell
+    #   of the mask that is (partially) disallowed are checked exactly against the disallowed areas.
+    #
+    #   \param hulls List of point arrays of the hulls. Entries may be None.
+    #   \return A list of booleans that tells for every hull if it intersects with a disallowed area.
+    def findHullsInDisallowedAreas(self, hulls):
+        result = [False] * len(hulls)
+        if not self._disallowed_areas:
+            return result
+
+        if self._keep_out_mask is None:
+            self._keep_out_mask = Arrange((-self._width / 2, -self._depth / 2), (self._width / 2, self._depth / 2))
+            for area in self._disallowed_areas:
+                self._keep_out_mask.addArea(area.getPoints())
+            self._disallowed_area_collision = PolygonCollision([area.getPoints() for area in self._disallowed_areas])
+
+        boundary_indices = [index for index, points in enumerate(hulls) if points is not None and not self._keep_out_mask.isAreaFree(points)]
+        if boundary_indices:
+            hull_collision = PolygonCollision([hulls[index] for index in boundary_indices])
+            in_area = hull_collision.intersectAll(self._disallowed_area_collision).any(axis = 1)
+            for index, intersects in zip(boundary_indices, in_area):
+                result[index] = bool(intersects)
+
+        return result
 
     def render(self, renderer):
         if not self.getMeshData():
@@ -76,6 +115,8 @@ class BuildVolume(SceneNode):
         if not self._width or not self._height or not self._depth:
             return
 
+        self._keep_out_mask = None  # The size of the build plate might have changed.
+
         min_w = -self._width / 2
         max_w = self._width / 2
         min_h = 0.0
@@ -205,6 +246,17 @@ class BuildVolume(SceneNode):
 
         skirt_size = self._getSkirtSize(self._active_container_stack)
 
+        # Extending the areas is expensive, so reuse the result if nothing changed.
+        cache_key = (
+            tuple(tuple(tuple(point) for point in area) for area in disallowed_areas) if disallowed_areas else (),
+            skirt_size,
+            self._active_container_stack.getProperty("machine_width", "value"),
+            self._active_container_stack.getProperty("machine_depth", "value")
+        )
+        if cache_key in self._disallowed_area_cache:
+            self.setDisallowedAreas(self._disallowed_area_cache[cache_key])
+            return
+
         if disallowed_areas:
             # Extend every area already in the disallowed_areas with the skirt size.
             for area in disallowed_areas:
@@ -255,7 +307,11 @@ class BuildVolume(SceneNode):
                 [half_machine_width - skirt_size, -half_machine_depth + skirt_size]
             ], numpy.float32)))
 
-        self._disallowed_areas = areas
+        if len(self._disallowed_area_cache) >= 8:
+            self._disallowed_area_cache.clear()
+        self._disallowed_area_cache[cache_key] = areas
+
+        self.setDisallowedAreas(areas)
 
     ##  Convenience function to calculate the size of the bed adhesion.
     def _getSkirtSize(self, container_stack):
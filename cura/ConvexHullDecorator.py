@@ -1,32 +1,37 @@
 from UM.Scene.SceneNodeDecorator import SceneNodeDecorator
 from UM.Application import Application
+from UM.Scene.SceneNode import SceneNode
 
 from UM.Math.Polygon import Polygon
 from . import ConvexHullNode
+from .MeshHullCache import MeshHullCache
+from .ConvexHullManager import ConvexHullManager
 
 import numpy
 
 ##  The convex hull decorator is a scene node decorator that adds the convex hull functionality to a scene node.
 #   If a scene node has a convex hull decorator, it will have a shadow in which other objects can not be printed.
 class ConvexHullDecorator(SceneNodeDecorator):
+    ##  The maximum number of orientations for which the hull is kept in the shared cache.
+    _max_shared_hull_cache_size = 16
+
     def __init__(self):
         super().__init__()
 
         self._convex_hull_node = None
         self._init2DConvexHullCache()
 
-        self._global_stack = None
-        Application.getInstance().globalContainerStackChanged.connect(self._onGlobalStackChanged)
-        Application.getInstance().getController().toolOperationStarted.connect(self._onChanged)
-        Application.getInstance().getController().toolOperationStopped.connect(self._onChanged)
+        # Hulls of the mesh per rotation and scale, shared between all copies of a node that share its mesh data.
+        self._shared_hull_cache = {}
 
-        self._onGlobalStackChanged()
+        # The manager recomputes the hull when the settings change or a tool operation starts or stops.
+        ConvexHullManager.getInstance().addDecorator(self)
 
     def setNode(self, node):
         previous_node = self._node
         if previous_node is not None and node is not previous_node:
-            previous_node.transformationChanged.connect(self._onChanged)
-            previous_node.parentChanged.connect(self._onChanged)
+            previous_node.transformationChanged.disconnect(self._onChanged)
+            previous_node.parentChanged.disconnect(self._onChanged)
 
         super().setNode(node)
 
@@ -36,8 +41,11 @@ class ConvexHullDecorator(SceneNodeDecorator):
         self._onChanged()
 
     ## Force that a new (empty) object is created upon copy.
+    #  The copy does share the hull cache, since copies of a node share its mesh data.
     def __deepcopy__(self, memo):
-        return ConvexHullDecorator()
+        copied_decorator = ConvexHullDecorator()
+        copied_decorator._shared_hull_cache = self._shared_hull_cache
+        return copied_decorator
 
     ##  Get the unmodified 2D projected convex hull of the node
     def getConvexHull(self):
@@ -45,9 +53,10 @@ class ConvexHullDecorator(SceneNodeDecorator):
             return None
 
         hull = self._compute2DConvexHull()
-        if self._global_stack and self._node:
-            if self._global_stack.getProperty("print_sequence", "value") == "one_at_a_time" and not self._node.getParent().callDecoration("isGroup"):
-                hull = hull.getMinkowskiHull(Polygon(numpy.array(self._global_stack.getProperty("machine_head_polygon", "value"), numpy.float32)))
+        global_stack = ConvexHullManager.getInstance().getGlobalStack()
+        if global_stack and self._node:
+            if global_stack.getProperty("print_sequence", "value") == "one_at_a_time" and not self._node.getParent().callDecoration("isGroup"):
+                hull = hull.getMinkowskiHull(Polygon(numpy.array(global_stack.getProperty("machine_head_polygon", "value"), numpy.float32)))
         return hull
 
     ##  Get the convex hull of the node with the full head size
@@ -64,8 +73,9 @@ class ConvexHullDecorator(SceneNodeDecorator):
         if self._node is None:
             return None
 
-        if self._global_stack:
-            if self._global_stack.getProperty("print_sequence", "value") == "one_at_a_time" and not self._node.getParent().callDecoration("isGroup"):
+        global_stack = ConvexHullManager.getInstance().getGlobalStack()
+        if global_stack:
+            if global_stack.getProperty("print_sequence", "value") == "one_at_a_time" and not self._node.getParent().callDecoration("isGroup"):
                 return self._compute2DConvexHeadMin()
         return None
 
@@ -76,12 +86,40 @@ class ConvexHullDecorator(SceneNodeDecorator):
         if self._node is None:
             return None
 
-        if self._global_stack:
-            if self._global_stack.getProperty("print_sequence", "value") == "one_at_a_time" and not self._node.getParent().callDecoration("isGroup"):
+        global_stack = ConvexHullManager.getInstance().getGlobalStack()
+        if global_stack:
+            if global_stack.getProperty("print_sequence", "value") == "one_at_a_time" and not self._node.getParent().callDecoration("isGroup"):
                 # Printing one at a time and it's not an object in a group
                 return self._compute2DConvexHull()
         return None
 
+    ##  Get the bounding box of the node, computed from the vertices of the 3D convex hull of its mesh.
+    #
+    #   This gives the same result as the bounding box of the node itself, but only needs to transform the vertices
+    #   of the hull instead of all vertices of the mesh.
+    #
+    #   \return An AxisAlignedBox, or None if the node has nothing to compute a bounding box from.
+    def getHullBoundingBox(self):
+        if self._node is None:
+            return None
+
+        bounding_box = None
+        if self._node.getMeshData() and not self._node.callDecoration("isGroup"):
+            bounding_box = MeshHullCache.getInstance().getBoundingBox(self._node.getMeshData(), self._node.getWorldTransformation())
+
+        for child in self._node.getChildren():
+            child_bounding_box = child.callDecoration("getHullBoundingBox")
+            if child_bounding_box is None and type(child) is SceneNode:
+                child_bounding_box = child.getBoundingBox()
+            if child_bounding_box is None:
+                continue
+            if bounding_box is None:
+                bounding_box = child_bounding_box
+            else:
+                bounding_box = bounding_box + child_bounding_box
+
+        return bounding_box
+
     def recomputeConvexHull(self):
         controller = Application.getInstance().getController()
         root = controller.getScene().getRoot()
@@ -92,17 +130,16 @@ class ConvexHullDecorator(SceneNodeDecorator):
             return
 
         convex_hull = self.getConvexHull()
+        if self._convex_hull_node and self._convex_hull_node.getParent() is root:
+            # Keep the hull node, so only its part of the shadow is updated.
+            if self._convex_hull_node.getHull() != convex_hull:
+                self._convex_hull_node.setHull(convex_hull)
+            return
         if self._convex_hull_node:
-            if self._convex_hull_node.getHull() == convex_hull:
-                return
             self._convex_hull_node.setParent(None)
         hull_node = ConvexHullNode.ConvexHullNode(self._node, convex_hull, root)
         self._convex_hull_node = hull_node
 
-    def _onSettingValueChanged(self, key, property_name):
-        if key == "print_sequence" and property_name == "value":
-            self._onChanged()
-
     def _init2DConvexHullCache(self):
         # Cache for the group code path in _compute2DConvexHull()
         self._2d_convex_hull_group_child_polygon = None
@@ -154,7 +191,21 @@ class ConvexHullDecorator(SceneNodeDecorator):
                 if mesh is self._2d_convex_hull_mesh and world_transform == self._2d_convex_hull_mesh_world_transform:
                     return self._2d_convex_hull_mesh_result
 
-                vertex_data = mesh.getConvexHullTransformedVertices(world_transform)
+                # Copies of this node with the same mesh, rotation, scale and height have the same hull, only translated.
+                transform_data = world_transform.getData()
+                shared_key = (id(mesh), transform_data[0:3, 0:3].tobytes(), round(float(transform_data[1, 3]), 4))
+                shared_entry = self._shared_hull_cache.get(shared_key)
+                if shared_entry is not None and shared_entry[0] is mesh:
+                    hull_points = shared_entry[1]
+                    if hull_points is not None:
+                        rounded_hull = Polygon(hull_points + numpy.array([transform_data[0, 3], transform_data[2, 3]], dtype = hull_points.dtype))
+
+                    self._2d_convex_hull_mesh = mesh
+                    self._2d_convex_hull_mesh_world_transform = world_transform
+                    self._2d_convex_hull_mesh_result = rounded_hull
+                    return rounded_hull
+
+                vertex_data = MeshHullCache.getInstance().getTransformedVertices(mesh, world_transform)
                 # Don't use data below 0.
                 # TODO; We need a better check for this as this gives poor results for meshes with long edges.
                 vertex_data = vertex_data[vertex_data[:,1] >= 0]
@@ -192,10 +243,18 @@ class ConvexHullDecorator(SceneNodeDecorator):
             self._2d_convex_hull_mesh_world_transform = world_transform
             self._2d_convex_hull_mesh_result = rounded_hull
 
+            if mesh is not None:
+                hull_points = None
+                if rounded_hull is not None:
+                    hull_points = rounded_hull.getPoints() - numpy.array([transform_data[0, 3], transform_data[2, 3]], dtype = rounded_hull.getPoints().dtype)
+                if len(self._shared_hull_cache) >= self._max_shared_hull_cache_size:
+                    self._shared_hull_cache.clear()
+                self._shared_hull_cache[shared_key] = (mesh, hull_points)
+
             return rounded_hull
 
     def _getHeadAndFans(self):
-        return Polygon(numpy.array(self._global_stack.getProperty("machine_head_with_fans_polygon", "value"), numpy.float32))
+        return Polygon(numpy.array(ConvexHullManager.getInstance().getGlobalStack().getProperty("machine_head_with_fans_polygon", "value"), numpy.float32))
 
     def _compute2DConvexHeadFull(self):
         return self._compute2DConvexHull().getMinkowskiHull(self._getHeadAndFans())
@@ -213,20 +272,7 @@ class ConvexHullDecorator(SceneNodeDecorator):
         return convex_hull.getMinkowskiHull(Polygon(numpy.array([[-0.5, -0.5], [-0.5, 0.5], [0.5, 0.5], [0.5, -0.5]], numpy.float32)))
 
     def _onChanged(self, *args):
-        self.recomputeConvexHull()
-
-    def _onGlobalStackChanged(self):
-        if self._global_stack:
-            self._global_stack.propertyChanged.disconnect(self._onSettingValueChanged)
-            self._global_stack.containersChanged.disconnect(self._onChanged)
-
-        self._global_stack = Application.getInstance().getGlobalContainerStack()
-
-        if self._global_stack:
-            self._global_stack.propertyChanged.connect(self._onSettingValueChanged)
-            self._global_stack.containersChanged.connect(self._onChanged)
-
-            self._onChanged()
+        ConvexHullManager.getInstance().scheduleUpdate(self)
 
     ## Returns true if node is a descendent or the same as the root node.
     def __isDescendant(self, root, node):
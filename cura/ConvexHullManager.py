@@ -0,0 +1,88 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from PyQt5.QtCore import QTimer
+
+from UM.Application import Application
+
+import weakref
+
+##  Schedules the recomputation of the convex hulls of all nodes in the scene.
+#
+#   Instead of every ConvexHullDecorator listening to the application, the controller and the global stack, the
+#   manager listens to them once. Decorators are marked as changed, and all changed decorators recompute their hull
+#   together once control returns to the event loop. Several changes in a row, like a tool operation that changes
+#   many nodes or a change of machine that changes several settings, therefore only cause one recomputation per node.
+class ConvexHullManager:
+    def __init__(self):
+        # All decorators, and the decorators that need to recompute their hull.
+        self._decorators = weakref.WeakSet()
+        self._changed_decorators = weakref.WeakSet()
+
+        self._update_timer = QTimer()
+        self._update_timer.setInterval(0)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.timeout.connect(self._onUpdateTimerFinished)
+
+        self._global_stack = None
+        Application.getInstance().globalContainerStackChanged.connect(self._onGlobalStackChanged)
+        Application.getInstance().getController().toolOperationStarted.connect(self._onAllChanged)
+        Application.getInstance().getController().toolOperationStopped.connect(self._onAllChanged)
+
+        self._onGlobalStackChanged()
+
+    ##  Get the instance of the manager, or create one if no instance exists yet.
+    @classmethod
+    def getInstance(cls):
+        if not cls.__instance:
+            cls.__instance = ConvexHullManager()
+        return cls.__instance
+
+    ##  Get the global container stack that the hulls are computed for.
+    def getGlobalStack(self):
+        return self._global_stack
+
+    ##  Register a decorator, so it is updated when the settings change or a tool operation starts or stops.
+    def addDecorator(self, decorator):
+        self._decorators.add(decorator)
+
+    ##  Mark a decorator as changed, so it recomputes its hull once control returns to the event loop.
+    def scheduleUpdate(self, decorator):
+        self._changed_decorators.add(decorator)
+        self._update_timer.start()
+
+    ##  Recompute the hulls of all changed decorators right away.
+    def update(self):
+        self._update_timer.stop()
+
+        decorators = list(self._changed_decorators)
+        self._changed_decorators.clear()
+        for decorator in decorators:
+            decorator.recomputeConvexHull()
+
+    def _onUpdateTimerFinished(self):
+        self.update()
+
+    def _onAllChanged(self, *args):
+        for decorator in list(self._decorators):
+            self._changed_decorators.add(decorator)
+        self._update_timer.start()
+
+    def _onSettingValueChanged(self, key, property_name):
+        if key == "print_sequence" and property_name == "value":
+            self._onAllChanged()
+
+    def _onGlobalStackChanged(self):
+        if self._global_stack:
+            self._global_stack.propertyChanged.disconnect(self._onSettingValueChanged)
+            self._global_stack.containersChanged.disconnect(self._onAllChanged)
+
+        self._global_stack = Application.getInstance().getGlobalContainerStack()
+
+        if self._global_stack:
+            self._global_stack.propertyChanged.connect(self._onSettingValueChanged)
+            self._global_stack.containersChanged.connect(self._onAllChanged)
+
+            self._onAllChanged()
+
+    __instance = None
@@ -2,87 +2,69 @@
 # Cura is released under the terms of the AGPLv3 or higher.
 
 from UM.Scene.SceneNode import SceneNode
-from UM.Resources import Resources
-from UM.Math.Color import Color
-from UM.Math.Vector import Vector
-from UM.Mesh.MeshBuilder import MeshBuilder  # To create a mesh to display the convex hull with.
 
-from UM.View.GL.OpenGL import OpenGL
+from cura.ConvexHullShadow import ConvexHullShadow
 
 class ConvexHullNode(SceneNode):
     ##  Convex hull node is a special type of scene node that is used to display a 2D area, to indicate the
     #   location an object uses on the buildplate. This area (or area's in case of one at a time printing) is
     #   then displayed as a transparent shadow.
+    #
+    #   The shadows of all convex hull nodes are drawn together by the ConvexHullShadow node of the scene. This
+    #   node only keeps its own part of that shadow up to date.
     def __init__(self, node, hull, parent = None):
         super().__init__(parent)
 
         self.setCalculateBoundingBox(False)
 
-        self._shader = None
-
         self._original_parent = parent
 
-        # Color of the drawn convex hull
-        self._color = Color(35, 35, 35, 128)
-
-        # The y-coordinate of the convex hull mesh. Must not be 0, to prevent z-fighting.
-        self._mesh_height = 0.1
-
         # The node this mesh is "watching"
         self._node = node
-        self._node.decoratorsChanged.connect(self._onNodeDecoratorsChanged)
-        self._onNodeDecoratorsChanged(self._node)
 
-        self._convex_hull_head_mesh = None
         self._hull = hull
+        self._hull_points = self._getHullPoints()
 
-        if self._hull:
-            hull_mesh = self.createHullMesh(self._hull.getPoints())
-            if hull_mesh:
-                self.setMeshData(hull_mesh)
-        convex_hull_head = self._node.callDecoration("getConvexHullHead")
-        if convex_hull_head:
-            self._convex_hull_head_mesh = self.createHullMesh(convex_hull_head.getPoints())
+        self._shadow = None
+        if parent is not None:
+            self._shadow = ConvexHullShadow.getInstance(parent)
+            self._shadow.setHulls(self, self._hull_points)
+
+        self.parentChanged.connect(self._onParentChanged)
 
     def getHull(self):
         return self._hull
 
-    ##  Actually create the mesh from the hullpoints
-    #   /param hull_points list of xy values
-    #   /return meshData
-    def createHullMesh(self, hull_points):
-        # Input checking.
-        if len(hull_points) < 3:
-            return None
-
-        mesh_builder = MeshBuilder()
-        point_first = Vector(hull_points[0][0], self._mesh_height, hull_points[0][1])
-        point_previous = Vector(hull_points[1][0], self._mesh_height, hull_points[1][1])
-        for point in hull_points[2:]:  # Add the faces in the order of a triangle fan.
-            point_new = Vector(point[0], self._mesh_height, point[1])
-            mesh_builder.addFace(point_first, point_previous, point_new, color = self._color)
-            point_previous = point_new  # Prepare point_previous for the next triangle.
-
-        return mesh_builder.build()
+    ##  Replace the hull, updating only the part of the shadow of this node.
+    #
+    #   \param hull The new convex hull Polygon.
+    def setHull(self, hull):
+        self._hull = hull
+        self._hull_points = self._getHullPoints()
+        if self._shadow and self.getParent() is not None:
+            self._shadow.setHulls(self, self._hull_points)
 
     def getWatchedNode(self):
         return self._node
 
+    ##  The shadow is rendered by the ConvexHullShadow node, so there is nothing to render here.
     def render(self, renderer):
-        if not self._shader:
-            self._shader = OpenGL.getInstance().createShaderProgram(Resources.getPath(Resources.Shaders, "default.shader"))
-            self._shader.setUniformValue("u_color", self._color)
-
-        if self.getParent():
-            if self.getMeshData():
-                renderer.queueNode(self, transparent = True, shader = self._shader, backface_cull = True, sort = -8)
-                if self._convex_hull_head_mesh:
-                    renderer.queueNode(self, shader = self._shader, transparent = True, mesh = self._convex_hull_head_mesh, backface_cull = True, sort = -8)
-
         return True
 
-    def _onNodeDecoratorsChanged(self, node):
-        self._color = Color(35, 35, 35, 0.5)
-
-        if not node:
-            return
\ No newline at end of file
+    def _getHullPoints(self):
+        hull_points = []
+        if self._hull:
+            hull_points.append(self._hull.getPoints())
+        convex_hull_head = self._node.callDecoration("getConvexHullHead")
+        if convex_hull_head:
+            hull_points.append(convex_hull_head.getPoints())
+        return hull_points
+
+    def _onParentChanged(self, node):
+        if self.getParent() is None:
+            if self._shadow:
+                self._shadow.removeHulls(self)
+        else:
+            if self._shadow is None:
+                self._shadow = ConvexHullShadow.getInstance(self._original_parent or self.getParent())
+            self._shadow.setHulls(self, self._hull_points)
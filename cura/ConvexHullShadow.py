@@ -0,0 +1,170 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Scene.SceneNode import SceneNode
+from UM.Resources import Resources
+from UM.Math.Color import Color
+from UM.Mesh.MeshData import MeshData
+from UM.View.GL.OpenGL import OpenGL
+
+import collections
+import numpy
+
+##  Scene node that draws the shadows of all convex hull nodes in the scene.
+#
+#   Instead of every ConvexHullNode building and rendering its own meshes, the triangles of all hulls are kept in a
+#   single vertex array. Every ConvexHullNode owns a slice of that array, which is replaced when its hull changes.
+#   All shadows are then drawn with a single render batch.
+#
+#   Every slice has some spare room, filled with degenerate triangles that draw nothing, so a hull that gets a few more
+#   or fewer points still fits in its slice and only that slice is written.
+class ConvexHullShadow(SceneNode):
+    ##  The minimum number of spare triangles in the slice of a node.
+    _min_spare_triangles = 8
+
+    def __init__(self, parent = None):
+        super().__init__(parent)
+
+        self.setCalculateBoundingBox(False)
+
+        self._shader = None
+
+        # Color of the drawn convex hulls
+        self._color = Color(35, 35, 35, 128)
+
+        # The y-coordinate of the convex hull mesh. Must not be 0, to prevent z-fighting.
+        self._mesh_height = 0.1
+
+        # Triangle vertices of all hulls, and for each hull node the (start, count) of its part of the vertices,
+        # including the spare room.
+        self._vertices = numpy.zeros((0, 3), dtype = numpy.float32)
+        self._slices = collections.OrderedDict()
+
+        self._mesh = None
+        self._mesh_dirty = False
+
+        # Cache for the mesh with only the shadows of some nodes, see renderWatchedNodes().
+        self._partial_mesh = None
+        self._partial_mesh_key = None
+
+        ConvexHullShadow.__instance = self
+
+    ##  Get the shadow node of the scene, creating it if it does not exist yet.
+    #
+    #   \param root The root of the scene, used as parent if the shadow node needs to be created.
+    @classmethod
+    def getInstance(cls, root = None):
+        if not cls.__instance or (root is not None and cls.__instance.getParent() is not root):
+            if root is None:
+                return None
+            cls.__instance = ConvexHullShadow(root)
+        return cls.__instance
+
+    ##  Set the hulls drawn for a hull node, replacing any previous hulls of that node.
+    #
+    #   \param hull_node The ConvexHullNode that the hulls belong to.
+    #   \param hulls List of point arrays of the hulls to draw.
+    def setHulls(self, hull_node, hulls):
+        vertices = [self._createTriangleFan(points) for points in hulls if points is not None and len(points) >= 3]
+        if vertices:
+            vertices = numpy.concatenate(vertices)
+        else:
+            vertices = numpy.zeros((0, 3), dtype = numpy.float32)
+
+        if hull_node not in self._slices or self._slices[hull_node][1] < len(vertices):
+            # Make a new slice at the end, with room for the hulls to grow.
+            self.removeHulls(hull_node)
+            count = len(vertices) + 3 * max(self._min_spare_triangles, len(vertices) // 6)
+            self._slices[hull_node] = (len(self._vertices), count)
+            self._vertices = numpy.concatenate((self._vertices, numpy.zeros((count, 3), dtype = numpy.float32)))
+
+        # Only the slice of this node changes. The rest of the slice is filled with degenerate triangles.
+        start, count = self._slices[hull_node]
+        self._vertices[start:start + len(vertices)] = vertices
+        self._vertices[start + len(vertices):start + count] = 0
+
+        self._mesh_dirty = True
+
+    ##  Stop drawing the hulls of a hull node.
+    def removeHulls(self, hull_node):
+        if hull_node not in self._slices:
+            return
+
+        start, count = self._slices.pop(hull_node)
+        if count > 0:
+            self._vertices = numpy.concatenate((self._vertices[:start], self._vertices[start + count:]))
+            for other_node, (other_start, other_count) in self._slices.items():
+                if other_start > start:
+                    self._slices[other_node] = (other_start - count, other_count)
+
+        self._mesh_dirty = True
+
+    def render(self, renderer):
+        if not self.getParent():
+            return True
+
+        mesh = self._getMesh()
+        if mesh:
+            renderer.queueNode(self, transparent = True, shader = self._getShader(), mesh = mesh, backface_cull = True, sort = -8)
+
+        return True
+
+    ##  Render only the shadows of some nodes, for instance the selected nodes.
+    #
+    #   \param renderer The renderer to queue the shadows with.
+    #   \param watched_nodes The scene nodes to render the shadows of.
+    def renderWatchedNodes(self, renderer, watched_nodes):
+        hull_nodes = [hull_node for hull_node in self._slices if hull_node.getWatchedNode() in watched_nodes]
+        if not hull_nodes:
+            return
+
+        key = tuple((id(hull_node), self._slices[hull_node]) for hull_node in hull_nodes)
+        if self._mesh_dirty or key != self._partial_mesh_key:
+            vertices = numpy.concatenate([self._vertices[start:start + count] for start, count in (self._slices[hull_node] for hull_node in hull_nodes)])
+            self._partial_mesh = self._createMesh(vertices)
+            self._partial_mesh_key = key
+
+        if self._partial_mesh:
+            renderer.queueNode(self, transparent = True, shader = self._getShader(), mesh = self._partial_mesh, backface_cull = True, sort = -8)
+
+    def _getShader(self):
+        if not self._shader:
+            self._shader = OpenGL.getInstance().createShaderProgram(Resources.getPath(Resources.Shaders, "default.shader"))
+            self._shader.setUniformValue("u_color", self._color)
+        return self._shader
+
+    def _getMesh(self):
+        if self._mesh_dirty:
+            self._mesh = self._createMesh(self._vertices)
+            self._mesh_dirty = False
+            self._partial_mesh_key = None
+        return self._mesh
+
+    def _createMesh(self, vertices):
+        if len(vertices) == 0:
+            return None
+
+        normals = numpy.zeros(vertices.shape, dtype = numpy.float32)
+        normals[:, 1] = 1.0
+        return MeshData(vertices = numpy.array(vertices), normals = normals)
+
+    ##  Create the triangles of a hull, in the order of a triangle fan.
+    #
+    #   \param points The points of the hull, as (x, z) pairs.
+    #   \return An array of vertices, three per triangle.
+    def _createTriangleFan(self, points):
+        points = numpy.asarray(points, dtype = numpy.float32)
+        triangle_count = len(points) - 2
+
+        vertices = numpy.empty((triangle_count, 3, 3), dtype = numpy.float32)
+        vertices[:, :, 1] = self._mesh_height
+        vertices[:, 0, 0] = points[0, 0]
+        vertices[:, 0, 2] = points[0, 1]
+        vertices[:, 1, 0] = points[1:-1, 0]
+        vertices[:, 1, 2] = points[1:-1, 1]
+        vertices[:, 2, 0] = points[2:, 0]
+        vertices[:, 2, 2] = points[2:, 1]
+
+        return vertices.reshape(-1, 3)
+
+    __instance = None
@@ -35,6 +35,16 @@ from UM.i18n import i18nCatalog
 from . import ExtruderManager
 from . import ExtrudersModel
 from . import PlatformPhysics
+from . import MeshDecimator
+from . import Arrange
+from . import SceneBoundingBoxTracker
+from . import SceneNodeRegistry
+from . import MeshHullCache
+from . import ParallelMeshLoader
+from . import MeshCache
+from . import ReadMeshCacheJob
+from . import WriteMeshCacheJob
+from . import WeldMeshJob
 from . import BuildVolume
 from . import CameraAnimation
 from . import PrintInformation
@@ -87,6 +97,10 @@ class CuraApplication(QtApplication):
 
     Q_ENUMS(ResourceTypes)
 
+    ##  The extensions of the mesh files that are kept in the mesh cache. Files that need to ask the user how to read
+    #   them, like images, are always read again.
+    _cached_mesh_extensions = [".stl", ".obj"]
+
     def __init__(self):
         Resources.addSearchPath(os.path.join(QtApplication.getInstallPrefix(), "share", "cura", "resources"))
         if not hasattr(sys, "frozen"):
@@ -118,6 +132,7 @@ class CuraApplication(QtApplication):
             "LocalFileOutputDevice"
         ])
         self._physics = None
+        self._mesh_decimator = None
         self._volume = None
         self._platform = None
         self._output_devices = {}
@@ -125,6 +140,8 @@ class CuraApplication(QtApplication):
         self._previous_active_tool = None
         self._platform_activity = False
         self._scene_bounding_box = AxisAlignedBox.Null
+        self._scene_bounding_box_tracker = None
+        self._gcode_post_processors = []
 
         self._job_name = None
         self._center_after_select = False
@@ -134,6 +151,9 @@ class CuraApplication(QtApplication):
 
         self._i18n_catalog = i18nCatalog("cura")
 
+        # The registry must be connected to the scene before anything else, so it is up to date for the others.
+        SceneNodeRegistry.SceneNodeRegistry.getInstance()
+        MeshHullCache.MeshHullCache.getInstance()
         self.getController().getScene().sceneChanged.connect(self.updatePlatformActivity)
         self.getController().toolOperationStopped.connect(self._onToolOperationStopped)
 
@@ -183,8 +203,12 @@ class CuraApplication(QtApplication):
         Preferences.getInstance().addPreference("view/center_on_select", True)
         Preferences.getInstance().addPreference("mesh/scale_to_fit", True)
         Preferences.getInstance().addPreference("mesh/scale_tiny_meshes", True)
+        Preferences.getInstance().addPreference("mesh/cache_size", 1024) # In MB.
         Preferences.getInstance().setDefault("local_file/last_used_type", "text/x-gcode")
 
+        self._mesh_cache = MeshCache.MeshCache(os.path.join(Resources.getCacheStoragePath(), "meshes"), self._getMeshCacheSizeLimit())
+        Preferences.getInstance().preferenceChanged.connect(self._onPreferenceChanged)
+
         Preferences.getInstance().setDefault("general/visible_settings", """
             machine_settings
                 resolution
@@ -302,6 +326,7 @@ class CuraApplication(QtApplication):
                 with SaveFile(path, "wt", -1, "utf-8") as f:
                     f.write(data)
 
+        self._mesh_cache.saveIndex()
 
     @pyqtSlot(result = QUrl)
     def getDefaultPath(self):
@@ -312,6 +337,7 @@ class CuraApplication(QtApplication):
     def _loadPlugins(self):
         self._plugin_registry.addType("profile_reader", self._addProfileReader)
         self._plugin_registry.addType("profile_writer", self._addProfileWriter)
+        self._plugin_registry.addType("gcode_post_processor", self._addGCodePostProcessor)
         self._plugin_registry.addPluginLocation(os.path.join(QtApplication.getInstallPrefix(), "lib", "cura"))
         if not hasattr(sys, "frozen"):
             self._plugin_registry.addPluginLocation(os.path.join(os.path.abspath(os.path.dirname(__file__)), "..", "plugins"))
@@ -353,6 +379,7 @@ class CuraApplication(QtApplication):
         self.getRenderer().setBackgroundColor(QColor(245, 245, 245))
 
         self._physics = PlatformPhysics.PlatformPhysics(controller, self._volume)
+        self._mesh_decimator = MeshDecimator.MeshDecimator(controller)
 
         camera = Camera("3d", root)
         camera.setPosition(Vector(-80, 250, 700))
@@ -380,10 +407,8 @@ class CuraApplication(QtApplication):
         if self._engine.rootObjects:
             self.closeSplash()
 
-            for file in self.getCommandLineOption("file", []):
-                self._openFile(file)
-            for file_name in self._open_file_queue: #Open all the files that were queued up while plug-ins were loading.
-                self._openFile(file_name)
+            # Open the files of the command line and all the files that were queued up while plug-ins were loading.
+            self._openFiles(self.getCommandLineOption("file", []) + self._open_file_queue)
 
             self._started = True
 
@@ -472,30 +497,27 @@ class CuraApplication(QtApplication):
     def getSceneBoundingBoxString(self):
         return self._i18n_catalog.i18nc("@info", "%(width).1f x %(depth).1f x %(height).1f mm") % {'width' : self._scene_bounding_box.width.item(), 'depth': self._scene_bounding_box.depth.item(), 'height' : self._scene_bounding_box.height.item()}
 
+    ##  Update the platform activity and scene bounding box after a change in the scene.
+    #
+    #   The bounding box and number of objects are maintained incrementally by the SceneBoundingBoxTracker, so this
+    #   does not need to visit the entire scene.
+    #
+    #   \param node The node that changed, as passed by the sceneChanged signal.
     def updatePlatformActivity(self, node = None):
-        count = 0
-        scene_bounding_box = None
-        for node in DepthFirstIterator(self.getController().getScene().getRoot()):
-            if type(node) is not SceneNode or not node.getMeshData():
-                continue
+        if self._scene_bounding_box_tracker is None:
+            self._scene_bounding_box_tracker = SceneBoundingBoxTracker.SceneBoundingBoxTracker(self.getController().getScene().getRoot())
+            node = None
+        self._scene_bounding_box_tracker.update(node)
 
-            count += 1
-            if not scene_bounding_box:
-                scene_bounding_box = node.getBoundingBox()
-            else:
-                other_bb = node.getBoundingBox()
-                if other_bb is not None:
-                    scene_bounding_box = scene_bounding_box + node.getBoundingBox()
-
-        if not scene_bounding_box:
-            scene_bounding_box = AxisAlignedBox.Null
-
-        if repr(self._scene_bounding_box) != repr(scene_bounding_box):
+        scene_bounding_box = self._scene_bounding_box_tracker.getBoundingBox()
+        if scene_bounding_box.isValid() != self._scene_bounding_box.isValid() or scene_bounding_box.minimum != self._scene_bounding_box.minimum or scene_bounding_box.maximum != self._scene_bounding_box.maximum:
             self._scene_bounding_box = scene_bounding_box
             self.sceneBoundingBoxChanged.emit()
 
-        self._platform_activity = True if count > 0 else False
-        self.activityChanged.emit()
+        platform_activity = self._scene_bounding_box_tracker.getNodeCount() > 0
+        if platform_activity != self._platform_activity:
+            self._platform_activity = platform_activity
+            self.activityChanged.emit()
 
     # Remove all selected objects from the scene.
     @pyqtSlot()
@@ -544,20 +566,102 @@ class CuraApplication(QtApplication):
             node = Selection.getSelectedObject(0)
 
         if node:
+            if node.getParent() and node.getParent().callDecoration("isGroup"):
+                node = node.getParent()
+
+            # Find a free spot for every copy, so they don't have to be pushed apart afterwards.
+            arranger = self._createArranger(list(self._getArrangeableNodes()))
+            hull = node.callDecoration("getConvexHull")
+            head_hull = node.callDecoration("getConvexHullHead")
+
             op = GroupedOperation()
             for _ in range(count):
-                if node.getParent() and node.getParent().callDecoration("isGroup"):
-                    new_node = copy.deepcopy(node.getParent()) #Copy the group node.
-                    new_node.callDecoration("recomputeConvexHull")
-
-                    op.addOperation(AddSceneNodeOperation(new_node,node.getParent().getParent()))
-                else:
-                    new_node = copy.deepcopy(node)
-                    new_node.callDecoration("recomputeConvexHull")
-                    op.addOperation(AddSceneNodeOperation(new_node, node.getParent()))
+                new_node = self._copyNodeSharingMeshData(node)
+                if arranger and hull:
+                    translation = arranger.place(hull.getPoints(), head_hull.getPoints() if head_hull else None)
+                    if translation is not None:
+                        new_node.setPosition(new_node.getPosition() + Vector(float(translation[0]), 0, float(translation[1])))
+                new_node.callDecoration("recomputeConvexHull")
+                op.addOperation(AddSceneNodeOperation(new_node, node.getParent()))
 
             op.push()
 
+    ##  Create a copy of a node and its children that shares their mesh data.
+    #
+    #   Mesh data is never modified in place, so the copies can share the vertex data of the original and only
+    #   differ in their transformation. This keeps memory use and copy time independent of the number of copies.
+    def _copyNodeSharingMeshData(self, node):
+        memo = {}
+        for child in DepthFirstIterator(node):
+            mesh_data = child.getMeshData()
+            if mesh_data is not None:
+                memo[id(mesh_data)] = mesh_data  # Deepcopy returns objects in the memo as they are.
+        return copy.deepcopy(node, memo)
+
+    ##  Arrange all objects on the build plate, so that none of them overlap.
+    #
+    #   Objects are placed from large to small, each one as close to the centre of the build plate as possible.
+    #   Objects that do not fit on the build plate are left where they are.
+    @pyqtSlot()
+    def arrangeAll(self):
+        if not self.getController().getToolsEnabled():
+            return
+
+        arranger = self._createArranger([])
+        if not arranger:
+            return
+
+        nodes = []
+        for node in self._getArrangeableNodes():
+            hull = node.callDecoration("getConvexHull")
+            if hull and len(hull.getPoints()) >= 3:
+                nodes.append((numpy.prod(numpy.max(hull.getPoints(), axis = 0) - numpy.min(hull.getPoints(), axis = 0)), node))
+        nodes.sort(key = lambda item: item[0], reverse = True)
+
+        op = GroupedOperation()
+        for _, node in nodes:
+            hull = node.callDecoration("getConvexHull")
+            head_hull = node.callDecoration("getConvexHullHead")
+            translation = arranger.place(hull.getPoints(), head_hull.getPoints() if head_hull else None)
+            if translation is None:
+                Logger.log("w", "Unable to find a place for %s on the build plate", node.getName())
+                continue
+            op.addOperation(SetTransformOperation(node, node.getPosition() + Vector(float(translation[0]), 0, float(translation[1]))))
+
+        op.push()
+
+    ##  Get all nodes that can be placed on the build plate by themselves: objects and groups, but not grouped objects.
+    def _getArrangeableNodes(self):
+        for node in DepthFirstIterator(self.getController().getScene().getRoot()):
+            if type(node) is not SceneNode:
+                continue
+            if not node.getMeshData() and not node.callDecoration("isGroup"):
+                continue  # Node that doesnt have a mesh and is not a group.
+            if node.getParent() and node.getParent().callDecoration("isGroup"):
+                continue  # Grouped nodes are placed together with their group.
+            yield node
+
+    ##  Create an arranger for the build plate, with the disallowed areas and the given nodes marked as taken.
+    #
+    #   \return An Arrange instance, or None if there is no build volume yet.
+    def _createArranger(self, occupying_nodes):
+        if not self._volume or not self._volume.getBoundingBox():
+            return None
+
+        volume_box = self._volume.getBoundingBox()
+        arranger = Arrange.Arrange((volume_box.left, volume_box.back), (volume_box.right, volume_box.front))
+        for area in self._volume.getDisallowedAreas():
+            arranger.addArea(area.getPoints())
+
+        for node in occupying_nodes:
+            hull = node.callDecoration("getConvexHull")
+            if not hull:
+                continue
+            head_hull = node.callDecoration("getConvexHullHead")
+            arranger.occupy(hull.getPoints(), head_hull.getPoints() if head_hull else None)
+
+        return arranger
+
     ##  Center object on platform.
     @pyqtSlot("quint64")
     def centerObject(self, object_id):
@@ -656,16 +760,50 @@ class CuraApplication(QtApplication):
         if not nodes:
             return
 
+        nodes_by_file_name = {}
         for node in nodes:
-            if not node.getMeshData():
-                continue
-
             file_name = node.getMeshData().getFileName()
             if file_name:
-                job = ReadMeshJob(file_name)
-                job._node = node
-                job.finished.connect(self._reloadMeshFinished)
-                job.start()
+                nodes_by_file_name.setdefault(file_name, []).append(node)
+
+        # Files in the mesh cache are not parsed at all.
+        job = self._createReadMeshCacheJob(list(nodes_by_file_name.keys()))
+        job._nodes_by_file_name = nodes_by_file_name
+        job.finished.connect(self._onReloadMeshCacheRead)
+        job.start()
+
+    def _onReloadMeshCacheRead(self, job):
+        nodes_by_file_name = job._nodes_by_file_name
+        for file_name, mesh_data in job.getResult():
+            if mesh_data is not None:
+                for node in nodes_by_file_name.pop(file_name):
+                    node.setMeshData(mesh_data)
+
+        # Large batches of files are parsed in parallel, the rest by the mesh readers.
+        loadable_file_names = ParallelMeshLoader.ParallelMeshLoader.getInstance().getLoadableFiles(list(nodes_by_file_name.keys()))
+        ParallelMeshLoader.ParallelMeshLoader.getInstance().load(loadable_file_names, lambda results: self._onParallelReloadFinished(results, nodes_by_file_name))
+
+        for file_name, file_nodes in nodes_by_file_name.items():
+            if file_name in loadable_file_names:
+                continue
+            for node in file_nodes:
+                self._reloadMesh(file_name, node)
+
+    def _reloadMesh(self, file_name, node):
+        job = ReadMeshJob(file_name)
+        job._node = node
+        job.finished.connect(self._reloadMeshFinished)
+        job.start()
+
+    def _onParallelReloadFinished(self, results, nodes_by_file_name):
+        for file_name, mesh_data in results:
+            for node in nodes_by_file_name[file_name]:
+                if mesh_data is None:
+                    self._reloadMesh(file_name, node) # Let the mesh readers try and report the problem.
+                else:
+                    node.setMeshData(mesh_data)
+            if mesh_data is not None:
+                self._cacheMeshData(file_name, mesh_data)
     
     ##  Get logging data of the backend engine
     #   \returns \type{string} Logging data
@@ -678,6 +816,16 @@ class CuraApplication(QtApplication):
 
         return log
 
+    ##  Get a summary of where the time of the last slice went
+    #   \returns \type{string} The summary, or an empty string if no slice is finished yet
+    @pyqtSlot(result = str)
+    def getSliceTraceSummary(self):
+        backend = self.getBackend()
+        if not hasattr(backend, "getLastSliceTrace") or backend.getLastSliceTrace() is None:
+            return ""
+
+        return backend.getLastSliceTrace().getSummary()
+
     recentFilesChanged = pyqtSignal()
 
     @pyqtProperty("QVariantList", notify = recentFilesChanged)
@@ -777,11 +925,70 @@ class CuraApplication(QtApplication):
 
             self.getController().getScene().sceneChanged.emit(node) #Force scene change.
 
+            # Only files that load as a single mesh can be cached.
+            cache_file_name = job.getFileName() if not node.getChildren() else None
+            for mesh_node in DepthFirstIterator(node):
+                if mesh_node.getMeshData():
+                    self._weldMesh(mesh_node, cache_file_name)
+
+    ##  Add the scene nodes of files that were loaded without a mesh reader to the scene, in one operation.
+    #
+    #   The nodes are still created by ReadMeshJobs, so they are scaled like the nodes of other files.
+    #
+    #   \param results List of (file name, mesh data) tuples. Files without mesh data are opened with a mesh reader.
+    #   \param cache Whether to store the mesh data in the mesh cache.
+    def _onMeshesLoaded(self, results, cache = True):
+        jobs = []
+        for file_name, mesh_data in results:
+            if mesh_data is None:
+                self._readMesh(file_name) # Let the mesh readers try and report the problem.
+                continue
+
+            if cache:
+                self._cacheMeshData(file_name, mesh_data)
+            jobs.append(ParallelMeshLoader.ParallelMeshLoader.createReadJob(file_name, mesh_data))
+
+        for job in jobs:
+            job._batch = jobs
+            job.finished.connect(self._onLoadedMeshJobFinished)
+            job.start()
+
+    def _onLoadedMeshJobFinished(self, job):
+        # The nodes of a batch are added together, once the last job is finished. The batch is emptied once it is
+        # added, since the jobs of the batch may all be finished before the first of them is handled here.
+        if not job._batch or not all(batch_job.isFinished() for batch_job in job._batch):
+            return
+        batch = list(job._batch)
+        job._batch.clear()
+
+        op = GroupedOperation()
+        nodes = []
+        for batch_job in batch:
+            node = batch_job.getResult()
+            if not node:
+                continue
+            node.setSelectable(True)
+            node.setName(os.path.basename(batch_job.getFileName()))
+            op.addOperation(AddSceneNodeOperation(node, self.getController().getScene().getRoot()))
+            nodes.append((batch_job.getFileName(), node))
+
+        if not nodes:
+            return
+        op.push()
+
+        for file_name, node in nodes:
+            self.fileLoaded.emit(file_name)
+            self._addRecentFile(file_name)
+            self.getController().getScene().sceneChanged.emit(node) #Force scene change.
+
     def _onJobFinished(self, job):
         if type(job) is not ReadMeshJob or not job.getResult():
             return
 
-        f = QUrl.fromLocalFile(job.getFileName())
+        self._addRecentFile(job.getFileName())
+
+    def _addRecentFile(self, file_name):
+        f = QUrl.fromLocalFile(file_name)
         if f in self._recent_files:
             self._recent_files.remove(f)
 
@@ -799,12 +1006,87 @@ class CuraApplication(QtApplication):
     def _reloadMeshFinished(self, job):
         # TODO; This needs to be fixed properly. We now make the assumption that we only load a single mesh!
         job._node.setMeshData(job.getResult().getMeshData())
+        if job._node.getMeshData():
+            self._weldMesh(job._node, job.getFileName() if not job.getResult().getChildren() else None)
+
+    ##  Replace the mesh of a node that was loaded by a mesh reader by an indexed mesh, in the background.
+    #
+    #   \param node The node with the mesh.
+    #   \param cache_file_name The path to the file to store the mesh in the mesh cache for, or None to not cache it.
+    def _weldMesh(self, node, cache_file_name):
+        if node.getMeshData().hasIndices():
+            if cache_file_name:
+                self._cacheMeshData(cache_file_name, node.getMeshData())
+            return
+
+        job = WeldMeshJob.WeldMeshJob(node.getMeshData())
+        job.finished.connect(lambda job: self._onWeldMeshFinished(job, node, cache_file_name))
+        job.start()
+
+    def _onWeldMeshFinished(self, job, node, cache_file_name):
+        mesh_data = job.getResult()
+        if mesh_data is None or node.getMeshData() is not job.getMesh():
+            return
+
+        node.setMeshData(mesh_data)
+        if cache_file_name:
+            self._cacheMeshData(cache_file_name, mesh_data)
 
     def _openFile(self, file):
-        job = ReadMeshJob(os.path.abspath(file))
+        self._openFiles([file])
+
+    ##  Open several files at once.
+    #
+    #   Files in the mesh cache are not parsed at all. Large batches of the other files are parsed in parallel in worker
+    #   processes, the rest by the mesh readers.
+    def _openFiles(self, files):
+        file_names = [os.path.abspath(file) for file in files]
+        job = self._createReadMeshCacheJob(file_names)
+        job._open_file_names = file_names
+        job.finished.connect(self._onOpenMeshCacheRead)
+        job.start()
+
+    def _onOpenMeshCacheRead(self, job):
+        cached_meshes = [(file_name, mesh_data) for file_name, mesh_data in job.getResult() if mesh_data is not None]
+        if cached_meshes:
+            self._onMeshesLoaded(cached_meshes, cache = False)
+
+        cached_file_names = set(file_name for file_name, mesh_data in cached_meshes)
+        file_names = [file_name for file_name in job._open_file_names if file_name not in cached_file_names]
+        loadable_file_names = ParallelMeshLoader.ParallelMeshLoader.getInstance().getLoadableFiles(file_names)
+        ParallelMeshLoader.ParallelMeshLoader.getInstance().load(loadable_file_names, self._onMeshesLoaded)
+
+        for file_name in file_names:
+            if file_name not in loadable_file_names:
+                self._readMesh(file_name)
+
+    def _readMesh(self, file_name):
+        job = ReadMeshJob(file_name)
         job.finished.connect(self._onFileLoaded)
         job.start()
 
+    ##  Create a job that gets the mesh data of files from the mesh cache, so touched files are hashed in the background.
+    #
+    #   \param file_names List of absolute paths to the files.
+    #   \return A ReadMeshCacheJob for the files that can be cached.
+    def _createReadMeshCacheJob(self, file_names):
+        file_names = [file_name for file_name in file_names if os.path.splitext(file_name)[1].lower() in self._cached_mesh_extensions]
+        return ReadMeshCacheJob.ReadMeshCacheJob(self._mesh_cache, file_names)
+
+    ##  Store the mesh data of a file in the mesh cache, in the background.
+    def _cacheMeshData(self, file_name, mesh_data):
+        if not mesh_data or os.path.splitext(file_name)[1].lower() not in self._cached_mesh_extensions:
+            return
+
+        WriteMeshCacheJob.WriteMeshCacheJob(self._mesh_cache, file_name, mesh_data).start()
+
+    def _getMeshCacheSizeLimit(self):
+        return int(Preferences.getInstance().getValue("mesh/cache_size")) * 1024 * 1024
+
+    def _onPreferenceChanged(self, preference):
+        if preference == "mesh/cache_size":
+            self._mesh_cache.setSizeLimit(self._getMeshCacheSizeLimit())
+
     def _addProfileReader(self, profile_reader):
         # TODO: Add the profile reader to the list of plug-ins that can be used when importing profiles.
         pass
@@ -812,6 +1094,13 @@ class CuraApplication(QtApplication):
     def _addProfileWriter(self, profile_writer):
         pass
 
+    def _addGCodePostProcessor(self, post_processor):
+        self._gcode_post_processors.append(post_processor)
+
+    ##  Get the g-code post-processor plug-ins, in the order in which they are applied.
+    def getGCodePostProcessors(self):
+        return self._gcode_post_processors
+
     @pyqtSlot("QSize")
     def setMinimumWindowSize(self, size):
         self.getMainWindow().setMinimumSize(size)
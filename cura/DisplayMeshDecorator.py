@@ -0,0 +1,32 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Scene.SceneNodeDecorator import SceneNodeDecorator
+
+##  A decorator that holds a simplified copy of the mesh of a node, which is used to display the node.
+#
+#   The full resolution mesh data of the node is still used for everything else, like slicing and convex hulls.
+class DisplayMeshDecorator(SceneNodeDecorator):
+    ##  \param mesh The mesh data that the display mesh was created from.
+    #   \param display_mesh The simplified mesh data.
+    def __init__(self, mesh, display_mesh):
+        super().__init__()
+        self._mesh = mesh
+        self._display_mesh = display_mesh
+
+    ##  Get the mesh data that the display mesh was created from.
+    def getSourceMesh(self):
+        return self._mesh
+
+    ##  Get the simplified mesh data to display.
+    #
+    #   \return The display mesh, or None if the mesh data of the node was changed after it was created.
+    def getDisplayMesh(self):
+        node = self.getNode()
+        if node is not None and node.getMeshData() is not self._mesh:
+            return None
+        return self._display_mesh
+
+    def __deepcopy__(self, memo):
+        # The meshes are not modified, so copies of the node can share them.
+        return DisplayMeshDecorator(self._mesh, self._display_mesh)
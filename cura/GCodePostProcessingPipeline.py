@@ -0,0 +1,91 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Logger import Logger
+from UM.Signal import Signal, signalemitter
+
+import queue
+import re
+import threading
+
+##  Applies g-code post-processors to the layers of one slice as they arrive from the engine.
+#
+#   Layers are queued by the backend and processed in order in a worker thread, which appends the result to the
+#   g-code spool of the scene. Slicing and post-processing therefore overlap, and there is no pass over the complete
+#   g-code afterwards.
+@signalemitter
+class GCodePostProcessingPipeline:
+    _layer_pattern = re.compile(r"^;LAYER:(-?\d+)", re.MULTILINE)
+    _height_pattern = re.compile(r"^G[01]\s[^;\n]*?Z(-?\d*\.?\d+)", re.MULTILINE)
+
+    ##  \param post_processors List of GCodePostProcessor plug-in objects to apply, in order.
+    #   \param gcode_list The GCodeSpool to append the processed g-code of every layer to.
+    def __init__(self, post_processors, gcode_list):
+        self._post_processors = post_processors
+        self._gcode_list = gcode_list
+        self._layer_height = 0.0
+
+        self._queue = queue.Queue()
+        self._aborted = False
+        self._thread = threading.Thread(target = self._run, daemon = True)
+        self._thread.start()
+
+    ##  Emitted when all layers are processed after finish() was called.
+    #
+    #   This is emitted from the worker thread, so the signal delivers it to listeners on the main thread.
+    #
+    #   \param pipeline This pipeline.
+    finished = Signal()
+
+    ##  Queue the g-code of a layer.
+    #
+    #   \param data The g-code of the layer as bytes, encoded as UTF-8.
+    def addLayer(self, data):
+        self._queue.put(data)
+
+    ##  Mark the end of the layers. The finished signal is emitted once all queued layers are processed, so this
+    #   does not wait for the post-processors.
+    def finish(self):
+        self._queue.put(None)
+
+    ##  Stop processing. Layers that are still queued are dropped.
+    def abort(self):
+        self._aborted = True
+        self._queue.put(None)
+
+    def _run(self):
+        for post_processor in self._post_processors:
+            try:
+                post_processor.startSlice()
+            except Exception:
+                Logger.logException("e", "G-code post-processor %s failed to start", post_processor.getPluginId())
+
+        while True:
+            data = self._queue.get()
+            if self._aborted:
+                return
+            if data is None:
+                self.finished.emit(self)
+                return
+
+            gcode = data.decode("utf-8", "replace")
+            layer_index = None
+            match = self._layer_pattern.search(gcode)
+            if match:
+                layer_index = int(match.group(1))
+            match = self._height_pattern.search(gcode)
+            if match:
+                self._layer_height = float(match.group(1))
+
+            for post_processor in self._post_processors:
+                try:
+                    gcode = post_processor.processLayer(gcode, layer_index, self._layer_height)
+                except Exception:
+                    Logger.logException("e", "G-code post-processor %s failed on layer %s", post_processor.getPluginId(), layer_index)
+
+            # The height at the start of the next layer is the last height of this one, unless it moves in Z itself.
+            heights = self._height_pattern.findall(gcode)
+            if heights:
+                self._layer_height = float(heights[-1])
+
+            self._gcode_list.append(gcode)
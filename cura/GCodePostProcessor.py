@@ -0,0 +1,27 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.PluginObject import PluginObject
+
+##  A type of plug-ins that transforms the g-code of every layer while it is received from the engine.
+#
+#   All post-processors are applied one after another to every layer, in the order in which they were loaded, so the
+#   g-code is already post-processed when slicing is done. This runs in a worker thread, so post-processors must not
+#   touch the scene or the interface.
+class GCodePostProcessor(PluginObject):
+    def __init__(self):
+        super().__init__()
+
+    ##  Called before the first layer of a new slice, to reset any state kept between layers.
+    def startSlice(self):
+        pass
+
+    ##  Transform the g-code of a layer.
+    #
+    #   \param gcode The g-code of the layer, as processed by the post-processors before this one.
+    #   \param layer_index The number of the layer, from the ;LAYER: comment in the g-code, or None for g-code that
+    #   is not part of a layer, like the start and end g-code.
+    #   \param layer_height The height of the nozzle at the start of the layer, in mm.
+    #   \return The transformed g-code.
+    def processLayer(self, gcode, layer_index, layer_height):
+        raise NotImplementedError("G-code post-processor plug-in was not correctly implemented. The processLayer function was not implemented.")
@@ -0,0 +1,187 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import os
+import tempfile
+import threading
+
+##  Holds the g-code of a slice in a temporary file instead of in memory.
+#
+#   The g-code of every layer is appended to the file as it arrives from the engine, and the offset of every layer in
+#   the file is kept, so single layers can be read back. Everything that writes or sends the g-code reads it through
+#   iterators that only hold one layer, block or line in memory at a time.
+#
+#   The prefix of the g-code, which the engine sends after the layers, is kept in memory and comes before the layers.
+#
+#   For compatibility with the list of strings that the scene used to have, iterating over a spool gives the g-code
+#   of the prefix and every layer as strings. The temporary file is removed once nothing refers to the spool any more,
+#   so a print that still sends the g-code of a previous slice keeps working.
+class GCodeSpool:
+    ##  The number of bytes read at a time when iterating over blocks or lines.
+    _block_size = 256 * 1024
+
+    ##  The maximum number of bytes copied at a time by copyTo().
+    _copy_chunk_size = 8 * 1024 * 1024
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix = "cura_gcode_")
+        self._lock = threading.Lock()
+
+        self._prefix = b""
+        self._layer_offsets = [] # Start offset in the file of every layer.
+        self._size = 0 # Size of the file.
+        self._newline_count = 0 # Number of newlines in the file.
+        self._last_byte = b"" # The last byte of the file, to know if the last line ends with a newline.
+
+    ##  Append the g-code of a layer.
+    #
+    #   \param data The g-code, as a string or as bytes encoded as UTF-8.
+    def append(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        if not data:
+            return
+
+        with self._lock:
+            self._file.seek(0, 2)
+            self._file.write(data)
+            self._layer_offsets.append(self._size)
+            self._size += len(data)
+            self._newline_count += data.count(b"\n")
+            self._last_byte = data[-1:]
+
+    ##  Set the g-code that comes before all layers.
+    #
+    #   \param data The g-code, as a string or as bytes encoded as UTF-8.
+    def setPrefix(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._prefix = data
+
+    ##  Get the number of layers, not counting the prefix.
+    def getLayerCount(self):
+        return len(self._layer_offsets)
+
+    ##  Get the g-code of a layer.
+    #
+    #   \param index The index of the layer, in the order in which the layers were appended.
+    #   \return The g-code of the layer as a string.
+    def getLayer(self, index):
+        with self._lock:
+            start = self._layer_offsets[index]
+            end = self._layer_offsets[index + 1] if index + 1 < len(self._layer_offsets) else self._size
+        return self._read(start, end - start).decode("utf-8", "replace")
+
+    ##  Get the total size of the g-code in bytes, including the prefix.
+    def getSize(self):
+        return len(self._prefix) + self._size
+
+    ##  Get the number of lines of the g-code, as iterLines() gives them.
+    def getLineCount(self):
+        with self._lock:
+            line_count = self._prefix.count(b"\n") + self._newline_count
+            last_byte = self._last_byte if self._size else self._prefix[-1:]
+        if last_byte and last_byte != b"\n":
+            line_count += 1 # The last line has no newline.
+        return line_count
+
+    ##  Iterate over the g-code in blocks of bytes, starting with the prefix.
+    #
+    #   \param block_size The maximum size of the blocks.
+    def iterBlocks(self, block_size = None):
+        if block_size is None:
+            block_size = self._block_size
+
+        for start in range(0, len(self._prefix), block_size):
+            yield self._prefix[start:start + block_size]
+
+        position = 0
+        while True:
+            with self._lock:
+                size = self._size
+            if position >= size:
+                return
+            block = self._read(position, min(block_size, size - position))
+            position += len(block)
+            yield block
+
+    ##  Iterate over the lines of the g-code, without the newlines.
+    def iterLines(self):
+        partial_line = b""
+        for block in self.iterBlocks():
+            lines = (partial_line + block).split(b"\n")
+            partial_line = lines.pop()
+            for line in lines:
+                yield line.rstrip(b"\r").decode("utf-8", "replace")
+        if partial_line:
+            yield partial_line.rstrip(b"\r").decode("utf-8", "replace")
+
+    ##  Copy the g-code to a file, starting with the prefix.
+    #
+    #   The layers are copied from the temporary file by the operating system where possible, with copy_file_range()
+    #   or sendfile(), so the g-code does not pass through Python. Several copies can run at the same time.
+    #
+    #   \param fd The file descriptor of the file to write to, at the position to write at.
+    #   \param progress_callback Optional function that is called with the number of bytes copied so far and the
+    #   total number of bytes after every chunk.
+    def copyTo(self, fd, progress_callback = None):
+        with self._lock:
+            self._file.flush()
+            size = self._size
+        total_size = len(self._prefix) + size
+
+        self._writeAll(fd, self._prefix)
+        if progress_callback:
+            progress_callback(len(self._prefix), total_size)
+
+        copy_functions = [self._copyFileRange, self._sendFile, self._readAndWrite]
+        in_fd = self._file.fileno()
+        position = 0
+        while position < size:
+            count = min(self._copy_chunk_size, size - position)
+            while True:
+                try:
+                    copied = copy_functions[0](in_fd, fd, position, count)
+                    break
+                except (OSError, AttributeError):
+                    # Not supported by the operating system or for these files; fall back to the next way to copy.
+                    if len(copy_functions) == 1:
+                        raise
+                    copy_functions.pop(0)
+            if copied <= 0:
+                raise IOError("The g-code spool ended before all g-code was copied")
+            position += copied
+            if progress_callback:
+                progress_callback(len(self._prefix) + position, total_size)
+
+    ##  Iterate over the g-code of the prefix and of every layer, as strings.
+    def __iter__(self):
+        if self._prefix:
+            yield self._prefix.decode("utf-8", "replace")
+        for index in range(self.getLayerCount()):
+            yield self.getLayer(index)
+
+    def __len__(self):
+        return self.getLayerCount() + (1 if self._prefix else 0)
+
+    def _copyFileRange(self, in_fd, out_fd, position, count):
+        return os.copy_file_range(in_fd, out_fd, count, position)
+
+    def _sendFile(self, in_fd, out_fd, position, count):
+        return os.sendfile(out_fd, in_fd, position, count)
+
+    def _readAndWrite(self, in_fd, out_fd, position, count):
+        data = self._read(position, count)
+        self._writeAll(out_fd, data)
+        return len(data)
+
+    def _writeAll(self, fd, data):
+        view = memoryview(data)
+        while view:
+            written = os.write(fd, view)
+            view = view[written:]
+
+    def _read(self, position, size):
+        with self._lock:
+            self._file.seek(position)
+            return self._file.read(size)
@@ -0,0 +1,218 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import numpy
+
+##  Keeps the arrays of loaded meshes on disk, so loading the same file again maps the arrays instead of parsing.
+#
+#   Every file is identified by its path, size and modification time. The arrays are stored in bundles of .npy files
+#   that are named by the hash of the contents of the file, so a file that was only touched, or the same file at
+#   another path, still uses the bundle that is already there. When the bundles take more space than the size limit,
+#   the least recently used bundles are removed.
+#
+#   Getting and storing arrays may hash the whole file, so it should be done in a job. The index is written when
+#   arrays are stored or removed; that files were used is only written by saveIndex.
+class MeshCache:
+    ##  The version of the layout of the cache. Caches of other versions are discarded.
+    _version = 1
+
+    ##  The names of the arrays that can be stored.
+    _array_names = ["vertices", "normals", "indices"]
+
+    _hash_block_size = 1 << 20
+
+    ##  \param directory The directory to store the cache in.
+    #   \param size_limit The maximum number of bytes the bundles may take.
+    def __init__(self, directory, size_limit):
+        self._directory = directory
+        self._size_limit = size_limit
+        self._index_file = os.path.join(directory, "index.json")
+
+        # The identity of every cached file by path, and the size and last use of every bundle by hash.
+        self._files = {}
+        self._bundles = {}
+        self._index_changed = False
+        self._loadIndex()
+
+        # Guards the index, since jobs get and store arrays at the same time.
+        self._lock = threading.Lock()
+
+    ##  Change the maximum number of bytes the bundles may take, removing bundles if needed.
+    def setSizeLimit(self, size_limit):
+        with self._lock:
+            self._size_limit = size_limit
+            if self._evict():
+                self._saveIndex()
+
+    ##  Write the index if it changed since it was last written.
+    def saveIndex(self):
+        # Arrays that are being stored write the index when they are done, so never wait for them.
+        if not self._lock.acquire(blocking = False):
+            return
+        try:
+            if self._index_changed:
+                self._saveIndex()
+        finally:
+            self._lock.release()
+
+    ##  Get the arrays of a file from the cache.
+    #
+    #   \param file_name The path to the file.
+    #   \return A dictionary of read-only memory-mapped arrays by name, or None if the file is not in the cache.
+    def get(self, file_name):
+        file_name = os.path.abspath(file_name)
+        with self._lock:
+            entry = self._files.get(file_name)
+            if entry is None:
+                return None
+            entry = dict(entry)
+
+        try:
+            stat = os.stat(file_name)
+            if stat.st_size != entry["size"]:
+                return None
+            # The file may have been touched while its contents are still the same.
+            if stat.st_mtime_ns != entry["mtime"] and self._hashFile(file_name) != entry["hash"]:
+                return None
+        except OSError:
+            return None
+
+        bundle_hash = entry["hash"]
+        with self._lock:
+            if bundle_hash not in self._bundles:
+                return None
+            try:
+                arrays = {}
+                for name in self._bundles[bundle_hash]["arrays"]:
+                    arrays[name] = numpy.load(self._getArrayPath(bundle_hash, name), mmap_mode = "r")
+            except (OSError, ValueError):
+                self._removeBundle(bundle_hash)
+                self._saveIndex()
+                return None
+
+            if file_name in self._files and self._files[file_name]["hash"] == bundle_hash:
+                self._files[file_name]["mtime"] = stat.st_mtime_ns
+            self._bundles[bundle_hash]["last_used"] = time.time()
+            self._index_changed = True
+        return arrays
+
+    ##  Store the arrays of a file in the cache.
+    #
+    #   \param file_name The path to the file.
+    #   \param arrays Dictionary of arrays by name, see _array_names. Arrays that are None are not stored.
+    def put(self, file_name, arrays):
+        file_name = os.path.abspath(file_name)
+        arrays = {name: numpy.asarray(array) for name, array in arrays.items() if name in self._array_names and array is not None}
+        size = sum(array.nbytes for array in arrays.values())
+        if not arrays or size > self._size_limit:
+            return
+
+        try:
+            stat = os.stat(file_name)
+            bundle_hash = self._hashFile(file_name)
+        except OSError:
+            return
+
+        with self._lock:
+            try:
+                if bundle_hash not in self._bundles:
+                    os.makedirs(self._directory, exist_ok = True)
+                    for name, array in arrays.items():
+                        self._writeArray(self._getArrayPath(bundle_hash, name), array)
+                    self._bundles[bundle_hash] = {"arrays": sorted(arrays.keys()), "size": size}
+            except OSError:
+                return
+
+            self._bundles[bundle_hash]["last_used"] = time.time()
+            self._files[file_name] = {"size": stat.st_size, "mtime": stat.st_mtime_ns, "hash": bundle_hash}
+            self._evict()
+            self._saveIndex()
+
+    ##  Get the total number of bytes of all bundles.
+    def getSize(self):
+        with self._lock:
+            return self._getSize()
+
+    ##  Remove the least recently used bundles until the bundles fit within the size limit.
+    #
+    #   \return True if any bundle was removed.
+    def _evict(self):
+        total_size = self._getSize()
+        if total_size <= self._size_limit:
+            return False
+
+        for bundle_hash in sorted(self._bundles, key = lambda bundle_hash: self._bundles[bundle_hash]["last_used"]):
+            total_size -= self._bundles[bundle_hash]["size"]
+            self._removeBundle(bundle_hash)
+            if total_size <= self._size_limit:
+                break
+        return True
+
+    def _getSize(self):
+        return sum(bundle["size"] for bundle in self._bundles.values())
+
+    def _removeBundle(self, bundle_hash):
+        bundle = self._bundles.pop(bundle_hash, None)
+        if bundle is not None:
+            for name in bundle["arrays"]:
+                try:
+                    os.remove(self._getArrayPath(bundle_hash, name))
+                except OSError: # Already removed, or still mapped on Windows; it is overwritten when stored again.
+                    pass
+
+        self._files = {file_name: entry for file_name, entry in self._files.items() if entry["hash"] != bundle_hash}
+
+    def _getArrayPath(self, bundle_hash, name):
+        return os.path.join(self._directory, "{0}_{1}.npy".format(bundle_hash, name))
+
+    ##  Write an array to a temporary file first, so an interrupted write never leaves a broken array behind.
+    def _writeArray(self, path, array):
+        handle, temporary_path = tempfile.mkstemp(suffix = ".npy", dir = self._directory)
+        try:
+            with os.fdopen(handle, "wb") as f:
+                numpy.save(f, array)
+            os.replace(temporary_path, path)
+        except OSError:
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            raise
+
+    def _hashFile(self, file_name):
+        file_hash = hashlib.sha1()
+        with open(file_name, "rb") as f:
+            for block in iter(lambda: f.read(self._hash_block_size), b""):
+                file_hash.update(block)
+        return file_hash.hexdigest()
+
+    def _loadIndex(self):
+        try:
+            with open(self._index_file, "r") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return
+        if index.get("version") != self._version:
+            return
+
+        self._files = index.get("files", {})
+        self._bundles = index.get("bundles", {})
+
+    def _saveIndex(self):
+        index = {"version": self._version, "files": self._files, "bundles": self._bundles}
+        try:
+            os.makedirs(self._directory, exist_ok = True)
+            handle, temporary_path = tempfile.mkstemp(suffix = ".json", dir = self._directory)
+            with os.fdopen(handle, "w") as f:
+                json.dump(index, f)
+            os.replace(temporary_path, self._index_file)
+        except OSError:
+            return
+        self._index_changed = False
@@ -0,0 +1,124 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Logger import Logger
+from UM.Mesh.MeshData import MeshData
+from UM.Preferences import Preferences
+
+from cura.DisplayMeshDecorator import DisplayMeshDecorator
+from cura.MeshSimplifier import MeshSimplifier
+from cura.SceneNodeRegistry import SceneNodeRegistry
+
+##  Creates simplified display meshes for objects with a very large number of triangles.
+#
+#   Whenever an object with more triangles than the triangle budget appears in the scene, a simplified copy of its
+#   mesh is created in the background using vertex clustering, see MeshSimplifier. The copy is added to the node with
+#   a DisplayMeshDecorator, so views can render it instead of the full mesh. Slicing and convex hulls keep using the
+#   full resolution mesh data.
+class MeshDecimator:
+    def __init__(self, controller):
+        self._controller = controller
+        self._controller.getScene().sceneChanged.connect(self._onSceneChanged)
+
+        # The jobs that are currently running, by id of the mesh data they simplify.
+        self._jobs = {}
+
+        # The mesh data that could not be simplified, by id, so it is not tried again on every scene change. The mesh
+        # data is kept here until it leaves the scene, so its id is not reused in the meantime.
+        self._failed_meshes = {}
+
+        Preferences.getInstance().addPreference("view/display_triangle_budget", 1000000)
+        Preferences.getInstance().preferenceChanged.connect(self._onPreferenceChanged)
+
+    ##  Get the mesh data that should be used to display a node.
+    #
+    #   \return The display mesh of the node if it has one, or its mesh data otherwise.
+    @staticmethod
+    def getDisplayMesh(node):
+        return node.callDecoration("getDisplayMesh") or node.getMeshData()
+
+    def _onSceneChanged(self, source):
+        triangle_budget = self._getTriangleBudget()
+        if triangle_budget <= 0:
+            return
+
+        nodes = SceneNodeRegistry.getInstance().getPrintableNodes()
+        if self._failed_meshes:
+            # Forget about failed meshes once their nodes got other mesh data or were removed.
+            mesh_ids = set(id(node.getMeshData()) for node in nodes)
+            self._failed_meshes = {mesh_id: mesh for mesh_id, mesh in self._failed_meshes.items() if mesh_id in mesh_ids}
+
+        for node in nodes:
+            mesh = node.getMeshData()
+            decorator = node.getDecorator(DisplayMeshDecorator)
+            if decorator and decorator.getSourceMesh() is mesh:
+                continue
+            if id(mesh) in self._jobs or id(mesh) in self._failed_meshes or self._getTriangleCount(mesh) <= triangle_budget:
+                continue
+
+            job = _DecimateMeshJob(mesh, triangle_budget)
+            job.finished.connect(self._onJobFinished)
+            self._jobs[id(mesh)] = job
+            job.start()
+
+    def _onJobFinished(self, job):
+        self._jobs.pop(id(job.getMesh()), None)
+
+        if job.getTriangleBudget() != self._getTriangleBudget():
+            # The budget was changed while this job was running, so start again with the new budget.
+            self._onSceneChanged(None)
+            return
+        display_mesh = job.getResult()
+        if display_mesh is None:
+            Logger.log("w", "Could not create a display mesh for a mesh with %s vertices", job.getMesh().getVertexCount())
+            self._failed_meshes[id(job.getMesh())] = job.getMesh()
+            return
+
+        for node in SceneNodeRegistry.getInstance().getPrintableNodes():
+            if node.getMeshData() is job.getMesh():
+                node.removeDecorator(DisplayMeshDecorator)
+                node.addDecorator(DisplayMeshDecorator(job.getMesh(), display_mesh))
+
+        # Make sure the views render the display mesh.
+        self._controller.getScene().sceneChanged.emit(self._controller.getScene().getRoot())
+
+    def _onPreferenceChanged(self, preference):
+        if preference != "view/display_triangle_budget":
+            return
+
+        self._failed_meshes = {} # Try the meshes that failed again with the new budget.
+        for node in SceneNodeRegistry.getInstance().getPrintableNodes():
+            node.removeDecorator(DisplayMeshDecorator)
+        self._onSceneChanged(None)
+
+    def _getTriangleBudget(self):
+        try:
+            return int(Preferences.getInstance().getValue("view/display_triangle_budget"))
+        except (TypeError, ValueError):
+            return 0
+
+    def _getTriangleCount(self, mesh):
+        indices = mesh.getIndices()
+        if indices is not None:
+            return len(indices)
+        return mesh.getVertexCount() // 3
+
+##  Job that creates the display mesh of a mesh in the background.
+class _DecimateMeshJob(Job):
+    def __init__(self, mesh, triangle_budget):
+        super().__init__()
+        self._mesh = mesh
+        self._triangle_budget = triangle_budget
+
+    def getMesh(self):
+        return self._mesh
+
+    def getTriangleBudget(self):
+        return self._triangle_budget
+
+    def run(self):
+        indices = self._mesh.getIndices()
+        vertices, normals = MeshSimplifier.decimate(self._mesh.getVertices(), indices.reshape((-1, 3)) if indices is not None else None, self._triangle_budget)
+        Logger.log("d", "Created a display mesh with %s triangles for a mesh with %s vertices", len(vertices) // 3, self._mesh.getVertexCount())
+        self.setResult(MeshData(vertices = vertices, normals = normals))
@@ -0,0 +1,155 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import os.path
+import re
+import sys
+
+import numpy
+
+try:
+    from multiprocessing import shared_memory
+except ImportError: # Python versions before 3.8 have no shared memory.
+    shared_memory = None
+
+from cura.MeshWelder import MeshWelder
+
+##  Parses mesh files into indexed vertex, normal and index arrays without needing the application.
+#
+#   This only depends on numpy, so it can run in worker processes that load files in parallel. The arrays are in our
+#   coordinate frame (Y up), and the coincident vertices of the triangles are welded.
+class MeshFileParser:
+    ##  The extensions of the files that can be parsed.
+    _supported_extensions = [".stl"]
+
+    _binary_stl_dtype = numpy.dtype([("normal", "<f4", (3, )), ("vertices", "<f4", (3, 3)), ("attribute", "<u2")])
+    _ascii_stl_vertex = re.compile(rb"vertex\s+(\S+)\s+(\S+)\s+(\S+)")
+
+    ##  Check whether a file can be parsed.
+    #
+    #   \param file_name The path to the file.
+    @classmethod
+    def canParse(cls, file_name):
+        return os.path.splitext(file_name)[1].lower() in cls._supported_extensions
+
+    ##  Parse a mesh file.
+    #
+    #   \param file_name The path to the file.
+    #   \return A tuple with an array of vertices, an array of normals and an array of triangle indices, or None if
+    #   the file could not be parsed.
+    @classmethod
+    def parse(cls, file_name):
+        if not cls.canParse(file_name):
+            return None
+
+        with open(file_name, "rb") as f:
+            data = f.read()
+
+        vertices = cls._parseBinaryStl(data)
+        if vertices is None:
+            vertices = cls._parseAsciiStl(data)
+        if vertices is None or len(vertices) == 0:
+            return None
+
+        # Rotate the model; We use a different coordinate frame (Y up instead of Z up).
+        rotated = numpy.empty(vertices.shape, dtype = numpy.float32)
+        rotated[:, 0] = vertices[:, 0]
+        rotated[:, 1] = vertices[:, 2]
+        rotated[:, 2] = -vertices[:, 1]
+
+        # The normals in the file are often missing or wrong, so they are computed from the welded mesh instead.
+        vertices, indices = MeshWelder.weld(rotated)
+        if len(indices) == 0:
+            return None
+        vertices, normals, indices = MeshWelder.computeNormals(vertices, indices)
+
+        return vertices, normals, indices
+
+    ##  Parse the data of a binary STL file.
+    #
+    #   \return An array with three vertices per triangle, or None if the data is not a binary STL file.
+    @classmethod
+    def _parseBinaryStl(cls, data):
+        if len(data) < 84:
+            return None
+        face_count = int(numpy.frombuffer(data, dtype = "<u4", count = 1, offset = 80)[0])
+        if len(data) != 84 + face_count * cls._binary_stl_dtype.itemsize:
+            return None
+
+        faces = numpy.frombuffer(data, dtype = cls._binary_stl_dtype, count = face_count, offset = 84)
+        return faces["vertices"].reshape((-1, 3)).astype(numpy.float32)
+
+    ##  Parse the data of an ASCII STL file.
+    #
+    #   \return An array with three vertices per triangle, or None if the data is not an ASCII STL file.
+    @classmethod
+    def _parseAsciiStl(cls, data):
+        if not data.lstrip().startswith(b"solid"):
+            return None
+
+        coordinates = cls._ascii_stl_vertex.findall(data)
+        if len(coordinates) % 3 != 0:
+            return None
+        try:
+            return numpy.array(coordinates, dtype = numpy.float32).reshape((-1, 3))
+        except ValueError:
+            return None
+
+##  Whether worker processes return the arrays through shared memory.
+#
+#   On Windows a shared memory block is removed as soon as its last handle is closed, so it would be gone before the
+#   application can open it. There the arrays are sent back through the result pipe instead.
+_use_shared_memory = shared_memory is not None and sys.platform != "win32"
+
+##  Parse a mesh file in a worker process.
+#
+#   The vertices, normals and indices are stored in one block of shared memory, which the application opens, copies
+#   from and removes, so the arrays do not need to be pickled and sent through the result pipe.
+#
+#   \param file_name The path to the file.
+#   \return A tuple with the name of the shared memory block, the vertex count and the triangle count, a tuple with
+#   the arrays if shared memory is not available, or None if the file could not be parsed.
+def parseInWorker(file_name):
+    result = MeshFileParser.parse(file_name)
+    if result is None or not _use_shared_memory:
+        return result
+
+    vertices, normals, indices = result
+    block = shared_memory.SharedMemory(create = True, size = vertices.nbytes + normals.nbytes + indices.nbytes)
+    try:
+        vertex_buffer, index_buffer = _getWorkerBuffers(block, len(vertices), len(indices))
+        vertex_buffer[0] = vertices
+        vertex_buffer[1] = normals
+        index_buffer[:] = indices
+        del vertex_buffer, index_buffer
+    finally:
+        block.close()
+    return block.name, len(vertices), len(indices)
+
+##  Get the arrays of a file parsed with parseInWorker().
+#
+#   \param result The result of parseInWorker().
+#   \return A tuple with an array of vertices, an array of normals and an array of triangle indices, or None if the
+#   file could not be parsed.
+def takeWorkerResult(result):
+    if result is None or not _use_shared_memory:
+        return result
+
+    name, vertex_count, triangle_count = result
+    block = shared_memory.SharedMemory(name = name)
+    try:
+        vertex_buffer, index_buffer = _getWorkerBuffers(block, vertex_count, triangle_count)
+        vertices = vertex_buffer[0].copy()
+        normals = vertex_buffer[1].copy()
+        indices = index_buffer.copy()
+        del vertex_buffer, index_buffer
+    finally:
+        block.close()
+        block.unlink()
+    return vertices, normals, indices
+
+##  Get the arrays in a block of shared memory: the vertices and normals, followed by the indices.
+def _getWorkerBuffers(block, vertex_count, triangle_count):
+    vertex_buffer = numpy.ndarray((2, vertex_count, 3), dtype = numpy.float32, buffer = block.buf)
+    index_buffer = numpy.ndarray((triangle_count, 3), dtype = numpy.int32, buffer = block.buf, offset = vertex_buffer.nbytes)
+    return vertex_buffer, index_buffer
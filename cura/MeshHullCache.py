@@ -0,0 +1,104 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Application import Application
+from UM.Job import Job
+from UM.Math.AxisAlignedBox import AxisAlignedBox
+from UM.Math.Vector import Vector
+
+from cura.SceneNodeRegistry import SceneNodeRegistry
+
+import numpy
+
+##  Prepares and transforms the vertices of the 3D convex hull of every mesh in the scene.
+#
+#   The convex hull of a mesh usually has only a few hundred vertices, even for meshes with millions of vertices. Any
+#   transformation of the mesh keeps the extreme points on the hull, so the bounding box, the distance to the build
+#   plate and the 2D projected hull of a transformed mesh can all be computed from these vertices alone.
+#
+#   The hull vertices themselves are cached by the mesh data. This computes them in the background as soon as a mesh
+#   appears in the scene, so they are usually ready when they are needed. If not, they are computed right away.
+class MeshHullCache:
+    def __init__(self, scene = None):
+        if scene is None:
+            scene = Application.getInstance().getController().getScene()
+        self._scene = scene
+        self._scene.sceneChanged.connect(self._onSceneChanged)
+
+        # The mesh data in the scene that the hull is computed for, or is being computed for, by id. This is only used
+        # on the main thread; the jobs only fill the cache of the mesh data.
+        self._meshes = {}
+
+    ##  Get the instance of the cache, or create one if no instance exists yet.
+    @classmethod
+    def getInstance(cls):
+        if not cls.__instance:
+            cls.__instance = MeshHullCache()
+        return cls.__instance
+
+    ##  Get the vertices of the convex hull of a mesh.
+    #
+    #   \param mesh The mesh data.
+    #   \return An array of vertex positions, in the coordinates of the mesh.
+    @staticmethod
+    def getVertices(mesh):
+        vertices = None
+        if mesh.getVertexCount() >= 4:
+            try:
+                vertices = mesh.getConvexHullVertices()
+            except Exception:
+                vertices = None
+        if vertices is None:
+            # Too few (or only coplanar) vertices to build a hull from, so all of them are extreme points.
+            vertices = mesh.getVertices()
+        if vertices is None:
+            return numpy.zeros((0, 3), dtype = numpy.float64)
+        return vertices
+
+    ##  Get the vertices of the convex hull of a mesh after transforming it.
+    #
+    #   \param mesh The mesh data.
+    #   \param transformation The transformation Matrix to apply, usually the world transformation of a node.
+    #   \return An array of vertex positions.
+    def getTransformedVertices(self, mesh, transformation):
+        data = transformation.getData()
+        return numpy.dot(self.getVertices(mesh), data[0:3, 0:3].T) + data[0:3, 3]
+
+    ##  Get the bounding box of a mesh after transforming it.
+    #
+    #   \param mesh The mesh data.
+    #   \param transformation The transformation Matrix to apply, usually the world transformation of a node.
+    #   \return An AxisAlignedBox, or None if the mesh has no vertices.
+    def getBoundingBox(self, mesh, transformation):
+        vertices = self.getTransformedVertices(mesh, transformation)
+        if len(vertices) == 0:
+            return None
+
+        minimum = numpy.min(vertices, axis = 0)
+        maximum = numpy.max(vertices, axis = 0)
+        return AxisAlignedBox(minimum = Vector(*minimum), maximum = Vector(*maximum))
+
+    def _onSceneChanged(self, source):
+        meshes = {}
+        for node in SceneNodeRegistry.getInstance().getPrintableNodes():
+            mesh = node.getMeshData()
+            meshes[id(mesh)] = mesh
+            if self._meshes.get(id(mesh)) is mesh:
+                continue
+
+            job = _ComputeHullVerticesJob(mesh)
+            job.start()
+
+        # Forget about meshes that are no longer in the scene, so their ids can be reused.
+        self._meshes = meshes
+
+    __instance = None
+
+##  Job that computes the hull vertices of a mesh in the background, which the mesh data then caches.
+class _ComputeHullVerticesJob(Job):
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    def run(self):
+        MeshHullCache.getVertices(self._mesh)
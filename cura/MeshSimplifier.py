@@ -0,0 +1,90 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import math
+import numpy
+
+##  Simplifies triangle meshes by clustering their vertices in a grid, to display objects with a very large number of
+#   triangles, see MeshDecimator.
+class MeshSimplifier:
+    ##  The number of binary search steps to find the smallest cell size that fits the triangle budget.
+    _refine_steps = 6
+
+    ##  Simplify a triangle mesh by clustering its vertices in a grid.
+    #
+    #   All vertices within a cell of the grid are merged into one vertex at their average position, except that a
+    #   cell with an outermost vertex of the mesh keeps that coordinate, so the bounding box does not shrink. Triangles
+    #   that collapse or become duplicates are removed. The size of the cells is increased until the result fits within
+    #   the triangle budget, and then refined with a binary search to use as much of the budget as possible.
+    #
+    #   \param vertices Array of vertex positions.
+    #   \param indices Array of triangle indices, or None if every three vertices form a triangle.
+    #   \param triangle_budget The maximum number of triangles of the result.
+    #   \return A tuple with an array of vertices, three per triangle, and an array with the matching normals.
+    @staticmethod
+    def decimate(vertices, indices, triangle_budget):
+        vertices = numpy.asarray(vertices, dtype = numpy.float64)
+        if indices is None:
+            triangles = numpy.arange(len(vertices) - len(vertices) % 3).reshape((-1, 3))
+        else:
+            triangles = numpy.asarray(indices).reshape((-1, 3))
+
+        minimum = numpy.min(vertices, axis = 0)
+        maximum = numpy.max(vertices, axis = 0)
+        extent = max(float(numpy.max(maximum - minimum)), 1e-6)
+
+        # The surface of a compact object covers roughly pi * n^2 cells of an n * n * n grid, with two triangles for
+        # every cell.
+        cell_size = extent / max(math.sqrt(triangle_budget / (2 * math.pi)), 2)
+        fine_size = 0 # The largest cell size known to give too many triangles.
+        positions, clustered = MeshSimplifier._clusterVertices(vertices, triangles, minimum, maximum, cell_size)
+        while len(clustered) > triangle_budget:
+            fine_size = cell_size
+            # A cell larger than the mesh merges all vertices into one, which always fits.
+            cell_size = min(cell_size * max(math.sqrt(len(clustered) / max(triangle_budget, 1)) * 1.05, 1.25), extent * 1.01)
+            positions, clustered = MeshSimplifier._clusterVertices(vertices, triangles, minimum, maximum, cell_size)
+
+        # Find the smallest cell size that fits between the last size that was too fine and the one that fits.
+        for attempt in range(MeshSimplifier._refine_steps):
+            if fine_size == 0 or cell_size / fine_size < 1.02:
+                break
+            middle_size = math.sqrt(fine_size * cell_size)
+            middle_positions, middle_clustered = MeshSimplifier._clusterVertices(vertices, triangles, minimum, maximum, middle_size)
+            if len(middle_clustered) > triangle_budget:
+                fine_size = middle_size
+            else:
+                cell_size, positions, clustered = middle_size, middle_positions, middle_clustered
+
+        result = positions[clustered].astype(numpy.float32)
+
+        normals = numpy.cross(result[:, 1] - result[:, 0], result[:, 2] - result[:, 0])
+        lengths = numpy.sqrt(numpy.sum(normals * normals, axis = 1))
+        lengths[lengths == 0] = 1
+        normals /= lengths[:, numpy.newaxis]
+        normals = numpy.repeat(normals, 3, axis = 0)
+
+        return result.reshape((-1, 3)), normals
+
+    @staticmethod
+    def _clusterVertices(vertices, triangles, minimum, maximum, cell_size):
+        cells = numpy.floor((vertices - minimum) / cell_size).astype(numpy.int64)
+        dimensions = numpy.max(cells, axis = 0) + 1
+        keys = (cells[:, 0] * dimensions[1] + cells[:, 1]) * dimensions[2] + cells[:, 2]
+        unique_keys, clusters = numpy.unique(keys, return_inverse = True)
+
+        # Place every merged vertex at the average position of the vertices in its cell.
+        counts = numpy.bincount(clusters).astype(numpy.float64)
+        positions = numpy.empty((len(unique_keys), 3), dtype = numpy.float64)
+        for axis in range(3):
+            positions[:, axis] = numpy.bincount(clusters, weights = vertices[:, axis]) / counts
+            # Keep the outermost vertices of the mesh on the sides of its bounding box.
+            positions[clusters[vertices[:, axis] <= minimum[axis]], axis] = minimum[axis]
+            positions[clusters[vertices[:, axis] >= maximum[axis]], axis] = maximum[axis]
+
+        clustered = clusters[triangles]
+        collapsed = (clustered[:, 0] == clustered[:, 1]) | (clustered[:, 1] == clustered[:, 2]) | (clustered[:, 0] == clustered[:, 2])
+        clustered = clustered[~collapsed]
+
+        # Remove triangles that connect the same three vertices, keeping the first one found.
+        _, first = numpy.unique(numpy.sort(clustered, axis = 1), axis = 0, return_index = True)
+        return positions, clustered[numpy.sort(first)]
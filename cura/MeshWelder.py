@@ -0,0 +1,126 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import numpy
+
+##  Turns triangle soups into indexed meshes by welding coincident vertices.
+#
+#   Meshes from STL files have three vertices of their own for every triangle, so every vertex of the surface is
+#   stored about six times. Welding these into one vertex each makes the mesh a lot smaller, and makes everything that
+#   works on the vertices, like computing hulls and bounding boxes or transforming the mesh for slicing, faster.
+#   For rendering, vertices are split again only where the surface has a hard edge, see computeNormals().
+class MeshWelder:
+    ##  Vertices that are closer together than this (in mm) are welded into one vertex.
+    _tolerance = 0.001
+
+    ##  Triangles at a larger angle than this (in degrees) get separate normals at their shared vertices.
+    _crease_angle = 30.0
+
+    ##  Weld the vertices of a mesh.
+    #
+    #   The vertices are snapped to a grid with cells of the tolerance, and all vertices in the same cell are merged.
+    #   Triangles that collapse because two of their vertices are merged are removed.
+    #
+    #   \param vertices Array of vertex positions.
+    #   \param indices Array of triangle indices, or None if every three vertices form a triangle.
+    #   \param tolerance The size of the cells of the grid.
+    #   \return A tuple with the array of welded vertex positions, in the order in which they are first used, and an
+    #   array with three indices per triangle.
+    @staticmethod
+    def weld(vertices, indices = None, tolerance = None):
+        if tolerance is None:
+            tolerance = MeshWelder._tolerance
+        vertices = numpy.asarray(vertices)
+        if indices is None:
+            indices = numpy.arange(len(vertices) - len(vertices) % 3)
+        indices = numpy.asarray(indices).reshape(-1)
+        if len(indices) == 0:
+            return numpy.zeros((0, 3), dtype = vertices.dtype), numpy.zeros((0, 3), dtype = numpy.int32)
+
+        # Find the unique cells of the vertices of the triangles, by treating every row of cell coordinates as an
+        # opaque group of bytes.
+        cells = numpy.ascontiguousarray(numpy.round(vertices[indices] / tolerance).astype(numpy.int64))
+        cell_view = cells.view(numpy.dtype((numpy.void, cells.dtype.itemsize * 3))).reshape(-1)
+        _, first, inverse = numpy.unique(cell_view, return_index = True, return_inverse = True)
+
+        # Number the vertices in the order in which the triangles first use them, which keeps neighbouring triangles
+        # close together in memory.
+        order = numpy.argsort(first)
+        renumber = numpy.empty(len(order), dtype = numpy.int64)
+        renumber[order] = numpy.arange(len(order))
+
+        welded_vertices = vertices[indices[first[order]]]
+        welded_indices = renumber[inverse.reshape(-1)].reshape((-1, 3))
+
+        collapsed = (welded_indices[:, 0] == welded_indices[:, 1]) | (welded_indices[:, 1] == welded_indices[:, 2]) | (welded_indices[:, 2] == welded_indices[:, 0])
+        welded_indices = welded_indices[~collapsed]
+
+        return welded_vertices, welded_indices.astype(numpy.int32)
+
+    ##  Compute the normals of the vertices of an indexed mesh, keeping hard edges sharp.
+    #
+    #   The corners around every vertex are grouped by the normals of their triangles: the first corner that is not
+    #   in a group yet starts a new group, with all other remaining corners whose triangle is within the crease angle
+    #   of its triangle. Every group gets the sum of the normals of its triangles, weighted by the triangle area, and
+    #   every group but the first of a vertex gets a vertex of its own. Smooth surfaces therefore stay welded and
+    #   smoothly shaded, while flat faces, like the sides of a box, keep their own normals.
+    #
+    #   Every round of grouping only visits the corners that are not in a group yet, and the number of rounds is
+    #   limited by how many directions more than the crease angle apart fit around a vertex, so vertices with a lot
+    #   of triangles, like the centre of a fan, stay cheap.
+    #
+    #   \param vertices Array of vertex positions.
+    #   \param indices Array of triangle indices.
+    #   \param crease_angle The largest angle between two triangles, in degrees, across which the shading is smooth.
+    #   \return A tuple with the array of vertex positions, the array of unit length normals with one per vertex and
+    #   the array with three indices per triangle. Vertices are only added, so an index that was valid stays valid.
+    @staticmethod
+    def computeNormals(vertices, indices, crease_angle = None):
+        if crease_angle is None:
+            crease_angle = MeshWelder._crease_angle
+        vertices = numpy.asarray(vertices)
+        indices = numpy.asarray(indices).reshape((-1, 3))
+        if len(indices) == 0:
+            return vertices, numpy.zeros((len(vertices), 3), dtype = numpy.float32), indices
+
+        face_normals = numpy.cross(vertices[indices[:, 1]] - vertices[indices[:, 0]], vertices[indices[:, 2]] - vertices[indices[:, 0]]).astype(numpy.float64)
+        face_lengths = numpy.sqrt(numpy.sum(face_normals * face_normals, axis = 1))
+        unit_face_normals = face_normals / numpy.maximum(face_lengths, 1e-30)[:, numpy.newaxis]
+
+        # Group the corners of every vertex, identifying every group by the corner that started it.
+        corner_vertices = indices.reshape(-1)
+        corner_faces = numpy.arange(len(corner_vertices)) // 3
+        min_cosine = numpy.cos(numpy.radians(crease_angle)) - 1e-6
+        groups = numpy.empty(len(corner_vertices), dtype = numpy.int64)
+        seeds = numpy.empty(len(vertices), dtype = numpy.int64)
+        remaining = numpy.arange(len(corner_vertices))
+        while len(remaining) > 0:
+            remaining_vertices = corner_vertices[remaining]
+            seeds[remaining_vertices[::-1]] = remaining[::-1] # The first remaining corner of every vertex wins.
+            remaining_seeds = seeds[remaining_vertices]
+            cosines = numpy.sum(unit_face_normals[corner_faces[remaining]] * unit_face_normals[corner_faces[remaining_seeds]], axis = 1)
+            grouped = (cosines >= min_cosine) | (remaining == remaining_seeds) # Degenerate triangles start a group too.
+            groups[remaining[grouped]] = remaining_seeds[grouped]
+            remaining = remaining[~grouped]
+
+        group_seeds, inverse = numpy.unique(groups, return_inverse = True)
+        inverse = inverse.reshape(-1)
+        group_normals = numpy.zeros((len(group_seeds), 3), dtype = numpy.float64)
+        for axis in range(3):
+            group_normals[:, axis] = numpy.bincount(inverse, weights = face_normals[corner_faces, axis], minlength = len(group_seeds))
+        lengths = numpy.sqrt(numpy.sum(group_normals * group_normals, axis = 1))
+        lengths[lengths == 0] = 1
+        group_normals /= lengths[:, numpy.newaxis]
+
+        # The first group of every vertex keeps the vertex; the other groups of that vertex get new vertices at the end.
+        seed_vertices = corner_vertices[group_seeds]
+        first_of_vertex = numpy.zeros(len(group_seeds), dtype = bool)
+        first_of_vertex[numpy.unique(seed_vertices, return_index = True)[1]] = True
+        new_indices = numpy.empty(len(group_seeds), dtype = numpy.int64)
+        new_indices[first_of_vertex] = seed_vertices[first_of_vertex]
+        new_indices[~first_of_vertex] = len(vertices) + numpy.arange(numpy.count_nonzero(~first_of_vertex))
+
+        result_vertices = numpy.concatenate((vertices, vertices[seed_vertices[~first_of_vertex]]))
+        normals = numpy.zeros((len(result_vertices), 3), dtype = numpy.float32)
+        normals[new_indices] = group_normals
+        return result_vertices, normals, new_indices[inverse].reshape((-1, 3)).astype(indices.dtype)
@@ -6,6 +6,10 @@ from UM.Scene.SceneNode import SceneNode
 from functools import cmp_to_key
 from UM.Application import Application
 
+from cura.PolygonCollision import PolygonCollision
+
+import numpy
+
 ## Iterator that returns a list of nodes in the order that they need to be printed
 #  If there is no solution an empty list is returned.
 #  Take note that the list of nodes can have children (that may or may not contain mesh data)
@@ -32,7 +36,7 @@ class OneAtATimeIterator(Iterator.Iterator):
         self._original_node_list = node_list[:]
 
         ## Initialise the hit map (pre-compute all hits between all objects)
-        self._hit_map = [[self._checkHit(i,j) for i in node_list] for j in node_list]
+        self._hit_map = self._computeHitMap(node_list)
 
         # Check if we have to files that block eachother. If this is the case, there is no solution!
         for a in range(0,len(node_list)):
@@ -87,16 +91,17 @@ class OneAtATimeIterator(Iterator.Iterator):
         score_b = sum(self._hit_map[self._original_node_list.index(b)])
         return score_a - score_b
 
-    #   Checks if A can be printed before B
-    def _checkHit(self, a, b):
-        if a == b:
-            return False
-
-        overlap = a.callDecoration("getConvexHullBoundary").intersectsPolygon(b.callDecoration("getConvexHullHeadFull"))
-        if overlap:
-            return True
-        else: 
-            return False
+    ##  Compute the hit map of all nodes in a single batch.
+    #
+    #   Entry [j][i] of the hit map is True if the boundary of node i intersects the full head hull of node j, so if
+    #   node i can not be printed before node j.
+    def _computeHitMap(self, node_list):
+        boundaries = PolygonCollision([node.callDecoration("getConvexHullBoundary").getPoints() for node in node_list])
+        head_hulls = PolygonCollision([node.callDecoration("getConvexHullHeadFull").getPoints() for node in node_list])
+
+        hits = boundaries.intersectAll(head_hulls)
+        numpy.fill_diagonal(hits, False)
+        return hits.T.tolist()
 
 
 ## Internal object used to keep track of a possible order in which to print objects.      
@@ -0,0 +1,124 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import time
+
+import numpy
+
+from cura.PolygonCollision import PolygonCollision
+
+##  Pushes overlapping convex hulls apart until none of them overlap anymore.
+#
+#   All overlapping pairs are found at once, after which both hulls of every pair are moved apart. Since moving hulls
+#   apart can cause new overlaps with other hulls, this is repeated until nothing overlaps anymore, or until the
+#   maximum number of iterations or the time budget is used up.
+#
+#   All coordinates are 2D (x, z) build plate coordinates, the same as the points of a convex hull Polygon.
+class OverlapSolver:
+    ##  The maximum number of times the overlaps are resolved.
+    _max_iterations = 50
+
+    ##  The default maximum time to spend solving, in seconds.
+    _default_time_budget = 0.015
+
+    ##  The part of the overlap of a pair that each of the two hulls is moved by.
+    #
+    #   This is more than half, so the hulls end up apart instead of touching. It also makes dense clusters settle in
+    #   far fewer iterations.
+    _relaxation = 0.75
+
+    ##  Overlaps smaller than this (in mm) are ignored.
+    _epsilon = 1e-4
+
+    ##  \param hulls List of point arrays of the convex hulls, or None for hulls to ignore.
+    #   \param head_hulls List of point arrays of the head hulls, or None where there is no head hull.
+    #   \param time_budget The maximum time to spend solving in seconds, or None to only stop after the maximum
+    #   number of iterations.
+    def __init__(self, hulls, head_hulls = None, time_budget = _default_time_budget):
+        self._time_budget = time_budget
+        self._hulls = [numpy.asarray(hull, dtype = numpy.float64) if hull is not None and len(hull) >= 3 else None for hull in hulls]
+        if head_hulls is None:
+            head_hulls = [None] * len(hulls)
+        self._head_hulls = [numpy.asarray(hull, dtype = numpy.float64) if hull is not None and len(hull) >= 3 and self._hulls[index] is not None else None for index, hull in enumerate(head_hulls)]
+
+    ##  Find the translations that move the hulls so none of them overlap.
+    #
+    #   \return An array with an (x, z) translation for every hull, which is zero for hulls that do not need to move.
+    def solve(self):
+        translations = numpy.zeros((len(self._hulls), 2), dtype = numpy.float64)
+        end_time = time.monotonic() + self._time_budget if self._time_budget is not None else None
+        for iteration in range(self._max_iterations):
+            pairs, overlaps = self.findOverlaps(translations)
+            if len(pairs) == 0:
+                break
+
+            # Move both hulls of every pair apart. A hull that overlaps several others moves by the largest push in
+            # each direction, rather than the sum of them, which would make it overshoot.
+            pushes = overlaps * self._relaxation
+            positive = numpy.zeros(translations.shape, dtype = numpy.float64)
+            negative = numpy.zeros(translations.shape, dtype = numpy.float64)
+            numpy.maximum.at(positive, pairs[:, 0], pushes)
+            numpy.minimum.at(negative, pairs[:, 0], pushes)
+            numpy.maximum.at(positive, pairs[:, 1], -pushes)
+            numpy.minimum.at(negative, pairs[:, 1], -pushes)
+            translations += positive + negative
+
+            if end_time is not None and time.monotonic() > end_time:
+                break
+
+        return translations
+
+    ##  Find the pairs of hulls that overlap.
+    #
+    #   If one of the hulls of a pair has a head hull, the head hull is tested against the other hull instead.
+    #
+    #   \param translations Optional array with an (x, z) translation to apply to every hull first.
+    #   \return A tuple with an array of (index, other index) pairs and an array with for every pair the vector that
+    #   moves the first hull out of the second.
+    def findOverlaps(self, translations = None):
+        hulls = self._translate(self._hulls, translations)
+        head_hulls = self._translate(self._head_hulls, translations)
+
+        # Broad phase: only test pairs of which the bounding boxes overlap.
+        hull_collision = PolygonCollision(hulls)
+        head_collision = PolygonCollision(head_hulls)
+        candidates = [numpy.transpose(hull_collision.getCandidatePairs())]
+        candidates.append(numpy.transpose(head_collision.getCandidatePairs(hull_collision)))
+        candidates = numpy.concatenate(candidates).reshape((-1, 2))
+        candidates = numpy.sort(candidates, axis = 1)
+        candidates = candidates[candidates[:, 0] != candidates[:, 1]]
+        if len(candidates) == 0:
+            return numpy.zeros((0, 2), dtype = numpy.int64), numpy.zeros((0, 2), dtype = numpy.float64)
+        candidates = numpy.unique(candidates, axis = 0)
+
+        has_head = numpy.array([hull is not None for hull in head_hulls], dtype = numpy.bool_)
+        first_has_head = has_head[candidates[:, 0]]
+        second_has_head = has_head[candidates[:, 1]]
+
+        hits = numpy.zeros(len(candidates), dtype = numpy.bool_)
+        overlaps = numpy.zeros((len(candidates), 2), dtype = numpy.float64)
+
+        # Pairs without head hulls; hull against hull.
+        selection = numpy.nonzero(~first_has_head & ~second_has_head)[0]
+        if len(selection):
+            hits[selection], overlaps[selection] = hull_collision.intersectPairs(candidates[selection, 0], candidates[selection, 1])
+
+        # The head hull of the first against the hull of the second.
+        selection = numpy.nonzero(first_has_head)[0]
+        if len(selection):
+            hits[selection], overlaps[selection] = head_collision.intersectPairs(candidates[selection, 0], candidates[selection, 1], hull_collision)
+
+        # The hull of the first against the head hull of the second.
+        selection = numpy.nonzero(~hits & second_has_head)[0]
+        if len(selection):
+            hits[selection], overlaps[selection] = hull_collision.intersectPairs(candidates[selection, 0], candidates[selection, 1], head_collision)
+
+        # Hulls that only touch do not need to be moved.
+        hits &= numpy.max(numpy.abs(overlaps), axis = 1) > self._epsilon
+
+        return candidates[hits], overlaps[hits]
+
+    def _translate(self, hulls, translations):
+        if translations is None:
+            return hulls
+        return [hull + translations[index] if hull is not None else None for index, hull in enumerate(hulls)]
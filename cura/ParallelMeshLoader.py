@@ -0,0 +1,154 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from PyQt5.QtCore import QTimer
+
+from UM.Logger import Logger
+from UM.Mesh.MeshData import MeshData
+from UM.Mesh.ReadMeshJob import ReadMeshJob
+from UM.Scene.SceneNode import SceneNode
+
+from cura.MeshFileParser import MeshFileParser, parseInWorker, takeWorkerResult
+
+import collections
+import concurrent.futures
+import multiprocessing
+import os
+
+##  Loads batches of mesh files in parallel in a pool of worker processes.
+#
+#   A ReadMeshJob parses its file on the shared job queue, in a thread that competes for the interpreter lock with
+#   the interface and all other jobs. When many files are opened at once, the files are instead parsed in worker
+#   processes, one per core, which return the arrays through shared memory. The results are collected on the main
+#   thread and handed to the callback of the batch in groups, as they complete.
+#
+#   Only files that MeshFileParser can parse are loaded this way. Other files, and files that a worker fails to
+#   parse, are left to the mesh readers.
+class ParallelMeshLoader:
+    ##  The minimum number of files for which starting worker processes is worth it.
+    _min_batch_size = 8
+
+    ##  The minimum total size of the files in bytes for which starting worker processes is worth it, for batches
+    #   of fewer files.
+    _min_batch_bytes = 64 * 1024 * 1024
+
+    ##  How often to check for finished files, in milliseconds.
+    _poll_interval = 50
+
+    def __init__(self):
+        self._executor = None
+
+        # Finished files, as (file name, future, callback) tuples. Futures finish in a thread of the executor, so
+        # they are handed to the main thread through this queue.
+        self._finished = collections.deque()
+        self._pending_count = 0
+
+        self._poll_timer = QTimer()
+        self._poll_timer.setInterval(self._poll_interval)
+        self._poll_timer.timeout.connect(self._onPollTimer)
+
+    ##  Get the instance of the loader, or create one if no instance exists yet.
+    @classmethod
+    def getInstance(cls):
+        if not cls.__instance:
+            cls.__instance = ParallelMeshLoader()
+        return cls.__instance
+
+    ##  Check whether a batch of files should be loaded by this loader.
+    #
+    #   Starting the worker processes takes a while, so only batches of many files or of large files are loaded in
+    #   parallel.
+    #
+    #   \param file_names The paths of the files.
+    #   \return The paths of the files that can be loaded in parallel, or an empty list if the batch is too small.
+    def getLoadableFiles(self, file_names):
+        loadable = [file_name for file_name in file_names if MeshFileParser.canParse(file_name)]
+        if len(loadable) < 2:
+            return []
+        if len(loadable) < self._min_batch_size and self._getTotalSize(loadable) < self._min_batch_bytes:
+            return []
+        return loadable
+
+    def _getTotalSize(self, file_names):
+        total_size = 0
+        for file_name in file_names:
+            try:
+                total_size += os.path.getsize(file_name)
+            except OSError:
+                pass
+        return total_size
+
+    ##  Start loading a batch of files.
+    #
+    #   \param file_names The paths of the files.
+    #   \param callback Function that is called on the main thread with a list of (file name, mesh data) tuples
+    #   whenever files are finished. The mesh data is None for files that could not be parsed.
+    def load(self, file_names, callback):
+        if not file_names:
+            return
+
+        executor = self._getExecutor()
+        for file_name in file_names:
+            future = executor.submit(parseInWorker, file_name)
+            self._pending_count += 1
+            future.add_done_callback(lambda future, file_name = file_name: self._finished.append((file_name, future, callback)))
+
+        self._poll_timer.start()
+
+    def _getExecutor(self):
+        if self._executor is None:
+            # Forking the application with all its threads is not safe, so the workers always start a new interpreter.
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers = os.cpu_count() or 1, mp_context = multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def _onPollTimer(self):
+        results = collections.OrderedDict()
+        while self._finished:
+            file_name, future, callback = self._finished.popleft()
+            self._pending_count -= 1
+            results.setdefault(callback, []).append((file_name, self._createMeshData(file_name, future)))
+
+        if self._pending_count <= 0:
+            self._poll_timer.stop()
+
+        for callback, files in results.items():
+            callback(files)
+
+    def _createMeshData(self, file_name, future):
+        try:
+            result = takeWorkerResult(future.result())
+        except Exception as e:
+            Logger.log("w", "Could not load %s in a worker process: %s", file_name, e)
+            return None
+        if result is None:
+            return None
+
+        vertices, normals, indices = result
+        Logger.log("d", "Loaded a mesh with %s vertices and %s triangles from %s", len(vertices), len(indices), file_name)
+        return MeshData(vertices = vertices, normals = normals, indices = indices, file_name = file_name)
+
+    ##  Create a job that turns the mesh data of a loaded file into a scene node.
+    #
+    #   The job is a ReadMeshJob that gets the mesh data instead of reading the file, so the node is scaled to the
+    #   build volume by the same code as the nodes of files that the mesh readers load.
+    #
+    #   \param file_name The path to the file.
+    #   \param mesh_data The mesh data of the file.
+    #   \return A ReadMeshJob that is not started yet, with the node as its result.
+    @staticmethod
+    def createReadJob(file_name, mesh_data):
+        job = ReadMeshJob(file_name)
+        job._handler = _LoadedMeshHandler(mesh_data)
+        return job
+
+    __instance = None
+
+##  Stands in for the mesh file handler of a ReadMeshJob, handing out a node with mesh data that was already loaded.
+class _LoadedMeshHandler:
+    def __init__(self, mesh_data):
+        self._mesh_data = mesh_data
+
+    def read(self, file_name):
+        node = SceneNode()
+        node.setMeshData(self._mesh_data)
+        return node
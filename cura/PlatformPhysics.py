@@ -3,16 +3,17 @@
 
 from PyQt5.QtCore import QTimer
 
-from UM.Scene.SceneNode import SceneNode
-from UM.Scene.Iterator.BreadthFirstIterator import BreadthFirstIterator
 from UM.Math.Vector import Vector
 from UM.Math.AxisAlignedBox import AxisAlignedBox
 from UM.Scene.Selection import Selection
 from UM.Preferences import Preferences
 
 from cura.ConvexHullDecorator import ConvexHullDecorator
+from cura.OverlapSolver import OverlapSolver
+from cura.SceneNodeRegistry import SceneNodeRegistry
 
 from . import PlatformPhysicsOperation
+from . import PlatformPhysicsGroupOperation
 from . import ZOffsetDecorator
 
 class PlatformPhysics:
@@ -39,15 +40,51 @@ class PlatformPhysics:
         if not self._enabled:
             return
 
-        root = self._controller.getScene().getRoot()
-        for node in BreadthFirstIterator(root):
-            if node is root or type(node) is not SceneNode or node.getBoundingBox() is None:
+        nodes = []
+        bounding_boxes = []
+        for node in SceneNodeRegistry.getInstance().getNodes():
+            if not node.getDecorator(ConvexHullDecorator):
+                node.addDecorator(ConvexHullDecorator())
+
+            # The bounding box is computed from the cached hull vertices of the mesh, rather than all its vertices.
+            bbox = node.callDecoration("getHullBoundingBox")
+            if bbox is None:
                 continue
+            nodes.append(node)
+            bounding_boxes.append(bbox)
+
+        for node in nodes:
+            node.callDecoration("recomputeConvexHull")
 
-            bbox = node.getBoundingBox()
+        convex_hulls = [node.callDecoration("getConvexHull") for node in nodes]
+
+        # Resolve all overlaps at once. Objects in a group are moved with their group, so they are left out.
+        push_free_translations = None
+        if Preferences.getInstance().getValue("physics/automatic_push_free"):
+            solver_hulls = []
+            solver_head_hulls = []
+            for node, convex_hull in zip(nodes, convex_hulls):
+                if not convex_hull or (node.getParent() and node.getParent().callDecoration("isGroup")):
+                    solver_hulls.append(None)
+                    solver_head_hulls.append(None)
+                    continue
+                solver_hulls.append(convex_hull.getPoints())
+                head_hull = node.callDecoration("getConvexHullHead")
+                solver_head_hulls.append(head_hull.getPoints() if head_hull else None)
+            push_free_translations = OverlapSolver(solver_hulls, solver_head_hulls).solve()
+
+        # Check for collisions between disallowed areas and the objects.
+        outside_disallowed_area = self._build_volume.findHullsInDisallowedAreas([hull.getPoints() if hull else None for hull in convex_hulls])
+
+        # Ignore intersections with the bottom
+        build_volume_bounding_box = self._build_volume.getBoundingBox().set(bottom=-9001)
+
+        # All movements are combined in one operation.
+        operation = PlatformPhysicsGroupOperation.PlatformPhysicsGroupOperation()
+        has_movement = False
+        for index, node in enumerate(nodes):
+            bbox = bounding_boxes[index]
 
-            # Ignore intersections with the bottom
-            build_volume_bounding_box = self._build_volume.getBoundingBox().set(bottom=-9001)
             node._outside_buildarea = False
 
             # Mark the node as outside the build volume if the bounding box test fails.
@@ -66,65 +103,22 @@ class PlatformPhysics:
             #if not Float.fuzzyCompare(bbox.bottom, 0.0):
             #   pass#move_vector.setY(-bbox.bottom)
 
-            # If there is no convex hull for the node, start calculating it and continue.
-            if not node.getDecorator(ConvexHullDecorator):
-                node.addDecorator(ConvexHullDecorator())
-            node.callDecoration("recomputeConvexHull")
+            if push_free_translations is not None:
+                move_vector = move_vector.set(x=float(push_free_translations[index][0]), z=float(push_free_translations[index][1]))
 
-            if Preferences.getInstance().getValue("physics/automatic_push_free"):
-                # Check for collisions between convex hulls
-                for other_node in BreadthFirstIterator(root):
-                    # Ignore root, ourselves and anything that is not a normal SceneNode.
-                    if other_node is root or type(other_node) is not SceneNode or other_node is node:
-                        continue
-                    
-                    # Ignore colissions of a group with it's own children
-                    if other_node in node.getAllChildren() or node in other_node.getAllChildren():
-                        continue
-                    
-                    # Ignore colissions within a group
-                    if other_node.getParent().callDecoration("isGroup") is not None or node.getParent().callDecoration("isGroup") is not None:
-                        continue
-                        #if node.getParent().callDecoration("isGroup") is other_node.getParent().callDecoration("isGroup"):
-                        #    continue
-                    
-                    # Ignore nodes that do not have the right properties set.
-                    if not other_node.callDecoration("getConvexHull") or not other_node.getBoundingBox():
-                        continue
-
-                    # Check to see if the bounding boxes intersect. If not, we can ignore the node as there is no way the hull intersects.
-                    #if node.getBoundingBox().intersectsBox(other_node.getBoundingBox()) == AxisAlignedBox.IntersectionResult.NoIntersection:
-                    #    continue
-
-                    # Get the overlap distance for both convex hulls. If this returns None, there is no intersection.
-                    head_hull = node.callDecoration("getConvexHullHead")
-                    if head_hull:
-                        overlap = head_hull.intersectsPolygon(other_node.callDecoration("getConvexHull"))
-                        if not overlap:
-                            other_head_hull = other_node.callDecoration("getConvexHullHead")
-                            if other_head_hull:
-                                overlap = node.callDecoration("getConvexHull").intersectsPolygon(other_head_hull)
-                    else:
-                        overlap = node.callDecoration("getConvexHull").intersectsPolygon(other_node.callDecoration("getConvexHull"))
-
-                    if overlap is None:
-                        continue
-                    move_vector = move_vector.set(x=overlap[0] * 1.1, z=overlap[1] * 1.1)
-            convex_hull = node.callDecoration("getConvexHull")
+            convex_hull = convex_hulls[index]
             if convex_hull:
                 if not convex_hull.isValid():
-                    return
-                # Check for collisions between disallowed areas and the object
-                for area in self._build_volume.getDisallowedAreas():
-                    overlap = convex_hull.intersectsPolygon(area)
-                    if overlap is None:
-                        continue
-
+                    continue # Skip this node, but still move the others.
+                if outside_disallowed_area[index]:
                     node._outside_buildarea = True
 
             if not Vector.Null.equals(move_vector, epsilon=1e-5):
-                op = PlatformPhysicsOperation.PlatformPhysicsOperation(node, move_vector)
-                op.push()
+                operation.addOperation(PlatformPhysicsOperation.PlatformPhysicsOperation(node, move_vector))
+                has_movement = True
+
+        if has_movement:
+            operation.push()
 
     def _onToolOperationStarted(self, tool):
         self._enabled = False
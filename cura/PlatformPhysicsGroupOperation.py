@@ -0,0 +1,23 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Operations.GroupedOperation import GroupedOperation
+
+##  A group of PlatformPhysicsOperations, which like them is merged with the previous operation.
+#
+#   This is used to apply all movements of one physics step in a single operation.
+class PlatformPhysicsGroupOperation(GroupedOperation):
+    def __init__(self):
+        super().__init__()
+        self._always_merge = True
+
+    def mergeWith(self, other):
+        group = GroupedOperation()
+
+        group.addOperation(self)
+        group.addOperation(other)
+
+        return group
+
+    def __repr__(self):
+        return "PlatformPhysicsGroupOperation()"
@@ -0,0 +1,156 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import numpy
+
+##  Batched separating axis test for convex 2D polygons.
+#
+#   Polygon.intersectsPolygon() tests a single pair of polygons at a time, which adds up quickly when every
+#   hull in the scene has to be tested against every other hull. This class packs a list of convex polygons
+#   into padded numpy arrays once, after which the overlap and minimum translation vector of any number of
+#   pairs can be computed in a handful of vectorized operations.
+#
+#   The results match Polygon.intersectsPolygon(): the translation vector of a pair (a, b) is the vector that
+#   moves polygon a out of polygon b along the axis with the smallest overlap.
+class PolygonCollision:
+    ##  The maximum number of projected values computed in a single batch, to bound peak memory usage.
+    _max_batch_elements = 1 << 22
+
+    ##  Create the collision data for a list of polygons.
+    #
+    #   \param polygons List of point arrays with shape (n, 2), in order around the (convex) polygon. Entries
+    #   may be None or have less than 3 points, in which case that polygon never intersects anything.
+    def __init__(self, polygons):
+        self._count = len(polygons)
+
+        max_points = 1
+        for points in polygons:
+            if points is not None and len(points) > max_points:
+                max_points = len(points)
+
+        self._points = numpy.zeros((self._count, max_points, 2), dtype = numpy.float64)
+        self._valid = numpy.zeros(self._count, dtype = numpy.bool_)
+
+        for index, points in enumerate(polygons):
+            if points is None or len(points) < 3:
+                continue
+            points = numpy.asarray(points, dtype = numpy.float64)
+            self._points[index, :len(points)] = points
+            # Pad with the last point. This creates zero-length edges (which are masked out below) and does not
+            # change the extent of the polygon when it is projected on an axis.
+            self._points[index, len(points):] = points[-1]
+            self._valid[index] = True
+
+        # Edge normals of every polygon; edge n runs from point n - 1 to point n, so edge 0 closes the polygon.
+        edges = self._points - numpy.roll(self._points, 1, axis = 1)
+        normals = numpy.empty_like(edges)
+        normals[:, :, 0] = edges[:, :, 1]
+        normals[:, :, 1] = -edges[:, :, 0]
+        lengths = numpy.sqrt(numpy.sum(normals * normals, axis = 2))
+        self._normal_mask = (lengths > 1e-9) & self._valid[:, numpy.newaxis]
+        lengths[~self._normal_mask] = 1.0
+        self._normals = normals / lengths[:, :, numpy.newaxis]
+
+        if self._count > 0:
+            self._minimum = numpy.min(self._points, axis = 1)
+            self._maximum = numpy.max(self._points, axis = 1)
+        else:
+            self._minimum = numpy.zeros((0, 2), dtype = numpy.float64)
+            self._maximum = numpy.zeros((0, 2), dtype = numpy.float64)
+
+    ##  Get the number of polygons in this collection.
+    def getCount(self):
+        return self._count
+
+    ##  Get whether a polygon in this collection can take part in collisions.
+    def isValid(self, index):
+        return bool(self._valid[index])
+
+    ##  Broad phase: find all pairs of polygons with overlapping axis aligned bounding boxes.
+    #
+    #   \param other The collection to test against. If None, this collection is tested against itself and
+    #   pairs of a polygon with itself are excluded.
+    #   \return Two index arrays (into this collection and into the other collection) of candidate pairs.
+    def getCandidatePairs(self, other = None):
+        same = other is None
+        if same:
+            other = self
+
+        overlapping = numpy.all(self._minimum[:, numpy.newaxis, :] <= other._maximum[numpy.newaxis, :, :], axis = 2)
+        overlapping &= numpy.all(self._maximum[:, numpy.newaxis, :] >= other._minimum[numpy.newaxis, :, :], axis = 2)
+        overlapping &= self._valid[:, numpy.newaxis] & other._valid[numpy.newaxis, :]
+        if same:
+            numpy.fill_diagonal(overlapping, False)
+
+        return numpy.nonzero(overlapping)
+
+    ##  Narrow phase: compute the intersection of a list of polygon pairs.
+    #
+    #   \param indices Indices of the first polygon of every pair, in this collection.
+    #   \param other_indices Indices of the second polygon of every pair, in the other collection.
+    #   \param other The collection that other_indices refer to. If None, both refer to this collection.
+    #   \return A tuple of a boolean array that tells which pairs intersect and an array with shape (n, 2)
+    #   containing the minimum translation vector of every pair (zero for pairs that do not intersect).
+    def intersectPairs(self, indices, other_indices, other = None):
+        if other is None:
+            other = self
+
+        indices = numpy.asarray(indices, dtype = numpy.intp).reshape(-1)
+        other_indices = numpy.asarray(other_indices, dtype = numpy.intp).reshape(-1)
+        pair_count = len(indices)
+
+        hits = numpy.zeros(pair_count, dtype = numpy.bool_)
+        translations = numpy.zeros((pair_count, 2), dtype = numpy.float64)
+        if pair_count == 0:
+            return hits, translations
+
+        axis_count = self._points.shape[1] + other._points.shape[1]
+        point_count = max(self._points.shape[1], other._points.shape[1])
+        batch_size = max(1, self._max_batch_elements // (axis_count * point_count))
+
+        for start in range(0, pair_count, batch_size):
+            end = min(start + batch_size, pair_count)
+            batch_hits, batch_translations = self._intersectBatch(indices[start:end], other_indices[start:end], other)
+            hits[start:end] = batch_hits
+            translations[start:end] = batch_translations
+
+        return hits, translations
+
+    ##  Compute the intersection of all pairs of polygons between this collection and another one.
+    #
+    #   \return A boolean matrix where entry [a][b] tells whether polygon a of this collection intersects
+    #   polygon b of the other collection. If the collection is tested against itself, the diagonal is False.
+    def intersectAll(self, other = None):
+        indices, other_indices = self.getCandidatePairs(other)
+        if other is None:
+            other = self
+
+        hit_map = numpy.zeros((self._count, other._count), dtype = numpy.bool_)
+        hits, _ = self.intersectPairs(indices, other_indices, other)
+        hit_map[indices[hits], other_indices[hits]] = True
+        return hit_map
+
+    def _intersectBatch(self, indices, other_indices, other):
+        # Every normal of both polygons is a potential separating axis.
+        axes = numpy.concatenate((self._normals[indices], other._normals[other_indices]), axis = 1)
+        axes_mask = numpy.concatenate((self._normal_mask[indices], other._normal_mask[other_indices]), axis = 1)
+
+        projected = numpy.einsum("kad,kpd->kap", axes, self._points[indices])
+        a_min = numpy.min(projected, axis = 2)
+        a_max = numpy.max(projected, axis = 2)
+        projected = numpy.einsum("kad,kpd->kap", axes, other._points[other_indices])
+        b_min = numpy.min(projected, axis = 2)
+        b_max = numpy.max(projected, axis = 2)
+
+        separated = ((a_min > b_max) | (b_min > a_max)) & axes_mask
+        hits = ~numpy.any(separated, axis = 1) & self._valid[indices] & other._valid[other_indices]
+
+        # Signed overlap per axis; positive values move polygon a along the axis, negative values against it.
+        sizes = numpy.where(a_max > b_max, b_max - a_min, b_min - a_max)
+        magnitudes = numpy.where(axes_mask, numpy.abs(sizes), numpy.inf)
+        best = numpy.argmin(magnitudes, axis = 1)
+        rows = numpy.arange(len(indices))
+        translations = axes[rows, best] * sizes[rows, best][:, numpy.newaxis]
+        translations[~hits] = 0.0
+
+        return hits, translations
@@ -21,8 +21,10 @@ import unicodedata
 #        We track what the source was of the change, either a scene change, a setting change, an active machine change or something else.
 #   - This triggers a new slice with the current settings - this is the "current settings pass".
 #   - When the slice is done, we update the current print time and material amount.
-#   - If the source of the slice was not a Setting change, we start the second slice pass, the "low quality settings pass". Otherwise we stop here.
-#   - When that is done, we update the minimum print time and start the final slice pass, the "high quality settings pass".
+#   - If the source of the slice was not a Setting change, we start the "low quality settings pass" and the "high quality settings pass". Otherwise we stop here.
+#        These passes run at the same time in separate engine processes with a lower priority, and only estimate the print time.
+#        They are cancelled when anything changes, and only run while the minimum and maximum print time are shown (see enabled).
+#   - When the low quality pass is done, we update the minimum print time.
 #   - When the high quality pass is done, we update the maximum print time.
 #
 #   This class also mangles the current machine name and the filename of the first loaded mesh into a job name.
@@ -42,13 +44,19 @@ class PrintInformation(QObject):
     def __init__(self, parent = None):
         super().__init__(parent)
 
+        self._enabled = False
+
         self._current_print_time = Duration(None, self)
+        self._has_print_time = False
+        self._minimum_print_time = Duration(None, self)
+        self._maximum_print_time = Duration(None, self)
 
         self._material_amounts = []
 
         self._backend = Application.getInstance().getBackend()
         if self._backend:
             self._backend.printDurationMessage.connect(self._onPrintDurationMessage)
+            self._backend.estimationPassFinished.connect(self._onEstimationPassFinished)
 
         self._job_name = ""
         self._abbr_machine = ""
@@ -56,12 +64,47 @@ class PrintInformation(QObject):
         Application.getInstance().globalContainerStackChanged.connect(self._setAbbreviatedMachineName)
         Application.getInstance().fileLoaded.connect(self.setJobName)
 
+    enabledChanged = pyqtSignal()
+
+    def setEnabled(self, enabled):
+        if self._enabled == enabled:
+            return
+
+        self._enabled = enabled
+        self.enabledChanged.emit()
+        if not self._backend:
+            return
+        if enabled:
+            if self._has_print_time: # Otherwise the passes start when the current settings pass is done.
+                self._startEstimationPasses()
+        else:
+            self._backend.cancelEstimationPasses()
+
+    ##  Enable or disable the low and high quality settings passes.
+    #
+    #   The passes only run while something shows the minimum and maximum print time.
+    @pyqtProperty(bool, fset = setEnabled, notify = enabledChanged)
+    def enabled(self):
+        return self._enabled
+
     currentPrintTimeChanged = pyqtSignal()
 
     @pyqtProperty(Duration, notify = currentPrintTimeChanged)
     def currentPrintTime(self):
         return self._current_print_time
 
+    minimumPrintTimeChanged = pyqtSignal()
+
+    @pyqtProperty(Duration, notify = minimumPrintTimeChanged)
+    def minimumPrintTime(self):
+        return self._minimum_print_time
+
+    maximumPrintTimeChanged = pyqtSignal()
+
+    @pyqtProperty(Duration, notify = maximumPrintTimeChanged)
+    def maximumPrintTime(self):
+        return self._maximum_print_time
+
     materialAmountsChanged = pyqtSignal()
 
     @pyqtProperty("QVariantList", notify = materialAmountsChanged)
@@ -70,8 +113,15 @@ class PrintInformation(QObject):
 
     def _onPrintDurationMessage(self, total_time, material_amounts):
         self._current_print_time.setDuration(total_time)
+        self._has_print_time = total_time > 0
         self.currentPrintTimeChanged.emit()
 
+        # The current settings pass is done, so start the other passes. A setting change does not change the other
+        # quality profiles, so their print times stay the same, unless the passes were cancelled before they were done.
+        if self._has_print_time and self._enabled:
+            if self._backend.getSliceReason() != self.SliceReason.SettingChanged or self._backend.wereEstimationPassesCancelled():
+                self._startEstimationPasses()
+
         # Material amount is sent as an amount of mm^3, so calculate length from that
         r = Application.getInstance().getGlobalContainerStack().getProperty("material_diameter", "value") / 2
         self._material_amounts = []
@@ -79,6 +129,17 @@ class PrintInformation(QObject):
             self._material_amounts.append(round((amount / (math.pi * r ** 2)) / 1000, 2))
         self.materialAmountsChanged.emit()
 
+    def _startEstimationPasses(self):
+        self._backend.startEstimationPasses([self.SlicePass.LowQualitySettings, self.SlicePass.HighQualitySettings])
+
+    def _onEstimationPassFinished(self, slice_pass, total_time, material_amounts):
+        if slice_pass == self.SlicePass.LowQualitySettings:
+            self._minimum_print_time.setDuration(total_time)
+            self.minimumPrintTimeChanged.emit()
+        elif slice_pass == self.SlicePass.HighQualitySettings:
+            self._maximum_print_time.setDuration(total_time)
+            self.maximumPrintTimeChanged.emit()
+
     @pyqtSlot(str)
     def setJobName(self, name):
         # when a file is opened using the terminal; the filename comes from _onFileLoaded and still contains its
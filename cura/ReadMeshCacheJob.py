@@ -0,0 +1,28 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Mesh.MeshData import MeshData
+
+##  Job that gets the meshes of files from the mesh cache, see MeshCache.
+#
+#   The result is a list of (file name, mesh data) tuples in the order of the files, with None as mesh data for files
+#   that are not in the cache.
+class ReadMeshCacheJob(Job):
+    ##  \param mesh_cache The MeshCache to get the meshes from.
+    #   \param file_names List of absolute paths to the files.
+    def __init__(self, mesh_cache, file_names):
+        super().__init__()
+        self._mesh_cache = mesh_cache
+        self._file_names = file_names
+
+    def run(self):
+        result = []
+        for file_name in self._file_names:
+            arrays = self._mesh_cache.get(file_name)
+            if arrays is None or "vertices" not in arrays:
+                result.append((file_name, None))
+            else:
+                result.append((file_name, MeshData(vertices = arrays["vertices"], normals = arrays.get("normals"), indices = arrays.get("indices"), file_name = file_name)))
+            Job.yieldThread()
+        self.setResult(result)
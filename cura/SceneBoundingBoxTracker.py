@@ -0,0 +1,173 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
+from UM.Math.AxisAlignedBox import AxisAlignedBox
+from UM.Math.Vector import Vector
+
+import numpy
+
+##  Keeps track of the bounding box of all objects in the scene and the number of objects.
+#
+#   Rather than walking the entire scene and summing the bounding boxes of all objects on every scene change,
+#   the bounding box of every object is stored and the total bounding box is only extended when an object
+#   changes. Only when an object that defined one of the sides of the total bounding box moves inward, the total
+#   is recomputed, from the stored bounding boxes.
+#
+#   Changes to the structure of the scene (objects being added, removed, grouped or ungrouped) only cause the
+#   changed part of the scene to be visited, and the stored bounding boxes are only checked for removed objects on
+#   such changes. Moving an object only updates the object and its children.
+class SceneBoundingBoxTracker:
+    def __init__(self, root):
+        self._root = root
+
+        # The bounding box of every object in the scene, as a (minimum, maximum) tuple of arrays, or None.
+        self._boxes = {}
+
+        # The objects (and groups) that are direct children of the root, to detect changes in the structure.
+        self._root_children = ()
+
+        # The objects that are direct children of every node with children, like groups, to detect objects being
+        # added to or removed from them.
+        self._node_children = {}
+
+        self._minimum = None
+        self._maximum = None
+        self._dirty = False
+
+    ##  Get the number of objects with mesh data in the scene.
+    def getNodeCount(self):
+        return len(self._boxes)
+
+    ##  Get the bounding box around all objects in the scene.
+    #
+    #   \return An AxisAlignedBox, which is AxisAlignedBox.Null if there are no objects.
+    def getBoundingBox(self):
+        if self._dirty:
+            self._recompute()
+
+        if self._minimum is None:
+            return AxisAlignedBox.Null
+
+        return AxisAlignedBox(minimum = Vector(*self._minimum), maximum = Vector(*self._maximum))
+
+    ##  Process a change in the scene.
+    #
+    #   \param source The node that was changed, as passed by the sceneChanged signal. If None, the entire scene is
+    #   checked again.
+    def update(self, source = None):
+        if source is None:
+            self._boxes = {}
+            self._root_children = ()
+            self._node_children = {}
+            self._minimum = None
+            self._maximum = None
+            self._dirty = False
+            source = self._root
+
+        if source is self._root:
+            root_children = self._getChildren(self._root)
+            if root_children == self._root_children:
+                return  # Only helper nodes (like convex hull shadows) were added or removed.
+
+            self._pruneRemovedNodes([child for child in self._root_children if child not in root_children])
+            for child in root_children:
+                if child not in self._root_children:
+                    self._updateSubtree(child)
+            self._root_children = root_children
+            return
+
+        if type(source) is not SceneNode:
+            return
+
+        if not self._isInScene(source):
+            self._pruneRemovedNodes([source])
+            return
+
+        # If objects were removed from a group, forget about them. If the node only moved, nothing was removed.
+        children = self._getChildren(source)
+        self._pruneRemovedNodes([child for child in self._node_children.get(source, ()) if child not in children])
+        self._updateSubtree(source)
+
+    def _updateSubtree(self, node):
+        for child in DepthFirstIterator(node):
+            if type(child) is not SceneNode:
+                continue
+
+            children = self._getChildren(child)
+            if children:
+                self._node_children[child] = children
+            else:
+                self._node_children.pop(child, None)
+            if child.getMeshData():
+                self._updateNode(child)
+            elif child in self._boxes:
+                self._removeNode(child)
+
+    def _updateNode(self, node):
+        bounding_box = node.getBoundingBox()
+        new_box = None
+        if bounding_box is not None and bounding_box.isValid():
+            new_box = (numpy.array([bounding_box.left, bounding_box.bottom, bounding_box.back], dtype = numpy.float64),
+                       numpy.array([bounding_box.right, bounding_box.top, bounding_box.front], dtype = numpy.float64))
+
+        old_box = self._boxes.get(node)
+        self._boxes[node] = new_box
+
+        if self._dirty:
+            return
+
+        if old_box is not None and self._minimum is not None:
+            # If this node defined a side of the total bounding box and moved inward, that side might move too.
+            if new_box is None or numpy.any((old_box[0] <= self._minimum) & (new_box[0] > self._minimum)) or numpy.any((old_box[1] >= self._maximum) & (new_box[1] < self._maximum)):
+                self._dirty = True
+                return
+
+        if new_box is not None:
+            if self._minimum is None:
+                self._minimum = new_box[0].copy()
+                self._maximum = new_box[1].copy()
+            else:
+                self._minimum = numpy.minimum(self._minimum, new_box[0])
+                self._maximum = numpy.maximum(self._maximum, new_box[1])
+
+    def _removeNode(self, node):
+        old_box = self._boxes.pop(node)
+        if old_box is not None:
+            self._dirty = True
+
+    ##  Forget about the objects in the subtrees of nodes that were removed from the scene.
+    #
+    #   \param nodes The nodes that were removed from their parent. Nodes that were moved elsewhere in the scene are
+    #   skipped.
+    def _pruneRemovedNodes(self, nodes):
+        for node in nodes:
+            if self._isInScene(node):
+                continue
+            for child in DepthFirstIterator(node):
+                if child in self._boxes:
+                    self._removeNode(child)
+                self._node_children.pop(child, None)
+
+    def _recompute(self):
+        self._dirty = False
+        boxes = [box for box in self._boxes.values() if box is not None]
+        if not boxes:
+            self._minimum = None
+            self._maximum = None
+            return
+
+        self._minimum = numpy.min([box[0] for box in boxes], axis = 0)
+        self._maximum = numpy.max([box[1] for box in boxes], axis = 0)
+
+    ##  Get the children of a node that are objects or groups, rather than helper nodes like convex hull shadows.
+    def _getChildren(self, node):
+        return tuple(child for child in node.getChildren() if type(child) is SceneNode)
+
+    def _isInScene(self, node):
+        while node is not None:
+            if node is self._root:
+                return True
+            node = node.getParent()
+        return False
@@ -0,0 +1,139 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Application import Application
+from UM.Scene.SceneNode import SceneNode
+from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
+
+import collections
+
+##  Keeps an index of the nodes in the scene that are of interest to Cura.
+#
+#   Many parts of Cura need the printable objects, the groups or the node with the layer data of the scene. Instead
+#   of walking the entire scene to find these every time, the registry keeps track of them using the sceneChanged
+#   signal. Only the part of the scene that changed is visited again.
+#
+#   Helper nodes (like convex hull nodes or the build volume) are never indexed, since they are not plain SceneNodes.
+class SceneNodeRegistry:
+    def __init__(self, scene = None):
+        if scene is None:
+            scene = Application.getInstance().getController().getScene()
+        self._root = scene.getRoot()
+
+        # Ordered dictionaries are used as ordered sets, so the nodes are returned in a predictable order.
+        self._printable_nodes = collections.OrderedDict()
+        self._group_nodes = collections.OrderedDict()
+        self._layer_data_nodes = collections.OrderedDict()
+
+        # The plain SceneNodes that are direct children of the root, to detect changes in the structure.
+        self._root_children = ()
+
+        scene.sceneChanged.connect(self._onSceneChanged)
+        self._onSceneChanged(None)
+
+    ##  Get the instance of the registry, or create one if no instance exists yet.
+    #
+    #   This should be created before anything else connects to the sceneChanged signal, so the registry is up to
+    #   date when the others handle the signal.
+    @classmethod
+    def getInstance(cls):
+        if not cls.__instance:
+            cls.__instance = SceneNodeRegistry()
+        return cls.__instance
+
+    ##  Get the nodes with a mesh that can be printed, excluding the node with the layer data.
+    #
+    #   \return A list of scene nodes.
+    def getPrintableNodes(self):
+        return list(self._printable_nodes.keys())
+
+    ##  Get the nodes that group other nodes.
+    #
+    #   \return A list of scene nodes.
+    def getGroupNodes(self):
+        return list(self._group_nodes.keys())
+
+    ##  Get the nodes with layer data, of which there should normally be at most one.
+    #
+    #   \return A list of scene nodes.
+    def getLayerDataNodes(self):
+        return list(self._layer_data_nodes.keys())
+
+    ##  Get the node with the layer data of the last slice.
+    #
+    #   \return The scene node, or None if there is no layer data.
+    def getLayerDataNode(self):
+        for node in self._layer_data_nodes:
+            return node
+        return None
+
+    ##  Get all indexed nodes: printable nodes, groups and layer data nodes.
+    #
+    #   \return A list of scene nodes.
+    def getNodes(self):
+        return self.getPrintableNodes() + self.getGroupNodes() + self.getLayerDataNodes()
+
+    def _onSceneChanged(self, source):
+        if source is None:
+            # Index the entire scene again.
+            self._printable_nodes.clear()
+            self._group_nodes.clear()
+            self._layer_data_nodes.clear()
+            self._root_children = ()
+            source = self._root
+
+        if source is self._root:
+            root_children = tuple(child for child in self._root.getChildren() if type(child) is SceneNode)
+            if root_children == self._root_children:
+                return  # Only helper nodes were added or removed.
+
+            self._pruneRemovedNodes()
+            for child in root_children:
+                if child not in self._root_children:
+                    self._indexSubtree(child)
+            self._root_children = root_children
+            return
+
+        if type(source) is not SceneNode:
+            return
+
+        if source in self._group_nodes or not self._isInScene(source):
+            # Nodes may have been removed from a group, or from the scene.
+            self._pruneRemovedNodes()
+        if self._isInScene(source):
+            self._indexSubtree(source)
+
+    def _indexSubtree(self, node):
+        for child in DepthFirstIterator(node):
+            if type(child) is SceneNode:
+                self._indexNode(child)
+
+    def _indexNode(self, node):
+        is_layer_data = bool(node.callDecoration("getLayerData"))
+        is_group = bool(node.callDecoration("isGroup"))
+        is_printable = not is_layer_data and bool(node.getMeshData())
+
+        self._updateMembership(self._layer_data_nodes, node, is_layer_data)
+        self._updateMembership(self._group_nodes, node, is_group)
+        self._updateMembership(self._printable_nodes, node, is_printable)
+
+    def _updateMembership(self, nodes, node, member):
+        if member:
+            if node not in nodes:
+                nodes[node] = True
+        else:
+            nodes.pop(node, None)
+
+    def _pruneRemovedNodes(self):
+        for nodes in (self._printable_nodes, self._group_nodes, self._layer_data_nodes):
+            for node in [node for node in nodes if not self._isInScene(node)]:
+                del nodes[node]
+
+    def _isInScene(self, node):
+        while node is not None:
+            if node is self._root:
+                return True
+            node = node.getParent()
+        return False
+
+    __instance = None
@@ -0,0 +1,171 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import contextlib
+import os
+import threading
+import time
+
+##  Records where the time of a slice goes.
+#
+#   A trace holds the start and end time of every phase of one slice, like building the slice message or waiting for
+#   the engine, and the number, size and handling time of the messages of every type that went to and from the
+#   engine. Phases can be recorded from any thread.
+#
+#   Once the slice is done, the trace can be turned into a dictionary for a structured log record, into the Chrome
+#   trace event format to inspect it in chrome://tracing, or into a readable summary.
+class SliceTrace:
+    ##  \param slice_id A number that identifies the slice in the log.
+    def __init__(self, slice_id):
+        self._slice_id = slice_id
+        self._lock = threading.Lock()
+        self._start_time = time.perf_counter()
+        self._end_time = None
+        self._result = None
+
+        self._phases = {} # Name of every phase to a list of its start and end time, where the end is None while running.
+        self._phase_order = [] # Names of the phases in the order in which they started.
+        self._messages = {} # Type name of every message to a list of its count, total size in bytes and handling time.
+
+    def getSliceId(self):
+        return self._slice_id
+
+    ##  Get how the slice ended, or None if the trace is not finished yet.
+    def getResult(self):
+        return self._result
+
+    def isFinished(self):
+        return self._result is not None
+
+    ##  Mark the start of a phase.
+    #
+    #   \param name The name of the phase.
+    def beginPhase(self, name):
+        with self._lock:
+            if name not in self._phases:
+                self._phase_order.append(name)
+            self._phases[name] = [time.perf_counter(), None]
+
+    ##  Mark the end of a phase. Nothing happens if the phase was never started.
+    #
+    #   \param name The name of the phase.
+    def endPhase(self, name):
+        with self._lock:
+            phase = self._phases.get(name)
+            if phase is not None and phase[1] is None:
+                phase[1] = time.perf_counter()
+
+    ##  Context manager that records the code in a with-block as a phase.
+    #
+    #   \param name The name of the phase.
+    @contextlib.contextmanager
+    def phase(self, name):
+        self.beginPhase(name)
+        try:
+            yield
+        finally:
+            self.endPhase(name)
+
+    ##  Check if a phase has started.
+    def hasPhase(self, name):
+        with self._lock:
+            return name in self._phases
+
+    ##  Count a message that was sent to or received from the engine.
+    #
+    #   \param type_name The type name of the message.
+    #   \param size The size of the message in bytes, as far as it is known.
+    #   \param handling_time The time it took to handle the message, in seconds.
+    def addMessage(self, type_name, size = 0, handling_time = 0.0):
+        with self._lock:
+            message = self._messages.setdefault(type_name, [0, 0, 0.0])
+            message[0] += 1
+            message[1] += size
+            message[2] += handling_time
+
+    ##  Add to the handling time of a type of message, without counting another message.
+    def addHandlingTime(self, type_name, handling_time):
+        with self._lock:
+            self._messages.setdefault(type_name, [0, 0, 0.0])[2] += handling_time
+
+    ##  Mark the slice as done. Phases that are still running end now.
+    #
+    #   \param result How the slice ended, like "done" or "cancelled".
+    def finish(self, result):
+        with self._lock:
+            self._end_time = time.perf_counter()
+            for phase in self._phases.values():
+                if phase[1] is None:
+                    phase[1] = self._end_time
+            self._result = result
+
+    ##  Get the trace as a dictionary that can be serialised to JSON.
+    #
+    #   Times are in seconds since the start of the slice.
+    def toDict(self):
+        with self._lock:
+            end_time = self._end_time if self._end_time is not None else time.perf_counter()
+            phases = []
+            for name in self._phase_order:
+                start, end = self._phases[name]
+                phases.append({
+                    "name": name,
+                    "start": round(start - self._start_time, 6),
+                    "duration": round((end if end is not None else end_time) - start, 6)
+                })
+            messages = {}
+            for type_name, (count, size, handling_time) in self._messages.items():
+                messages[type_name] = {"count": count, "bytes": size, "handling_time": round(handling_time, 6)}
+
+            return {
+                "slice_id": self._slice_id,
+                "result": self._result,
+                "duration": round(end_time - self._start_time, 6),
+                "phases": phases,
+                "messages": messages
+            }
+
+    ##  Get the trace in the Chrome trace event format.
+    #
+    #   Every phase is a complete event on the row of the slice, under an event for the whole slice that holds the
+    #   message statistics.
+    #
+    #   \return A dictionary that can be serialised to JSON and loaded in chrome://tracing.
+    def toChromeTrace(self):
+        trace = self.toDict()
+        process_id = os.getpid()
+        events = [{
+            "name": "slice %s" % self._slice_id,
+            "cat": "slice",
+            "ph": "X",
+            "ts": 0,
+            "dur": int(trace["duration"] * 1000000),
+            "pid": process_id,
+            "tid": self._slice_id,
+            "args": {"result": trace["result"], "messages": trace["messages"]}
+        }]
+        for phase in trace["phases"]:
+            events.append({
+                "name": phase["name"],
+                "cat": "phase",
+                "ph": "X",
+                "ts": int(phase["start"] * 1000000),
+                "dur": int(phase["duration"] * 1000000),
+                "pid": process_id,
+                "tid": self._slice_id
+            })
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    ##  Get a readable summary of the trace, with one line per phase and per type of message.
+    def getSummary(self):
+        trace = self.toDict()
+        lines = ["Slice %s (%s): %.3f s" % (trace["slice_id"], trace["result"] or "running", trace["duration"])]
+        lines.append("")
+        lines.append("Phases:")
+        for phase in sorted(trace["phases"], key = lambda phase: phase["start"]):
+            lines.append("  %-24s at %8.3f s  %8.3f s" % (phase["name"], phase["start"], phase["duration"]))
+        lines.append("")
+        lines.append("Messages:")
+        for type_name, message in sorted(trace["messages"].items()):
+            lines.append("  %-36s %6d  %10.1f kB  %8.3f s" % (type_name, message["count"], message["bytes"] / 1024, message["handling_time"]))
+        return "\n".join(lines)
@@ -0,0 +1,30 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+from UM.Logger import Logger
+from UM.Mesh.MeshData import MeshData
+
+from cura.MeshWelder import MeshWelder
+
+##  Job that turns the triangle soup of a loaded mesh into an indexed mesh, see MeshWelder.
+#
+#   The result is the indexed MeshData, or None if the mesh is already indexed.
+class WeldMeshJob(Job):
+    ##  \param mesh The MeshData to weld.
+    def __init__(self, mesh):
+        super().__init__()
+        self._mesh = mesh
+
+    def getMesh(self):
+        return self._mesh
+
+    def run(self):
+        if self._mesh.hasIndices() or self._mesh.getVertexCount() < 3:
+            return
+
+        vertices, indices = MeshWelder.weld(self._mesh.getVertices())
+        Job.yieldThread()
+        vertices, normals, indices = MeshWelder.computeNormals(vertices, indices)
+        Logger.log("d", "Welded a mesh with %s vertices into %s vertices", self._mesh.getVertexCount(), len(vertices))
+        self.setResult(MeshData(vertices = vertices, normals = normals, indices = indices, file_name = self._mesh.getFileName()))
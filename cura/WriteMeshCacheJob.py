@@ -0,0 +1,22 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Job import Job
+
+##  Job that stores the mesh of a file in the mesh cache, see MeshCache.
+class WriteMeshCacheJob(Job):
+    ##  \param mesh_cache The MeshCache to store the mesh in.
+    #   \param file_name The absolute path to the file.
+    #   \param mesh_data The MeshData of the file.
+    def __init__(self, mesh_cache, file_name, mesh_data):
+        super().__init__()
+        self._mesh_cache = mesh_cache
+        self._file_name = file_name
+        self._mesh_data = mesh_data
+
+    def run(self):
+        self._mesh_cache.put(self._file_name, {
+            "vertices": self._mesh_data.getVertices(),
+            "normals": self._mesh_data.getNormals() if self._mesh_data.hasNormals() else None,
+            "indices": self._mesh_data.getIndices() if self._mesh_data.hasIndices() else None
+        })
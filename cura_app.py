@@ -28,23 +28,29 @@ def exceptHook(hook_type, value, traceback):
 
 sys.excepthook = exceptHook
 
-# Workaround for a race condition on certain systems where there
-# is a race condition between Arcus and PyQt. Importing Arcus
-# first seems to prevent Sip from going into a state where it
-# tries to create PyQt objects on a non-main thread.
-import Arcus #@UnusedImport
-from UM.Platform import Platform
-import cura.CuraApplication
-import cura.CuraContainerRegistry
-
-if Platform.isWindows() and hasattr(sys, "frozen"):
-    dirpath = os.path.expanduser("~/AppData/Local/cura/")
-    os.makedirs(dirpath, exist_ok = True)
-    sys.stdout = open(os.path.join(dirpath, "stdout.log"), "w")
-    sys.stderr = open(os.path.join(dirpath, "stderr.log"), "w")
-
-# Force an instance of CuraContainerRegistry to be created and reused later.
-cura.CuraContainerRegistry.CuraContainerRegistry.getInstance()
-
-app = cura.CuraApplication.CuraApplication.getInstance()
-app.run()
+if __name__ == "__main__":
+    # Worker processes that are started with the "spawn" method import this module under another name, so they must
+    # not start the application. In frozen builds, freeze_support() runs the worker instead of the application.
+    import multiprocessing
+    multiprocessing.freeze_support()
+
+    # Workaround for a race condition on certain systems where there
+    # is a race condition between Arcus and PyQt. Importing Arcus
+    # first seems to prevent Sip from going into a state where it
+    # tries to create PyQt objects on a non-main thread.
+    import Arcus #@UnusedImport
+    from UM.Platform import Platform
+    import cura.CuraApplication
+    import cura.CuraContainerRegistry
+
+    if Platform.isWindows() and hasattr(sys, "frozen"):
+        dirpath = os.path.expanduser("~/AppData/Local/cura/")
+        os.makedirs(dirpath, exist_ok = True)
+        sys.stdout = open(os.path.join(dirpath, "stdout.log"), "w")
+        sys.stderr = open(os.path.join(dirpath, "stderr.log"), "w")
+
+    # Force an instance of CuraContainerRegistry to be created and reused later.
+    cura.CuraContainerRegistry.CuraContainerRegistry.getInstance()
+
+    app = cura.CuraApplication.CuraApplication.getInstance()
+    app.run()
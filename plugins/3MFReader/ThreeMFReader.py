@@ -2,23 +2,27 @@
 # Cura is released under the terms of the AGPLv3 or higher.
 
 from UM.Mesh.MeshReader import MeshReader
-from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import MeshData
 from UM.Logger import Logger
 from UM.Math.Matrix import Matrix
-from UM.Math.Vector import Vector
 from UM.Scene.SceneNode import SceneNode
 from UM.Scene.GroupDecorator import GroupDecorator
-from UM.Math.Quaternion import Quaternion
 
 from UM.Job import Job
 
-import math
+from cura.MeshWelder import MeshWelder
+
+import collections
+import numpy
 import zipfile
 
 import xml.etree.ElementTree as ET
 
 ##    Base implementation for reading 3MF files. Has no support for textures. Only loads meshes!
 class ThreeMFReader(MeshReader):
+    ##  Rotation from the coordinate frame of 3MF (Z up) to ours (Y up), which maps (x, y, z) to (x, z, -y).
+    _y_up_rotation = numpy.array([[1, 0, 0, 0], [0, 0, 1, 0], [0, -1, 0, 0], [0, 0, 0, 1]], dtype = numpy.float64)
+
     def __init__(self):
         super(ThreeMFReader, self).__init__()
         self._supported_extensions = [".3mf"]
@@ -33,86 +37,190 @@ class ThreeMFReader(MeshReader):
         # The base object of 3mf is a zipped archive.
         archive = zipfile.ZipFile(file_name, "r")
         try:
-            root = ET.parse(archive.open("3D/3dmodel.model"))
+            objects, build_items = self._parseModel(archive.open("3D/3dmodel.model"))
 
             # There can be multiple objects, try to load all of them.
-            objects = root.findall("./3mf:resources/3mf:object", self._namespaces)
             if len(objects) == 0:
                 Logger.log("w", "No objects found in 3MF file %s, either the file is corrupt or you are using an outdated format", file_name)
                 return None
 
-            for entry in objects:
-                mesh_builder = MeshBuilder()
-                node = SceneNode()
-                vertex_list = []
-                #for vertex in entry.mesh.vertices.vertex:
-                for vertex in entry.findall(".//3mf:vertex", self._namespaces):
-                    vertex_list.append([vertex.get("x"), vertex.get("y"), vertex.get("z")])
-                    Job.yieldThread()
-
-                triangles = entry.findall(".//3mf:triangle", self._namespaces)
-                mesh_builder.reserveFaceCount(len(triangles))
-
-                #for triangle in object.mesh.triangles.triangle:
-                for triangle in triangles:
-                    v1 = int(triangle.get("v1"))
-                    v2 = int(triangle.get("v2"))
-                    v3 = int(triangle.get("v3"))
-
-                    mesh_builder.addFaceByPoints(vertex_list[v1][0], vertex_list[v1][1], vertex_list[v1][2],
-                                                 vertex_list[v2][0], vertex_list[v2][1], vertex_list[v2][2],
-                                                 vertex_list[v3][0], vertex_list[v3][1], vertex_list[v3][2])
-
-                    Job.yieldThread()
-
-                # Rotate the model; We use a different coordinate frame.
-                rotation = Matrix()
-                rotation.setByRotationAxis(-0.5 * math.pi, Vector(1,0,0))
-
-                #TODO: We currently do not check for normals and simply recalculate them.
-                mesh_builder.calculateNormals()
-
-                node.setMeshData(mesh_builder.build().getTransformed(rotation))
-                node.setSelectable(True)
-
-                transformations = root.findall("./3mf:build/3mf:item[@objectid='{0}']".format(entry.get("id")), self._namespaces)
-                transformation = transformations[0] if transformations else None
-                if transformation is not None and transformation.get("transform"):
-                    splitted_transformation = transformation.get("transform").split()
-                    ## Transformation is saved as:
-                    ## M00 M01 M02 0.0
-                    ## M10 M11 M12 0.0
-                    ## M20 M21 M22 0.0
-                    ## M30 M31 M32 1.0
-                    ## We switch the row & cols as that is how everyone else uses matrices!
-                    temp_mat = Matrix()
-                    # Rotation & Scale
-                    temp_mat._data[0,0] = splitted_transformation[0]
-                    temp_mat._data[1,0] = splitted_transformation[1]
-                    temp_mat._data[2,0] = splitted_transformation[2]
-                    temp_mat._data[0,1] = splitted_transformation[3]
-                    temp_mat._data[1,1] = splitted_transformation[4]
-                    temp_mat._data[2,1] = splitted_transformation[5]
-                    temp_mat._data[0,2] = splitted_transformation[6]
-                    temp_mat._data[1,2] = splitted_transformation[7]
-                    temp_mat._data[2,2] = splitted_transformation[8]
-
-                    # Translation
-                    temp_mat._data[0,3] = splitted_transformation[9]
-                    temp_mat._data[1,3] = splitted_transformation[10]
-                    temp_mat._data[2,3] = splitted_transformation[11]
-
-                    node.setTransformation(temp_mat)
-
-                result.addChild(node)
+            if not build_items:
+                # Without build items, load every object that is not a component of another object.
+                component_ids = set(component_id for object_data in objects.values() for component_id, _ in object_data[2])
+                build_items = [(object_id, None) for object_id in objects if object_id not in component_ids]
+
+            # The mesh data of every object is created once and shared by all nodes that refer to the object.
+            mesh_data_cache = {}
+            for object_id, transformation in build_items:
+                node = self._createNode(objects, object_id, transformation, mesh_data_cache, set())
+                if node is not None:
+                    result.addChild(node)
 
                 Job.yieldThread()
 
             #If there is more then one object, group them.
-            if len(objects) > 1:
+            if len(result.getChildren()) > 1:
                 group_decorator = GroupDecorator()
                 result.addDecorator(group_decorator)
         except Exception as e:
             Logger.log("e" ,"exception occured in 3mf reader: %s" , e)
 
-        return result  
+        return result
+
+    ##  Create the node of an object, with a child node for every component of the object.
+    #
+    #   \param objects The parsed objects, see _parseModel().
+    #   \param object_id The id of the object to create the node for.
+    #   \param transformation The transform attribute of the item or component that refers to the object, or None.
+    #   \param mesh_data_cache Dictionary of the mesh data created so far, by object id.
+    #   \param parent_ids The ids of the objects that (indirectly) contain this object, to detect cycles.
+    #   \return The node, or None if the object does not exist or has nothing to load.
+    def _createNode(self, objects, object_id, transformation, mesh_data_cache, parent_ids):
+        if object_id not in objects or object_id in parent_ids:
+            Logger.log("w", "Object %s in 3MF file does not exist or contains itself", object_id)
+            return None
+        vertices, indices, components = objects[object_id]
+
+        node = SceneNode()
+        if components:
+            for component_id, component_transformation in components:
+                child = self._createNode(objects, component_id, component_transformation, mesh_data_cache, parent_ids | {object_id})
+                if child is not None:
+                    node.addChild(child)
+            if not node.getChildren():
+                return None
+            node.addDecorator(GroupDecorator())
+        else:
+            if len(indices) == 0:
+                return None
+            if object_id not in mesh_data_cache:
+                mesh_data_cache[object_id] = self._createMeshData(vertices, indices)
+            node.setMeshData(mesh_data_cache[object_id])
+
+        node.setSelectable(True)
+        if transformation:
+            node.setTransformation(self._createTransformation(transformation))
+        return node
+
+    ##  Parse the model file of a 3MF archive.
+    #
+    #   The file is parsed as a stream, so the document is never completely in memory. The coordinates and indices
+    #   of every object are collected in flat lists and converted to arrays in one go.
+    #
+    #   \param stream The file object of the model file.
+    #   \return A tuple with an ordered dictionary of (vertices, indices, components) by object id, where components
+    #   is a list of (object id, transformation) tuples, and a list of (object id, transformation) tuples of the build
+    #   items. Transformations are the strings of the transform attributes, or None.
+    def _parseModel(self, stream):
+        namespace = "{" + self._namespaces["3mf"] + "}"
+        object_tag = namespace + "object"
+        vertex_tag = namespace + "vertex"
+        triangle_tag = namespace + "triangle"
+        component_tag = namespace + "component"
+        item_tag = namespace + "item"
+
+        objects = collections.OrderedDict()
+        build_items = []
+
+        object_id = None
+        coordinates = []
+        triangle_indices = []
+        components = []
+        element_count = 0
+        open_elements = [] # The elements that started but did not end yet, so the parent of every element is known.
+        for event, element in ET.iterparse(stream, events = ("start", "end")):
+            if event == "start":
+                open_elements.append(element)
+                if element.tag == object_tag:
+                    object_id = element.get("id")
+                    coordinates = []
+                    triangle_indices = []
+                    components = []
+                continue
+
+            # Remove the element from its parent, so elements that are done do not pile up in the parent, like the
+            # vertices in the vertices element of a large object. Earlier siblings are removed already, so this is
+            # always the first child.
+            open_elements.pop()
+            if open_elements:
+                open_elements[-1].remove(element)
+
+            if element.tag == vertex_tag:
+                coordinates.extend((element.get("x"), element.get("y"), element.get("z")))
+            elif element.tag == triangle_tag:
+                triangle_indices.extend((element.get("v1"), element.get("v2"), element.get("v3")))
+            elif element.tag == component_tag:
+                components.append((element.get("objectid"), element.get("transform")))
+            elif element.tag == object_tag:
+                vertices = numpy.array(coordinates, dtype = numpy.float32).reshape((-1, 3))
+                indices = numpy.array(triangle_indices, dtype = numpy.int32).reshape((-1, 3))
+                if len(indices) and (numpy.min(indices) < 0 or numpy.max(indices) >= len(vertices)):
+                    raise ValueError("Object {0} refers to vertices that do not exist".format(object_id))
+                objects[object_id] = (vertices, indices, components)
+                object_id = None
+            elif element.tag == item_tag:
+                build_items.append((element.get("objectid"), element.get("transform")))
+            else:
+                continue
+
+            # Free the memory of the parsed elements as soon as they are processed.
+            element.clear()
+
+            element_count += 1
+            if element_count % 10000 == 0:
+                Job.yieldThread()
+
+        return objects, build_items
+
+    ##  Create the mesh data of an object.
+    #
+    #   \param vertices The array of vertex positions of the object, in 3MF coordinates.
+    #   \param indices The array of vertex indices of the triangles.
+    #   \return Indexed mesh data in our coordinate frame.
+    def _createMeshData(self, vertices, indices):
+        # Rotate the model; We use a different coordinate frame (Y up instead of Z up).
+        rotated = numpy.empty(vertices.shape, dtype = numpy.float32)
+        rotated[:, 0] = vertices[:, 0]
+        rotated[:, 1] = vertices[:, 2]
+        rotated[:, 2] = -vertices[:, 1]
+
+        #TODO: We currently do not check for normals and simply recalculate them.
+        # Vertices on hard edges are split, so that flat faces keep their own normals.
+        rotated, normals, indices = MeshWelder.computeNormals(rotated, indices)
+
+        return MeshData(vertices = rotated, normals = normals, indices = indices)
+
+    ##  Create the transformation of a build item or component.
+    #
+    #   The meshes are rotated to our coordinate frame in _createMeshData(), so the transformation is rotated along:
+    #   it becomes R * M * R^-1, where M is the matrix in the file and R the rotation of the meshes.
+    #
+    #   \param transformation The transform attribute of the build item or component.
+    #   \return The transformation in our coordinate frame.
+    def _createTransformation(self, transformation):
+        splitted_transformation = transformation.split()
+        ## Transformation is saved as:
+        ## M00 M01 M02 0.0
+        ## M10 M11 M12 0.0
+        ## M20 M21 M22 0.0
+        ## M30 M31 M32 1.0
+        ## We switch the row & cols as that is how everyone else uses matrices!
+        temp_mat = Matrix()
+        # Rotation & Scale
+        temp_mat._data[0,0] = splitted_transformation[0]
+        temp_mat._data[1,0] = splitted_transformation[1]
+        temp_mat._data[2,0] = splitted_transformation[2]
+        temp_mat._data[0,1] = splitted_transformation[3]
+        temp_mat._data[1,1] = splitted_transformation[4]
+        temp_mat._data[2,1] = splitted_transformation[5]
+        temp_mat._data[0,2] = splitted_transformation[6]
+        temp_mat._data[1,2] = splitted_transformation[7]
+        temp_mat._data[2,2] = splitted_transformation[8]
+
+        # Translation
+        temp_mat._data[0,3] = splitted_transformation[9]
+        temp_mat._data[1,3] = splitted_transformation[10]
+        temp_mat._data[2,3] = splitted_transformation[11]
+
+        temp_mat._data = self._y_up_rotation.dot(temp_mat._data).dot(self._y_up_rotation.T)
+        return temp_mat
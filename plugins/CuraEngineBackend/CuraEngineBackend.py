@@ -12,16 +12,26 @@ from UM.PluginRegistry import PluginRegistry
 from UM.Resources import Resources
 from UM.Settings.Validator import ValidatorState #To find if a setting is in an error state. We can't slice then.
 from UM.Platform import Platform
+from UM.Settings.ContainerRegistry import ContainerRegistry
+from UM.Settings.ContainerStack import ContainerStack
+
+from cura.PrintInformation import PrintInformation
 
 from cura.ExtruderManager import ExtruderManager
 
 from cura.OneAtATimeIterator import OneAtATimeIterator
+from cura.GCodePostProcessingPipeline import GCodePostProcessingPipeline
+from cura.GCodeSpool import GCodeSpool
+from cura.SliceTrace import SliceTrace
 from . import ProcessSlicedLayersJob
 from . import ProcessGCodeJob
 from . import StartSliceJob
+from . import PrintTimeEstimationPass
 
+import json
 import os
 import sys
+import time
 
 from PyQt5.QtCore import QTimer
 
@@ -47,6 +57,7 @@ class CuraEngineBackend(Backend):
             default_engine_location += ".exe"
         default_engine_location = os.path.abspath(default_engine_location)
         Preferences.getInstance().addPreference("backend/location", default_engine_location)
+        Preferences.getInstance().addPreference("backend/slice_trace_file", "") # Chrome trace of the last slice is written here, if not empty.
 
         self._scene = Application.getInstance().getController().getScene()
         self._scene.sceneChanged.connect(self._onSceneChanged)
@@ -75,13 +86,13 @@ class CuraEngineBackend(Backend):
         self._change_timer.timeout.connect(self.slice)
 
         #Listeners for receiving messages from the back-end.
-        self._message_handlers["cura.proto.Layer"] = self._onLayerMessage
-        self._message_handlers["cura.proto.Progress"] = self._onProgressMessage
-        self._message_handlers["cura.proto.GCodeLayer"] = self._onGCodeLayerMessage
-        self._message_handlers["cura.proto.GCodePrefix"] = self._onGCodePrefixMessage
-        self._message_handlers["cura.proto.PrintTimeMaterialEstimates"] = self._onPrintTimeMaterialEstimates
+        self._message_handlers["cura.proto.Layer"] = self._traceMessageHandler(self._onLayerMessage)
+        self._message_handlers["cura.proto.Progress"] = self._traceMessageHandler(self._onProgressMessage)
+        self._message_handlers["cura.proto.GCodeLayer"] = self._traceMessageHandler(self._onGCodeLayerMessage)
+        self._message_handlers["cura.proto.GCodePrefix"] = self._traceMessageHandler(self._onGCodePrefixMessage)
+        self._message_handlers["cura.proto.PrintTimeMaterialEstimates"] = self._traceMessageHandler(self._onPrintTimeMaterialEstimates)
         #self._message_handlers["cura.proto.ObjectPrintTime"] = self._onObjectPrintTimeMessage
-        self._message_handlers["cura.proto.SlicingFinished"] = self._onSlicingFinishedMessage
+        self._message_handlers["cura.proto.SlicingFinished"] = self._traceMessageHandler(self._onSlicingFinishedMessage)
 
         self._start_slice_job = None
         self._slicing = False #Are we currently slicing?
@@ -89,6 +100,15 @@ class CuraEngineBackend(Backend):
         self._enabled = True #Should we be slicing? Slicing might be paused when, for instance, the user is dragging the mesh around.
         self._always_restart = True #Always restart the engine when starting a new slice. Don't keep the process running. TODO: Fix engine statelessness.
         self._process_layers_job = None #The currently active job to process layers, or None if it is not processing layers.
+        self._post_processing_pipeline = None #Applies the g-code post-processors to the layers of the current slice, or None if there are none.
+        self._slice_trace = None #Records the phases of the current slice, or None if not slicing.
+        self._last_slice_trace = None #The trace of the last slice that is finished.
+        self._next_slice_id = 1
+        self._slice_reason = PrintInformation.SliceReason.Other #Why the current slice was started.
+        self._pending_slice_reason = None #Why the next slice will be started, or None if there is no specific reason.
+        self._estimation_passes = [] #The running passes that estimate the print time with other quality profiles.
+        self._estimation_passes_cancelled = True #Whether the last passes were stopped before all of them finished, or none were started yet.
+        self._print_time_estimates = None #The print time and material amounts of the last slice.
 
         self._error_message = None #Pop-up message that shows errors.
 
@@ -109,16 +129,23 @@ class CuraEngineBackend(Backend):
 
     ##  Get the command that is used to call the engine.
     #   This is useful for debugging and used to actually start the engine.
+    #   \param port The port for the engine to connect to, or None for the port of this back-end.
     #   \return list of commands and args / parameters.
-    def getEngineCommand(self):
+    def getEngineCommand(self, port = None):
         json_path = Resources.getPath(Resources.DefinitionContainers, "fdmprinter.def.json")
-        return [Preferences.getInstance().getValue("backend/location"), "connect", "127.0.0.1:{0}".format(self._port), "-j", json_path, "-vv"]
+        return [Preferences.getInstance().getValue("backend/location"), "connect", "127.0.0.1:{0}".format(port if port is not None else self._port), "-j", json_path, "-vv"]
 
     ##  Emitted when we get a message containing print duration and material amount. This also implies the slicing has finished.
     #   \param time The amount of time the print will take.
     #   \param material_amount The amount of material the print will use.
     printDurationMessage = Signal()
 
+    ##  Emitted when an estimation pass gets the print duration and material amount with other quality settings.
+    #   \param slice_pass The PrintInformation.SlicePass of the estimate.
+    #   \param time The amount of time the print will take.
+    #   \param material_amount The amount of material the print will use.
+    estimationPassFinished = Signal()
+
     ##  Emitted when the slicing process starts.
     slicingStarted = Signal()
 
@@ -133,6 +160,10 @@ class CuraEngineBackend(Backend):
             return
 
         self.printDurationMessage.emit(0, [0])
+        self._print_time_estimates = None
+        self.cancelEstimationPasses() #The scene or the settings changed, so the estimates will change too.
+        self._slice_reason = self._pending_slice_reason if self._pending_slice_reason is not None else PrintInformation.SliceReason.Other
+        self._pending_slice_reason = None
 
         self._stored_layer_data = []
 
@@ -149,15 +180,124 @@ class CuraEngineBackend(Backend):
         self.processingProgress.emit(0.0)
         self.backendStateChange.emit(BackendState.NotStarted)
 
-        self._scene.gcode_list = []
+        self._scene.gcode_list = GCodeSpool()
+        if self._post_processing_pipeline is not None:
+            self._post_processing_pipeline.abort()
+            self._post_processing_pipeline = None
+        post_processors = Application.getInstance().getGCodePostProcessors()
+        if post_processors:
+            self._post_processing_pipeline = GCodePostProcessingPipeline(post_processors, self._scene.gcode_list)
         self._slicing = True
         self.slicingStarted.emit()
 
+        self._slice_trace = SliceTrace(self._next_slice_id)
+        self._next_slice_id += 1
+        self._slice_trace.beginPhase("start_slice_job")
+
         slice_message = self._socket.createMessage("cura.proto.Slice")
-        self._start_slice_job = StartSliceJob.StartSliceJob(slice_message)
+        self._start_slice_job = StartSliceJob.StartSliceJob(slice_message, self._slice_trace)
         self._start_slice_job.start()
         self._start_slice_job.finished.connect(self._onStartSliceCompleted)
 
+    ##  Get why the current or last slice was started.
+    #
+    #   \return A PrintInformation.SliceReason.
+    def getSliceReason(self):
+        return self._slice_reason
+
+    ##  Estimate the print time and material amounts with other quality
+    #   settings, in separate engine processes.
+    #
+    #   Passes that are still running are cancelled. Every pass reports its
+    #   estimates with estimationPassFinished. A pass with the quality profile
+    #   that is active reports the estimates of the last slice right away.
+    #
+    #   \param slice_passes List of PrintInformation.SlicePass values, except
+    #   CurrentSettings.
+    def startEstimationPasses(self, slice_passes):
+        self.cancelEstimationPasses()
+        if not self._global_container_stack:
+            return
+        self._estimation_passes_cancelled = False
+
+        protocol_file = os.path.abspath(os.path.join(PluginRegistry.getInstance().getPluginPath(self.getPluginId()), "Cura.proto"))
+        for slice_pass in slice_passes:
+            quality = self._findEstimationQuality(slice_pass)
+            if quality is None:
+                continue
+            if quality.getId() == self._global_container_stack.findContainer({"type": "quality"}).getId():
+                if self._print_time_estimates is not None:
+                    self.estimationPassFinished.emit(slice_pass, *self._print_time_estimates)
+                continue
+
+            port = self._port + slice_pass - PrintInformation.SlicePass.CurrentSettings # Every pass listens on its own port.
+            estimation_pass = PrintTimeEstimationPass.PrintTimeEstimationPass(slice_pass, self._createEstimationStack(quality), port, self.getEngineCommand(port), protocol_file)
+            estimation_pass.finished.connect(self._onEstimationPassFinished)
+            self._estimation_passes.append(estimation_pass)
+            estimation_pass.start()
+
+    ##  Stop all running estimation passes.
+    def cancelEstimationPasses(self):
+        if self._estimation_passes:
+            self._estimation_passes_cancelled = True
+        for estimation_pass in self._estimation_passes:
+            estimation_pass.cancel()
+        self._estimation_passes = []
+
+    ##  Check whether the estimation passes that were started last were
+    #   stopped before all of them finished.
+    #
+    #   The minimum and maximum print times are then out of date, even if the
+    #   change that is sliced next would not change them.
+    def wereEstimationPassesCancelled(self):
+        return self._estimation_passes_cancelled
+
+    ##  Find the quality profile to estimate a slice pass with.
+    #
+    #   The low quality pass uses the fastest quality profile for the same
+    #   machine and material as the active quality profile, the high quality
+    #   pass the finest. Profiles with a lower weight are finer.
+    #
+    #   \param slice_pass The PrintInformation.SlicePass to find the quality for.
+    #   \return The quality container, or None if there is no active quality.
+    def _findEstimationQuality(self, slice_pass):
+        active_quality = self._global_container_stack.findContainer({"type": "quality"})
+        if not active_quality or not active_quality.getDefinition():
+            return None
+
+        search_criteria = {"type": "quality", "definition": active_quality.getDefinition().getId()}
+        material = active_quality.getMetaDataEntry("material")
+        if material:
+            search_criteria["material"] = material
+        qualities = ContainerRegistry.getInstance().findInstanceContainers(**search_criteria)
+        if not qualities:
+            return None
+
+        qualities.sort(key = lambda quality: int(quality.getMetaDataEntry("weight", 0)))
+        if slice_pass == PrintInformation.SlicePass.LowQualitySettings:
+            return qualities[-1]
+        return qualities[0]
+
+    ##  Create a copy of the global container stack with another quality
+    #   profile, to slice with without changing the active settings.
+    #
+    #   \param quality The quality container to use.
+    #   \return The new container stack.
+    def _createEstimationStack(self, quality):
+        stack = ContainerStack(self._global_container_stack.getId() + "_estimation_" + quality.getId())
+        # Containers are added on top of the stack, so the bottom goes first.
+        for container in reversed(self._global_container_stack.getContainers()):
+            if container.getMetaDataEntry("type") == "quality":
+                container = quality
+            stack.addContainer(container)
+        return stack
+
+    def _onEstimationPassFinished(self, estimation_pass, time, material_amounts):
+        if estimation_pass not in self._estimation_passes: #Cancelled while the estimates were on their way.
+            return
+        self._estimation_passes.remove(estimation_pass)
+        self.estimationPassFinished.emit(estimation_pass.getSlicePass(), time, material_amounts)
+
     ##  Terminate the engine process.
     def _terminate(self):
         self._slicing = False
@@ -165,6 +305,11 @@ class CuraEngineBackend(Backend):
         self._stored_layer_data = []
         if self._start_slice_job is not None:
             self._start_slice_job.cancel()
+        if self._post_processing_pipeline is not None:
+            self._post_processing_pipeline.abort()
+            self._post_processing_pipeline = None
+        self._finishSliceTrace(self._slice_trace, "cancelled")
+        self.cancelEstimationPasses()
 
         self.slicingCancelled.emit()
         self.processingProgress.emit(0)
@@ -192,9 +337,13 @@ class CuraEngineBackend(Backend):
             self._start_slice_job = None
 
         if job.isCancelled() or job.getError() or job.getResult() == StartSliceJob.StartJobResult.Error:
+            if not job.isCancelled():
+                self._finishSliceTrace(self._slice_trace, "error")
             return
 
+        self._slice_trace.endPhase("start_slice_job")
         if job.getResult() == StartSliceJob.StartJobResult.SettingError:
+            self._finishSliceTrace(self._slice_trace, "setting_error")
             if Application.getInstance().getPlatformActivity:
                 self._error_message = Message(catalog.i18nc("@info:status", "Unable to slice. Please check your setting values for errors."), lifetime = 10)
                 self._error_message.show()
@@ -204,6 +353,7 @@ class CuraEngineBackend(Backend):
             return
 
         if job.getResult() == StartSliceJob.StartJobResult.NothingToSlice:
+            self._finishSliceTrace(self._slice_trace, "nothing_to_slice")
             if Application.getInstance().getPlatformActivity:
                 self._error_message = Message(catalog.i18nc("@info:status", "Unable to slice. No suitable objects found."), lifetime = 10)
                 self._error_message.show()
@@ -213,7 +363,10 @@ class CuraEngineBackend(Backend):
             return
 
         # Preparation completed, send it to the backend.
-        self._socket.sendMessage(job.getSliceMessage())
+        with self._slice_trace.phase("send"):
+            self._socket.sendMessage(job.getSliceMessage())
+        # Until the first message of the engine arrives, the slice data is being transferred and read by the engine.
+        self._slice_trace.beginPhase("engine_startup")
 
     ##  Listener for when the scene has changed.
     #
@@ -233,6 +386,7 @@ class CuraEngineBackend(Backend):
         if source.getMeshData().getVertices() is None:
             return
 
+        self._setPendingSliceReason(PrintInformation.SliceReason.SceneChanged)
         self._onChanged()
 
     ##  Called when an error occurs in the socket connection towards the engine.
@@ -254,6 +408,7 @@ class CuraEngineBackend(Backend):
     #   \param property The property of the setting instance that has changed.
     def _onSettingChanged(self, instance, property):
         if property == "value": #Only reslice if the value has changed.
+            self._setPendingSliceReason(PrintInformation.SliceReason.SettingChanged)
             self._onChanged()
 
     ##  Called when a sliced layer data message is received from the engine.
@@ -273,28 +428,144 @@ class CuraEngineBackend(Backend):
     #
     #   \param message The protobuf message signalling that slicing is finished.
     def _onSlicingFinishedMessage(self, message):
+        trace = self._slice_trace
+        if trace is not None:
+            trace.endPhase("engine")
+
+        # The g-code is only complete once the post-processors are done with the last layers, which they do in
+        # their own thread.
+        if self._post_processing_pipeline is not None:
+            if trace is not None:
+                trace.beginPhase("post_processing")
+            self._post_processing_pipeline.finished.connect(self._onPostProcessingFinished)
+            self._post_processing_pipeline.finish()
+            return
+
+        self._onSlicingDone()
+
+    ##  Called when the g-code post-processors are done with the last layer.
+    #
+    #   \param pipeline The GCodePostProcessingPipeline that is done.
+    def _onPostProcessingFinished(self, pipeline):
+        if pipeline is not self._post_processing_pipeline: #Aborted by a new slice while the signal was on its way.
+            return
+        self._post_processing_pipeline = None
+        if self._slice_trace is not None:
+            self._slice_trace.endPhase("post_processing")
+
+        self._onSlicingDone()
+
+    ##  Called when the engine is done slicing and the g-code is complete.
+    def _onSlicingDone(self):
+        trace = self._slice_trace
+
         self.backendStateChange.emit(BackendState.Done)
         self.processingProgress.emit(1.0)
 
         self._slicing = False
+        self._slice_trace = None
 
         if self._layer_view_active and (self._process_layers_job is None or not self._process_layers_job.isRunning()):
-            self._process_layers_job = ProcessSlicedLayersJob.ProcessSlicedLayersJob(self._stored_layer_data)
+            # The trace is finished once the layers are processed.
+            self._process_layers_job = ProcessSlicedLayersJob.ProcessSlicedLayersJob(self._stored_layer_data, trace)
+            self._process_layers_job.finished.connect(self._onProcessLayersFinished)
             self._process_layers_job.start()
             self._stored_layer_data = []
+        else:
+            self._finishSliceTrace(trace, "done")
+
+    ##  Called when a job to process the layers of a slice is finished.
+    #
+    #   \param job The ProcessSlicedLayersJob that is finished.
+    def _onProcessLayersFinished(self, job):
+        self._finishSliceTrace(job.getSliceTrace(), "cancelled" if job.isAborted() else "done")
+
+    ##  Get the trace of the last slice that is finished, cancelled or failed.
+    #
+    #   \return The SliceTrace, or None if no slice is finished yet.
+    def getLastSliceTrace(self):
+        return self._last_slice_trace
+
+    ##  Finish the trace of a slice, log it and write it to the trace file if
+    #   one is set in the preferences.
+    #
+    #   \param trace The SliceTrace to finish. Nothing happens if it is None
+    #   or already finished.
+    #   \param result How the slice ended.
+    def _finishSliceTrace(self, trace, result):
+        if trace is None or trace.isFinished():
+            return
+        if trace is self._slice_trace:
+            self._slice_trace = None
+
+        trace.finish(result)
+        self._last_slice_trace = trace
+        Logger.log("i", "Slice trace: %s", json.dumps(trace.toDict(), sort_keys = True))
+
+        trace_file = Preferences.getInstance().getValue("backend/slice_trace_file")
+        if trace_file:
+            try:
+                with open(trace_file, "w") as f:
+                    json.dump(trace.toChromeTrace(), f)
+            except OSError as e:
+                Logger.log("w", "Could not write slice trace to %s: %s", trace_file, str(e))
+
+    ##  Wrap a message handler to count the messages it handles and the time
+    #   it takes in the trace of the current slice.
+    #
+    #   \param handler The function that handles the message.
+    #   \return A function that handles the message with the handler.
+    def _traceMessageHandler(self, handler):
+        def tracedHandler(message):
+            trace = self._slice_trace
+            if trace is None:
+                handler(message)
+                return
+
+            type_name = message.getTypeName()
+            if not trace.hasPhase("engine"):
+                trace.endPhase("engine_startup")
+                trace.beginPhase("engine")
+            trace.addMessage(type_name, self._getMessageSize(message))
+            start_time = time.perf_counter()
+            handler(message)
+            trace.addHandlingTime(type_name, time.perf_counter() - start_time)
+        return tracedHandler
+
+    ##  Get the size of the data in a message from the engine, as far as it is
+    #   known.
+    #
+    #   Only the g-code and the polygons of layers are counted, which are
+    #   nearly all of the data.
+    def _getMessageSize(self, message):
+        type_name = message.getTypeName()
+        if type_name in ("cura.proto.GCodeLayer", "cura.proto.GCodePrefix"):
+            return len(message.data)
+        if type_name == "cura.proto.Layer":
+            size = 0
+            for index in range(message.repeatedMessageCount("polygons")):
+                size += len(message.getRepeatedMessage("polygons", index).points)
+            return size
+        return 0
 
     ##  Called when a g-code message is received from the engine.
     #
+    #   If there are g-code post-processors, the layer is post-processed in a
+    #   worker thread before it is added to the g-code.
+    #
     #   \param message The protobuf message containing g-code, encoded as UTF-8.
     def _onGCodeLayerMessage(self, message):
-        self._scene.gcode_list.append(message.data.decode("utf-8", "replace"))
+        if self._post_processing_pipeline is not None:
+            self._post_processing_pipeline.addLayer(message.data)
+        else:
+            self._scene.gcode_list.append(message.data)
 
     ##  Called when a g-code prefix message is received from the engine.
     #
     #   \param message The protobuf message containing the g-code prefix,
     #   encoded as UTF-8.
     def _onGCodePrefixMessage(self, message):
-        self._scene.gcode_list.insert(0, message.data.decode("utf-8", "replace"))
+        self._scene.gcode_list.setPrefix(message.data)
 
     ##  Called when a print time message is received from the engine.
     #
@@ -304,12 +575,23 @@ class CuraEngineBackend(Backend):
         material_amounts = []
         for index in range(message.repeatedMessageCount("materialEstimates")):
             material_amounts.append(message.getRepeatedMessage("materialEstimates", index).material_amount)
+        self._print_time_estimates = (message.time, material_amounts)
         self.printDurationMessage.emit(message.time, material_amounts)
 
     ##  Creates a new socket connection.
     def _createSocket(self):
         super()._createSocket(os.path.abspath(os.path.join(PluginRegistry.getInstance().getPluginPath(self.getPluginId()), "Cura.proto")))
 
+    ##  Remember why the next slice is started.
+    #
+    #   A setting change is the least important reason, so it does not replace
+    #   another reason of changes that are sliced together.
+    #
+    #   \param reason A PrintInformation.SliceReason.
+    def _setPendingSliceReason(self, reason):
+        if self._pending_slice_reason is None or reason != PrintInformation.SliceReason.SettingChanged:
+            self._pending_slice_reason = reason
+
     ##  Manually triggers a reslice
     def forceSlice(self):
         self._change_timer.start()
@@ -380,6 +662,7 @@ class CuraEngineBackend(Backend):
             self._global_container_stack.propertyChanged.connect(self._onSettingChanged) #Note: Only starts slicing when the value changed.
             self._global_container_stack.containersChanged.connect(self._onChanged)
             self._onActiveExtruderChanged()
+            self._setPendingSliceReason(PrintInformation.SliceReason.ActiveMachineChanged)
             self._onChanged()
 
     def _onActiveExtruderChanged(self):
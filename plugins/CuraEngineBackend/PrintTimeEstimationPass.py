@@ -0,0 +1,159 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from UM.Backend.SignalSocket import SignalSocket
+from UM.Logger import Logger
+from UM.Platform import Platform
+from UM.Signal import Signal, signalemitter
+
+from . import StartSliceJob
+
+import os
+import subprocess
+
+import Arcus
+
+##  Slices the scene in a separate engine process, only to estimate the print time and material amounts.
+#
+#   Every pass has its own socket and engine process, so several passes run at the same time as the slice of the
+#   backend. The engine process gets a lower priority than the engine of the backend, so the estimation passes do not
+#   slow down the slice that the user waits for. Only the print time estimates are handled; the layers and g-code that
+#   the engine sends are dropped, and the engine is stopped as soon as the estimates arrive.
+@signalemitter
+class PrintTimeEstimationPass:
+    ##  Priority of the engine process relative to normal processes, on systems with nice values.
+    _nice_increment = 10
+
+    ##  Windows process creation flag for a priority below normal.
+    _below_normal_priority_class = 0x00004000
+
+    ##  \param slice_pass The PrintInformation.SlicePass that this pass computes.
+    #   \param stack The global container stack to slice with.
+    #   \param port The port to listen on for the engine.
+    #   \param engine_command The command to start the engine with, connecting to the port.
+    #   \param protocol_file The file with the message types of the engine.
+    def __init__(self, slice_pass, stack, port, engine_command, protocol_file):
+        self._slice_pass = slice_pass
+        self._stack = stack
+        self._port = port
+        self._engine_command = engine_command
+        self._protocol_file = protocol_file
+
+        self._socket = None
+        self._process = None
+        self._start_slice_job = None
+        self._slice_message = None # The slice message, once it is built and until it is sent.
+        self._connected = False
+        self._done = False
+
+    ##  Emitted when the estimates are received.
+    #
+    #   \param estimation_pass This pass.
+    #   \param time The print time in seconds.
+    #   \param material_amounts The amount of material per extruder.
+    finished = Signal()
+
+    def getSlicePass(self):
+        return self._slice_pass
+
+    ##  Start the engine and build the slice message.
+    def start(self):
+        self._socket = SignalSocket()
+        self._socket.stateChanged.connect(self._onSocketStateChanged)
+        self._socket.messageReceived.connect(self._onMessageReceived)
+        self._socket.error.connect(self._onSocketError)
+        if not self._socket.registerAllMessageTypes(self._protocol_file):
+            Logger.log("e", "Could not register the message types for estimation pass %s: %s", self._slice_pass, self._socket.getLastError())
+            self._stop()
+            return
+        self._socket.listen("127.0.0.1", self._port)
+
+        try:
+            self._process = self._startEngine()
+        except OSError as e:
+            Logger.log("e", "Could not start the engine for estimation pass %s: %s", self._slice_pass, str(e))
+            self._stop()
+            return
+
+        self._start_slice_job = StartSliceJob.StartSliceJob(self._socket.createMessage("cura.proto.Slice"), stack = self._stack)
+        self._start_slice_job.finished.connect(self._onStartSliceCompleted)
+        self._start_slice_job.start()
+
+    ##  Stop the pass without estimates, for instance because the scene or the settings changed.
+    def cancel(self):
+        self._done = True
+        if self._start_slice_job is not None:
+            self._start_slice_job.cancel()
+        self._stop()
+
+    def _startEngine(self):
+        kwargs = {}
+        if Platform.isWindows():
+            kwargs["creationflags"] = self._below_normal_priority_class
+        process = subprocess.Popen(self._engine_command, stdin = subprocess.DEVNULL, stdout = subprocess.DEVNULL, stderr = subprocess.DEVNULL, **kwargs)
+        if hasattr(os, "setpriority"):
+            try:
+                os.setpriority(os.PRIO_PROCESS, process.pid, os.getpriority(os.PRIO_PROCESS, 0) + self._nice_increment)
+            except OSError as e:
+                Logger.log("w", "Could not lower the priority of the engine for estimation pass %s: %s", self._slice_pass, str(e))
+        return process
+
+    def _onStartSliceCompleted(self, job):
+        self._start_slice_job = None
+        if self._done:
+            return
+        if job.isCancelled() or job.getError() or job.getResult() != StartSliceJob.StartJobResult.Finished:
+            self._done = True
+            self._stop()
+            return
+
+        self._slice_message = job.getSliceMessage()
+        self._sendSliceMessage()
+
+    def _onSocketStateChanged(self, state):
+        if state == Arcus.SocketState.Connected:
+            self._connected = True
+            self._sendSliceMessage()
+
+    ##  Send the slice message once it is built and the engine is connected.
+    def _sendSliceMessage(self):
+        if self._done or not self._connected or self._slice_message is None:
+            return
+        self._socket.sendMessage(self._slice_message)
+        self._slice_message = None
+
+    def _onMessageReceived(self):
+        if self._socket is None: # Messages that were queued before the socket was closed.
+            return
+        message = self._socket.takeNextMessage()
+        if self._done or message.getTypeName() != "cura.proto.PrintTimeMaterialEstimates":
+            return
+
+        material_amounts = []
+        for index in range(message.repeatedMessageCount("materialEstimates")):
+            material_amounts.append(message.getRepeatedMessage("materialEstimates", index).material_amount)
+
+        self._done = True
+        self._stop()
+        self.finished.emit(self, message.time, material_amounts)
+
+    def _onSocketError(self, error):
+        if self._done:
+            return
+        if error.getErrorCode() not in [Arcus.ErrorCode.Debug]:
+            Logger.log("w", "Socket error in estimation pass %s: %s", self._slice_pass, error.getErrorMessage())
+            self.cancel()
+
+    ##  Stop the engine and close the socket.
+    def _stop(self):
+        if self._process is not None:
+            try:
+                self._process.terminate()
+                self._process.wait()
+            except Exception as e: # The process may already be gone.
+                Logger.log("d", "Exception occurred while trying to kill the engine of estimation pass %s: %s", self._slice_pass, str(e))
+            self._process = None
+        if self._socket is not None:
+            self._socket.close()
+            self._socket = None
+        self._slice_message = None
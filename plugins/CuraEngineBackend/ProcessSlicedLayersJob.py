@@ -2,7 +2,6 @@
 # Cura is released under the terms of the AGPLv3 or higher.
 
 from UM.Job import Job
-from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
 from UM.Scene.SceneNode import SceneNode
 from UM.Application import Application
 from UM.Mesh.MeshData import MeshData
@@ -14,6 +13,7 @@ from UM.Math.Vector import Vector
 
 from cura import LayerDataBuilder
 from cura import LayerDataDecorator
+from cura.SceneNodeRegistry import SceneNodeRegistry
 
 import numpy
 
@@ -21,9 +21,12 @@ catalog = i18nCatalog("cura")
 
 
 class ProcessSlicedLayersJob(Job):
-    def __init__(self, layers):
+    ##  \param layers The layer messages of the engine.
+    #   \param slice_trace Optional SliceTrace of the slice, to record the processing of the layers in.
+    def __init__(self, layers, slice_trace = None):
         super().__init__()
         self._layers = layers
+        self._slice_trace = slice_trace
         self._scene = Application.getInstance().getController().getScene()
         self._progress = None
         self._abort_requested = False
@@ -37,7 +40,23 @@ class ProcessSlicedLayersJob(Job):
     def abort(self):
         self._abort_requested = True
 
+    ##  Check if the processing of layers was aborted.
+    def isAborted(self):
+        return self._abort_requested
+
+    ##  Get the SliceTrace that the processing is recorded in, or None if it is not traced.
+    def getSliceTrace(self):
+        return self._slice_trace
+
     def run(self):
+        if self._slice_trace is None:
+            self._processLayers()
+            return
+
+        with self._slice_trace.phase("process_layers"):
+            self._processLayers()
+
+    def _processLayers(self):
         if Application.getInstance().getController().getActiveView().getPluginId() == "LayerView":
             self._progress = Message(catalog.i18nc("@info:status", "Processing Layers"), 0, False, -1)
             self._progress.show()
@@ -52,10 +71,9 @@ class ProcessSlicedLayersJob(Job):
         new_node = SceneNode()
 
         ## Remove old layer data (if any)
-        for node in DepthFirstIterator(self._scene.getRoot()):
-            if type(node) is SceneNode and node.getMeshData():
-                if node.callDecoration("getLayerData"):
-                    self._scene.getRoot().removeChild(node)
+        for node in SceneNodeRegistry.getInstance().getLayerDataNodes():
+            if node.getMeshData():
+                self._scene.getRoot().removeChild(node)
             Job.yieldThread()
             if self._abort_requested:
                 if self._progress:
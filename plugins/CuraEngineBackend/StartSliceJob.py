@@ -10,12 +10,13 @@ from UM.Application import Application
 from UM.Logger import Logger
 
 from UM.Scene.SceneNode import SceneNode
-from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
 
 from UM.Settings.Validator import ValidatorState
 
 from cura.OneAtATimeIterator import OneAtATimeIterator
 from cura.ExtruderManager import ExtruderManager
+from cura.SceneNodeRegistry import SceneNodeRegistry
+from cura.SliceTrace import SliceTrace
 
 class StartJobResult(IntEnum):
     Finished = 1
@@ -38,11 +39,18 @@ class GcodeStartEndFormatter(Formatter):
 
 ##  Job class that builds up the message of scene data to send to CuraEngine.
 class StartSliceJob(Job):
-    def __init__(self, slice_message):
+    ##  \param slice_message The message to fill with the scene data.
+    #   \param slice_trace Optional SliceTrace to record the phases of building the message in.
+    #   \param stack The global container stack to slice with, or None to slice with the active one. Only a slice with
+    #   the active stack removes the layer data of the previous slice from the scene.
+    def __init__(self, slice_message, slice_trace = None, stack = None):
         super().__init__()
 
         self._scene = Application.getInstance().getController().getScene()
         self._slice_message = slice_message
+        self._stack = stack
+        self._slice_trace = slice_trace if slice_trace is not None else SliceTrace(0)
+        self._message_size = 0 # Size of the vertices and setting values in the slice message, in bytes.
         self._is_cancelled = False
 
     def getSliceMessage(self):
@@ -64,95 +72,144 @@ class StartSliceJob(Job):
 
     ##  Runs the job that initiates the slicing.
     def run(self):
-        stack = Application.getInstance().getGlobalContainerStack()
+        stack = self._stack if self._stack is not None else Application.getInstance().getGlobalContainerStack()
         if not stack:
             self.setResult(StartJobResult.Error)
             return
 
+        with self._scene.getSceneLock():
+            with self._slice_trace.phase("validation"):
+                if self._hasSettingErrors(stack):
+                    self.setResult(StartJobResult.SettingError)
+                    return
+
+            with self._slice_trace.phase("collect_objects"):
+                object_groups = self._collectObjectGroups(stack)
+            if not object_groups:
+                self.setResult(StartJobResult.NothingToSlice)
+                return
+
+            with self._slice_trace.phase("settings"):
+                self._buildGlobalSettingsMessage(stack)
+
+                for extruder_stack in ExtruderManager.getInstance().getMachineExtruders(stack.getBottom().getId()):
+                    self._buildExtruderMessage(extruder_stack)
+
+            with self._slice_trace.phase("meshes"):
+                self._buildObjectsMessage(object_groups)
+
+        self._slice_trace.addMessage("cura.proto.Slice", self._message_size)
+        self.setResult(StartJobResult.Finished)
+
+    ##  Check the global stack and the per-object settings for errors.
+    #
+    #   This walks the nodes of the scene, so it must be called with the scene locked.
+    #
+    #   \return True if a setting has an error value, so slicing is impossible.
+    def _hasSettingErrors(self, stack):
         # Don't slice if there is a setting with an error value.
         if self._checkStackForErrors(stack):
-            self.setResult(StartJobResult.SettingError)
-            return
+            return True
 
         # Don't slice if there is a per object setting with an error value.
-        for node in DepthFirstIterator(self._scene.getRoot()):
-            if type(node) is not SceneNode or not node.isSelectable():
+        registry = SceneNodeRegistry.getInstance()
+        for node in registry.getPrintableNodes() + registry.getGroupNodes():
+            if not node.isSelectable():
                 continue
 
             if self._checkStackForErrors(node.callDecoration("getStack")):
-                self.setResult(StartJobResult.SettingError)
-                return
+                return True
+        return False
 
-        with self._scene.getSceneLock():
-            # Remove old layer data.
-            for node in DepthFirstIterator(self._scene.getRoot()):
-                if node.callDecoration("getLayerData"):
-                    node.getParent().removeChild(node)
-                    break
-
-            # Get the objects in their groups to print.
-            object_groups = []
-            if stack.getProperty("print_sequence", "value") == "one_at_a_time":
-                for node in OneAtATimeIterator(self._scene.getRoot()):
-                    temp_list = []
-
-                    # Node can't be printed, so don't bother sending it.
-                    if getattr(node, "_outside_buildarea", False):
-                        continue
-
-                    children = node.getAllChildren()
-                    children.append(node)
-                    for child_node in children:
-                        if type(child_node) is SceneNode and child_node.getMeshData() and child_node.getMeshData().getVertices() is not None:
-                            temp_list.append(child_node)
-
-                    if temp_list:
-                        object_groups.append(temp_list)
-                    Job.yieldThread()
-                if len(object_groups) == 0:
-                    Logger.log("w", "No objects suitable for one at a time found, or no correct order found")
-            else:
+    ##  Get the objects to print, in the groups in which they are sent to the engine.
+    #
+    #   When slicing with the active stack, this also removes the layer data of the previous slice. It must be called
+    #   with the scene locked.
+    #
+    #   \return List of lists of scene nodes.
+    def _collectObjectGroups(self, stack):
+        registry = SceneNodeRegistry.getInstance()
+
+        # Remove old layer data.
+        if self._stack is None:
+            for node in registry.getLayerDataNodes():
+                node.getParent().removeChild(node)
+
+        # Get the objects in their groups to print.
+        object_groups = []
+        if stack.getProperty("print_sequence", "value") == "one_at_a_time":
+            for node in OneAtATimeIterator(self._scene.getRoot()):
                 temp_list = []
-                for node in DepthFirstIterator(self._scene.getRoot()):
-                    if type(node) is SceneNode and node.getMeshData() and node.getMeshData().getVertices() is not None:
-                        if not getattr(node, "_outside_buildarea", False):
-                            temp_list.append(node)
-                    Job.yieldThread()
-
-                if temp_list:
-                    object_groups.append(temp_list)
-
-            if not object_groups:
-                self.setResult(StartJobResult.NothingToSlice)
-                return
-
-            self._buildGlobalSettingsMessage(stack)
-
-            for extruder_stack in ExtruderManager.getInstance().getMachineExtruders(stack.getBottom().getId()):
-                self._buildExtruderMessage(extruder_stack)
 
-            for group in object_groups:
-                group_message = self._slice_message.addRepeatedMessage("object_lists")
-                if group[0].getParent().callDecoration("isGroup"):
-                    self._handlePerObjectSettings(group[0].getParent(), group_message)
-                for object in group:
-                    mesh_data = object.getMeshData().getTransformed(object.getWorldTransformation())
+                # Node can't be printed, so don't bother sending it.
+                if getattr(node, "_outside_buildarea", False):
+                    continue
 
-                    obj = group_message.addRepeatedMessage("objects")
-                    obj.id = id(object)
-                    verts = numpy.array(mesh_data.getVertices())
+                children = node.getAllChildren()
+                children.append(node)
+                for child_node in children:
+                    if type(child_node) is SceneNode and child_node.getMeshData() and child_node.getMeshData().getVertices() is not None:
+                        temp_list.append(child_node)
 
-                    # Convert from Y up axes to Z up axes. Equals a 90 degree rotation.
-                    verts[:, [1, 2]] = verts[:, [2, 1]]
-                    verts[:, 1] *= -1
-
-                    obj.vertices = verts
+                if temp_list:
+                    object_groups.append(temp_list)
+                Job.yieldThread()
+            if len(object_groups) == 0:
+                Logger.log("w", "No objects suitable for one at a time found, or no correct order found")
+        else:
+            temp_list = []
+            for node in registry.getPrintableNodes():
+                if node.getMeshData().getVertices() is not None:
+                    if not getattr(node, "_outside_buildarea", False):
+                        temp_list.append(node)
+                Job.yieldThread()
 
-                    self._handlePerObjectSettings(object, obj)
+            if temp_list:
+                object_groups.append(temp_list)
 
-                    Job.yieldThread()
+        return object_groups
 
-        self.setResult(StartJobResult.Finished)
+    ##  Adds the transformed meshes of the objects to the slice message.
+    #
+    #   \param object_groups List of lists of scene nodes, as returned by _collectObjectGroups().
+    def _buildObjectsMessage(self, object_groups):
+        # Objects that share mesh data (copies of the same object) only differ in their transformation,
+        # so the untransformed vertices and indices are only fetched once per mesh.
+        mesh_arrays = {}
+        for group in object_groups:
+            group_message = self._slice_message.addRepeatedMessage("object_lists")
+            if group[0].getParent().callDecoration("isGroup"):
+                self._handlePerObjectSettings(group[0].getParent(), group_message)
+            for object in group:
+                mesh_data = object.getMeshData()
+                arrays = mesh_arrays.get(id(mesh_data))
+                if arrays is None:
+                    indices = mesh_data.getIndices()
+                    arrays = (numpy.asarray(mesh_data.getVertices(), dtype = numpy.float32), numpy.asarray(indices).reshape(-1) if indices is not None else None)
+                    mesh_arrays[id(mesh_data)] = arrays
+                vertices, indices = arrays
+
+                obj = group_message.addRepeatedMessage("objects")
+                obj.id = id(object)
+
+                transformation = object.getWorldTransformation().getData()
+                verts = numpy.dot(vertices, transformation[0:3, 0:3].T.astype(numpy.float32)) + transformation[0:3, 3].astype(numpy.float32)
+
+                # Convert from Y up axes to Z up axes. Equals a 90 degree rotation.
+                verts[:, [1, 2]] = verts[:, [2, 1]]
+                verts[:, 1] *= -1
+
+                # Only the vertices of an indexed mesh are transformed, after which they are expanded to the three
+                # vertices per triangle that the engine reads.
+                if indices is not None:
+                    verts = verts[indices]
+
+                obj.vertices = verts
+                self._message_size += verts.nbytes
+
+                self._handlePerObjectSettings(object, obj)
+
+                Job.yieldThread()
 
     def cancel(self):
         super().cancel()
@@ -177,6 +234,7 @@ class StartSliceJob(Job):
             setting = message.getMessage("settings").addRepeatedMessage("settings")
             setting.name = key
             setting.value = str(stack.getProperty(key, "value")).encode("utf-8")
+            self._message_size += len(setting.value)
             Job.yieldThread()
 
     ##  Sends all global settings to the engine.
@@ -200,6 +258,7 @@ class StartSliceJob(Job):
                 setting_message.value = self._expandGcodeTokens(key, value, settings)
             else:
                 setting_message.value = str(value).encode("utf-8")
+            self._message_size += len(setting_message.value)
 
     def _handlePerObjectSettings(self, node, message):
         stack = node.callDecoration("getStack")
@@ -208,4 +267,5 @@ class StartSliceJob(Job):
                 setting = message.addRepeatedMessage("settings")
                 setting.name = key
                 setting.value = str(stack.getProperty(key, "value")).encode("utf-8")
+                self._message_size += len(setting.value)
                 Job.yieldThread()
\ No newline at end of file
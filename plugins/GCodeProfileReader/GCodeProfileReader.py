@@ -1,6 +1,7 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Cura is released under the terms of the AGPLv3 or higher.
 
+import gzip
 import os
 import re #Regular expressions for parsing escape characters in the settings.
 
@@ -35,6 +36,9 @@ class GCodeProfileReader(ProfileReader):
         re.escape("\\r"): "\r"   #Carriage return. Windows users may need this for visualisation in their editors.
     }
 
+    ##  The number of bytes that are read at a time when reading a file backwards.
+    _block_size = 64 * 1024
+
     ##  Initialises the g-code reader as a profile reader.
     def __init__(self):
         super().__init__()
@@ -46,25 +50,24 @@ class GCodeProfileReader(ProfileReader):
     #   specified file was no g-code or contained no parsable profile, \code
     #   None \endcode is returned.
     def read(self, file_name):
-        if file_name.split(".")[-1] != "gcode":
+        if not file_name.endswith(".gcode") and not file_name.endswith(".gcode.gz"):
             return None
 
         prefix = ";SETTING_" + str(GCodeProfileReader.version) + " "
-        prefix_length = len(prefix)
 
-        # Loading all settings from the file.
-        # They are all at the end, but Python has no reverse seek any more since Python3.
-        # TODO: Consider moving settings to the start?
-        serialized = ""  # Will be filled with the serialized profile.
+        # Loading all settings from the file. They are all at the end, so only the end of the file is read.
         try:
-            with open(file_name) as f:
-                for line in f:
-                    if line.startswith(prefix):
-                        # Remove the prefix and the newline from the line and add it to the rest.
-                        serialized += line[prefix_length : -1]
+            if file_name.endswith(".gz"):
+                # Compressed g-code can only be decompressed from the start.
+                with gzip.open(file_name, "rb") as f:
+                    setting_lines = self._readSettingLinesForward(f, prefix.encode("utf-8"))
+            else:
+                with open(file_name, "rb") as f:
+                    setting_lines = self._readSettingLinesBackward(f, prefix.encode("utf-8"))
         except IOError as e:
             Logger.log("e", "Unable to open file %s for reading: %s", file_name, str(e))
             return None
+        serialized = b"".join(setting_lines).decode("utf-8", errors = "replace")
 
         # Un-escape the serialized profile.
         pattern = re.compile("|".join(GCodeProfileReader.escape_characters.keys()))
@@ -84,3 +87,60 @@ class GCodeProfileReader(ProfileReader):
         profile.addMetaDataEntry("type", "quality")
 
         return profile
+
+    ##  Reads the setting lines at the end of a g-code file, reading the file backwards in blocks.
+    #
+    #   Reading stops at the first line before the settings that is not a setting line, so only the settings and at
+    #   most one block before them are read.
+    #
+    #   \param f The file, opened in binary mode.
+    #   \param prefix The prefix of the setting lines, as bytes.
+    #   \return List of the contents of the setting lines, without prefix, in the order of the file.
+    def _readSettingLinesBackward(self, f, prefix):
+        setting_lines = []
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        partial_line = b"" # The start of the block read last, which may be the end of a line in the block before it.
+        while position > 0:
+            block_size = min(self._block_size, position)
+            position -= block_size
+            f.seek(position)
+            lines = (f.read(block_size) + partial_line).split(b"\n")
+            partial_line = lines[0]
+
+            # The first line is only complete at the start of the file.
+            complete_lines = lines[1:] if position > 0 else lines
+            for line in reversed(complete_lines):
+                line = line.rstrip(b"\r")
+                if not line:
+                    continue
+                if not line.startswith(prefix):
+                    setting_lines.reverse()
+                    return setting_lines
+                setting_lines.append(line[len(prefix):])
+
+        setting_lines.reverse()
+        return setting_lines
+
+    ##  Reads the setting lines at the end of a g-code file that can only be read from the start.
+    #
+    #   Only the last run of setting lines is kept while reading.
+    #
+    #   \param f The file, opened in binary mode.
+    #   \param prefix The prefix of the setting lines, as bytes.
+    #   \return List of the contents of the setting lines, without prefix, in the order of the file.
+    def _readSettingLinesForward(self, f, prefix):
+        setting_lines = []
+        previous_was_setting = False
+        for line in f:
+            line = line.rstrip(b"\r\n")
+            if not line:
+                continue
+            if line.startswith(prefix):
+                if not previous_was_setting:
+                    setting_lines = []
+                setting_lines.append(line[len(prefix):])
+                previous_was_setting = True
+            else:
+                previous_was_setting = False
+        return setting_lines
@@ -19,6 +19,10 @@ def getMetaData():
             {
                 "extension": "gcode",
                 "description": catalog.i18nc("@item:inlistbox", "G-code File")
+            },
+            {
+                "extension": "gcode.gz",
+                "description": catalog.i18nc("@item:inlistbox", "Compressed G-code File")
             }
         ]
     }
@@ -5,7 +5,12 @@ from UM.Mesh.MeshWriter import MeshWriter
 from UM.Logger import Logger
 from UM.Application import Application
 from UM.Settings.InstanceContainer import InstanceContainer #To create a complete setting profile to store in the g-code.
+from cura.GCodeSpool import GCodeSpool
+import itertools
+import queue
 import re #For escaping characters in the settings.
+import threading
+import zlib
 
 ##  Writes g-code to a file.
 #
@@ -36,25 +41,126 @@ class GCodeWriter(MeshWriter):
         re.escape("\r"): "\\r"    # Carriage return. Windows users may need this for visualisation in their editors.
     }
 
+    ##  The number of characters of g-code that are compressed at a time.
+    _compression_chunk_size = 1 << 20
+
+    ##  The maximum number of compressed chunks that wait to be written.
+    _compression_queue_size = 8
+
     def __init__(self):
         super().__init__()
 
+    ##  Writes the g-code of the scene to a stream.
+    #
+    #   In text mode, the g-code is written as text. In binary mode, the g-code is written as a gzip file, which is
+    #   the "Compressed GCode File" format.
     def write(self, stream, node, mode = MeshWriter.OutputMode.TextMode):
-        if mode != MeshWriter.OutputMode.TextMode:
-            Logger.log("e", "GCode Writer does not support non-text mode.")
+        scene = Application.getInstance().getController().getScene()
+        gcode_list = getattr(scene, "gcode_list")
+        if not gcode_list:
             return False
 
+        # Serialise the current container stack and put it at the end of the file.
+        settings = self._serialiseSettings(Application.getInstance().getGlobalContainerStack())
+
+        if mode == MeshWriter.OutputMode.BinaryMode:
+            return self._writeCompressed(stream, itertools.chain(self._iterBlocks(gcode_list), [settings.encode("utf-8")]))
+
+        # A GCodeSpool only reads one layer at a time.
+        for gcode in gcode_list:
+            stream.write(gcode)
+        stream.write(settings)
+        return True
+
+    ##  Get the g-code of the scene as a spool, for output devices that copy the spooled g-code to a file themselves
+    #   instead of writing it through this writer.
+    #
+    #   \param node The node to write, which is ignored like in write().
+    #   \param mode The output mode. Only text mode g-code is the same as the spooled g-code.
+    #   \return A tuple of the GCodeSpool and the settings to write after it as bytes, or None if the g-code can
+    #   only be written with write().
+    def getSpooledGCode(self, node, mode = MeshWriter.OutputMode.TextMode):
+        if mode != MeshWriter.OutputMode.TextMode:
+            return None
+
         scene = Application.getInstance().getController().getScene()
         gcode_list = getattr(scene, "gcode_list")
-        if gcode_list:
-            for gcode in gcode_list:
-                stream.write(gcode)
-            # Serialise the current container stack and put it at the end of the file.
-            settings = self._serialiseSettings(Application.getInstance().getGlobalContainerStack())
-            stream.write(settings)
-            return True
-
-        return False
+        if not isinstance(gcode_list, GCodeSpool) or not gcode_list:
+            return None
+
+        settings = self._serialiseSettings(Application.getInstance().getGlobalContainerStack())
+        return gcode_list, settings.encode("utf-8")
+
+    ##  Writes g-code to a binary stream as a gzip file.
+    #
+    #   The g-code is compressed in a background thread while the compressed data is written, so compressing the next
+    #   chunk overlaps with writing the previous one to slow media.
+    #
+    #   \param stream The binary stream to write to.
+    #   \param gcode Iterable of blocks of g-code, as bytes encoded as UTF-8.
+    #   \return True if all g-code was written.
+    def _writeCompressed(self, stream, gcode):
+        compressed_chunks = queue.Queue(maxsize = self._compression_queue_size)
+        stopped = threading.Event()
+
+        def compress():
+            try:
+                compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # Gzip header.
+                for chunk in gcode:
+                    compressed = compressor.compress(chunk)
+                    if compressed:
+                        self._putChunk(compressed_chunks, compressed, stopped)
+                    if stopped.is_set():
+                        return
+                self._putChunk(compressed_chunks, compressor.flush(), stopped)
+                self._putChunk(compressed_chunks, None, stopped)
+            except Exception as e:
+                self._putChunk(compressed_chunks, e, stopped)
+
+        compress_thread = threading.Thread(target = compress, daemon = True)
+        compress_thread.start()
+        try:
+            while True:
+                chunk = compressed_chunks.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    Logger.log("e", "Could not compress g-code: %s", str(chunk))
+                    return False
+                stream.write(chunk)
+        finally:
+            stopped.set()
+            compress_thread.join()
+        return True
+
+    ##  Get the g-code of the scene in blocks of about _compression_chunk_size bytes.
+    def _iterBlocks(self, gcode_list):
+        if isinstance(gcode_list, GCodeSpool):
+            return gcode_list.iterBlocks(self._compression_chunk_size)
+        return (chunk.encode("utf-8") for chunk in self._joinChunks(gcode_list))
+
+    ##  Joins small strings of g-code into chunks of about _compression_chunk_size characters.
+    def _joinChunks(self, gcode):
+        pending = []
+        pending_size = 0
+        for part in gcode:
+            pending.append(part)
+            pending_size += len(part)
+            if pending_size >= self._compression_chunk_size:
+                yield "".join(pending)
+                pending = []
+                pending_size = 0
+        if pending:
+            yield "".join(pending)
+
+    ##  Puts a chunk in the queue, unless writing is stopped while waiting for room in the queue.
+    def _putChunk(self, chunks, chunk, stopped):
+        while not stopped.is_set():
+            try:
+                chunks.put(chunk, timeout = 0.1)
+                return
+            except queue.Full:
+                pass
 
     ##  Serialises a container stack to prepare it for writing at the end of the
     #   g-code.
@@ -3,6 +3,7 @@
 
 from . import GCodeWriter
 
+from UM.MimeTypeDatabase import MimeType, MimeTypeDatabase
 from UM.i18n import i18nCatalog
 catalog = i18nCatalog("cura")
 
@@ -22,9 +23,20 @@ def getMetaData():
                 "description": catalog.i18nc("@item:inlistbox", "GCode File"),
                 "mime_type": "text/x-gcode",
                 "mode": GCodeWriter.GCodeWriter.OutputMode.TextMode
+            }, {
+                "extension": "gcode.gz",
+                "description": catalog.i18nc("@item:inlistbox", "Compressed GCode File"),
+                "mime_type": "application/x-gzipped-gcode",
+                "mode": GCodeWriter.GCodeWriter.OutputMode.BinaryMode
             }]
         }
     }
 
 def register(app):
+    mime_type = MimeType(
+        name = "application/x-gzipped-gcode",
+        comment = "Compressed GCode File",
+        suffixes = [ "gcode.gz" ]
+    )
+    MimeTypeDatabase.addMimeType(mime_type)
     return { "mesh_writer": GCodeWriter.GCodeWriter() }
@@ -1,13 +1,14 @@
 # Copyright (c) 2015 Ultimaker B.V.
 # Cura is released under the terms of the AGPLv3 or higher.
 
+import math
 import numpy
 
-from PyQt5.QtGui import QImage, qRed, qGreen, qBlue
+from PyQt5.QtGui import QImage
 from PyQt5.QtCore import Qt
 
 from UM.Mesh.MeshReader import MeshReader
-from UM.Mesh.MeshBuilder import MeshBuilder
+from UM.Mesh.MeshData import MeshData
 from UM.Scene.SceneNode import SceneNode
 from UM.Math.Vector import Vector
 from UM.Job import Job
@@ -16,6 +17,12 @@ from .ImageReaderUI import ImageReaderUI
 
 
 class ImageReader(MeshReader):
+    ##  The maximum number of pixels along a side of the image. Larger images are scaled down.
+    _max_size = 2048
+
+    ##  The number of rows of the height map that are turned into a mesh at a time.
+    _tile_rows = 128
+
     def __init__(self):
         super(ImageReader, self).__init__()
         self._supported_extensions = [".jpg", ".jpeg", ".bmp", ".gif", ".png"]
@@ -45,13 +52,11 @@ class ImageReader(MeshReader):
 
     def read(self, file_name):
         size = max(self._ui.getWidth(), self._ui.getDepth())
-        return self._generateSceneNode(file_name, size, self._ui.peak_height, self._ui.base_height, self._ui.smoothing, 512, self._ui.image_color_invert)
+        return self._generateSceneNode(file_name, size, self._ui.peak_height, self._ui.base_height, self._ui.smoothing, self._max_size, self._ui.image_color_invert)
 
     def _generateSceneNode(self, file_name, xz_size, peak_height, base_height, blur_iterations, max_size, image_color_invert):
         scene_node = SceneNode()
 
-        mesh = MeshBuilder()
-
         img = QImage(file_name)
 
         if img.isNull():
@@ -93,121 +98,180 @@ class ImageReader(MeshReader):
         texel_width = 1.0 / (width_minus_one) * scale_vector.x
         texel_height = 1.0 / (height_minus_one) * scale_vector.z
 
-        height_data = numpy.zeros((height, width), dtype=numpy.float32)
-
-        for x in range(0, width):
-            for y in range(0, height):
-                qrgb = img.pixel(x, y)
-                avg = float(qRed(qrgb) + qGreen(qrgb) + qBlue(qrgb)) / (3 * 255)
-                height_data[y, x] = avg
+        height_data = self._readHeightData(img, width, height)
 
         Job.yieldThread()
 
         if image_color_invert:
             height_data = 1 - height_data
 
-        for _ in range(0, blur_iterations):
-            copy = numpy.pad(height_data, ((1, 1), (1, 1)), mode= "edge")
-
-            height_data += copy[1:-1, 2:]
-            height_data += copy[1:-1, :-2]
-            height_data += copy[2:, 1:-1]
-            height_data += copy[:-2, 1:-1]
-
-            height_data += copy[2:, 2:]
-            height_data += copy[:-2, 2:]
-            height_data += copy[2:, :-2]
-            height_data += copy[:-2, :-2]
-
-            height_data /= 9
+        height_data = self._smooth(height_data, blur_iterations)
 
-            Job.yieldThread()
+        Job.yieldThread()
 
         height_data *= scale_vector.y
         height_data += base_height
 
-        heightmap_face_count = 2 * height_minus_one * width_minus_one
-        total_face_count = heightmap_face_count + (width_minus_one * 2) * (height_minus_one * 2) + 2
-
-        mesh.reserveFaceCount(total_face_count)
-
-        # initialize to texel space vertex offsets.
-        # 6 is for 6 vertices for each texel quad.
-        heightmap_vertices = numpy.zeros((width_minus_one * height_minus_one, 6, 3), dtype = numpy.float32)
-        heightmap_vertices = heightmap_vertices + numpy.array([[
-            [0, base_height, 0],
-            [0, base_height, texel_height],
-            [texel_width, base_height, texel_height],
-            [texel_width, base_height, texel_height],
-            [texel_width, base_height, 0],
-            [0, base_height, 0]
-        ]], dtype = numpy.float32)
-
-        offsetsz, offsetsx = numpy.mgrid[0: height_minus_one, 0: width - 1]
-        offsetsx = numpy.array(offsetsx, numpy.float32).reshape(-1, 1) * texel_width
-        offsetsz = numpy.array(offsetsz, numpy.float32).reshape(-1, 1) * texel_height
-
-        # offsets for each texel quad
-        heightmap_vertex_offsets = numpy.concatenate([offsetsx, numpy.zeros((offsetsx.shape[0], offsetsx.shape[1]), dtype=numpy.float32), offsetsz], 1)
-        heightmap_vertices += heightmap_vertex_offsets.repeat(6, 0).reshape(-1, 6, 3)
-
-        # apply height data to y values
-        heightmap_vertices[:, 0, 1] = heightmap_vertices[:, 5, 1] = height_data[:-1, :-1].reshape(-1)
-        heightmap_vertices[:, 1, 1] = height_data[1:, :-1].reshape(-1)
-        heightmap_vertices[:, 2, 1] = heightmap_vertices[:, 3, 1] = height_data[1:, 1:].reshape(-1)
-        heightmap_vertices[:, 4, 1] = height_data[:-1, 1:].reshape(-1)
-
-        heightmap_indices = numpy.array(numpy.mgrid[0:heightmap_face_count * 3], dtype=numpy.int32).reshape(-1, 3)
-
-        mesh._vertices[0:(heightmap_vertices.size // 3), :] = heightmap_vertices.reshape(-1, 3)
-        mesh._indices[0:(heightmap_indices.size // 3), :] = heightmap_indices
-
-        mesh._vertex_count = heightmap_vertices.size // 3
-        mesh._face_count = heightmap_indices.size // 3
-
         geo_width = width_minus_one * texel_width
         geo_height = height_minus_one * texel_height
 
+        # The height map is a grid of vertices that are shared by the triangles around them.
+        grid_vertices, grid_normals, grid_indices = self._createGrid(height_data, texel_width, texel_height)
+
         # bottom
-        mesh.addFaceByPoints(0, 0, 0, 0, 0, geo_height, geo_width, 0, geo_height)
-        mesh.addFaceByPoints(geo_width, 0, geo_height, geo_width, 0, 0, 0, 0, 0)
+        bottom_vertices = numpy.array([
+            [0, 0, 0], [0, 0, geo_height], [geo_width, 0, geo_height],
+            [geo_width, 0, geo_height], [geo_width, 0, 0], [0, 0, 0]
+        ], dtype = numpy.float32)
 
         # north and south walls
-        for n in range(0, width_minus_one):
-            x = n * texel_width
-            nx = (n + 1) * texel_width
-
-            hn0 = height_data[0, n]
-            hn1 = height_data[0, n + 1]
-
-            hs0 = height_data[height_minus_one, n]
-            hs1 = height_data[height_minus_one, n + 1]
-
-            mesh.addFaceByPoints(x, 0, 0, nx, 0, 0, nx, hn1, 0)
-            mesh.addFaceByPoints(nx, hn1, 0, x, hn0, 0, x, 0, 0)
-
-            mesh.addFaceByPoints(x, 0, geo_height, nx, 0, geo_height, nx, hs1, geo_height)
-            mesh.addFaceByPoints(nx, hs1, geo_height, x, hs0, geo_height, x, 0, geo_height)
+        x = numpy.arange(width, dtype = numpy.float32) * texel_width
+        north_vertices = self._createWall(x, numpy.zeros(width, dtype = numpy.float32), height_data[0, :])
+        south_vertices = self._createWall(x, numpy.full(width, geo_height, dtype = numpy.float32), height_data[height_minus_one, :])
 
         # west and east walls
-        for n in range(0, height_minus_one):
-            y = n * texel_height
-            ny = (n + 1) * texel_height
+        z = numpy.arange(height, dtype = numpy.float32) * texel_height
+        west_vertices = self._createWall(numpy.zeros(height, dtype = numpy.float32), z, height_data[:, 0])
+        east_vertices = self._createWall(numpy.full(height, geo_width, dtype = numpy.float32), z, height_data[:, width_minus_one])
 
-            hw0 = height_data[n, 0]
-            hw1 = height_data[n + 1, 0]
+        # The bottom and the walls are flat, so they do not share their vertices with each other or the height map.
+        side_vertices = [bottom_vertices, north_vertices, south_vertices, west_vertices, east_vertices]
+        side_normals = [[0, -1, 0], [0, 0, -1], [0, 0, 1], [-1, 0, 0], [1, 0, 0]]
 
-            he0 = height_data[n, width_minus_one]
-            he1 = height_data[n + 1, width_minus_one]
+        vertices = numpy.concatenate([grid_vertices] + side_vertices)
+        normals = numpy.concatenate([grid_normals] + [numpy.tile(numpy.array(normal, dtype = numpy.float32), (len(side), 1)) for side, normal in zip(side_vertices, side_normals)])
+        side_indices = numpy.arange(len(grid_vertices), len(vertices), dtype = numpy.int32).reshape(-1, 3)
+        indices = numpy.concatenate((grid_indices, side_indices))
 
-            mesh.addFaceByPoints(0, 0, y, 0, 0, ny, 0, hw1, ny)
-            mesh.addFaceByPoints(0, hw1, ny, 0, hw0, y, 0, 0, y)
+        scene_node.setMeshData(MeshData(vertices = vertices, normals = normals, indices = indices))
 
-            mesh.addFaceByPoints(geo_width, 0, y, geo_width, 0, ny, geo_width, he1, ny)
-            mesh.addFaceByPoints(geo_width, he1, ny, geo_width, he0, y, geo_width, 0, y)
+        return scene_node
 
-        mesh.calculateNormals(fast=True)
+    ##  Read the brightness of every pixel of an image.
+    #
+    #   \return An array of the brightness of the pixels, from 0 to 1, with a row for every line of the image.
+    def _readHeightData(self, img, width, height):
+        img = img.convertToFormat(QImage.Format_RGB32)
+
+        # Every pixel is a 32 bit 0xffRRGGBB value. Lines may be padded, so only take the first pixels of each line.
+        bits = img.constBits()
+        bits.setsize(img.byteCount())
+        pixels = numpy.frombuffer(bits, dtype = numpy.uint32).reshape(height, img.bytesPerLine() // 4)[:, :width]
+
+        red = (pixels >> 16) & 0xff
+        green = (pixels >> 8) & 0xff
+        blue = pixels & 0xff
+        return (red + green + blue).astype(numpy.float32) / (3 * 255)
+
+    ##  Smooth the height data.
+    #
+    #   A 3x3 box filter is the same as a box filter of width 3 along each axis. Applying it more than three times is
+    #   approximated by three passes of a wider box filter along each axis. The box filters are computed with running
+    #   sums, so this takes the same time for any amount of smoothing.
+    #
+    #   \param height_data The array of heights.
+    #   \param blur_iterations The number of times the 3x3 box filter would be applied.
+    def _smooth(self, height_data, blur_iterations):
+        if blur_iterations <= 0:
+            return height_data
+
+        passes = min(blur_iterations, 3)
+        radius = 1
+        if blur_iterations > 3:
+            # Every 3x3 box blur adds a variance of 2/3 along each axis. A box filter of width w has a variance of
+            # (w^2 - 1) / 12, so three passes with width sqrt(8 / 3 * iterations + 1) give the same total variance.
+            box_width = math.sqrt(8 / 3 * blur_iterations + 1)
+            radius = max(int(round((box_width - 1) / 2)), 1)
+
+        for _ in range(passes):
+            for axis in (0, 1):
+                height_data = self._boxFilter(height_data, radius, axis)
+
+        return height_data
+
+    ##  Average every value with the values within a radius along an axis, repeating the values at the edges.
+    def _boxFilter(self, data, radius, axis):
+        pad_width = [(0, 0), (0, 0)]
+        pad_width[axis] = (radius + 1, radius)
+        padded = numpy.pad(data, pad_width, mode = "edge").astype(numpy.float64)
+
+        sums = numpy.cumsum(padded, axis = axis)
+        window = 2 * radius + 1
+        if axis == 0:
+            result = sums[window:] - sums[:-window]
+        else:
+            result = sums[:, window:] - sums[:, :-window]
+        return (result / window).astype(numpy.float32)
+
+    ##  Create the indexed grid mesh of a height map.
+    #
+    #   The grid is created a few rows at a time, so no large temporary arrays are needed besides the result.
+    #
+    #   \param height_data The array of heights, with a row for every line of the image.
+    #   \param texel_width The distance between two columns of the grid.
+    #   \param texel_height The distance between two rows of the grid.
+    #   \return A tuple with the arrays of vertices, normals and triangle indices.
+    def _createGrid(self, height_data, texel_width, texel_height):
+        height, width = height_data.shape
+
+        vertices = numpy.empty((height * width, 3), dtype = numpy.float32)
+        normals = numpy.empty((height * width, 3), dtype = numpy.float32)
+        indices = numpy.empty(((height - 1) * (width - 1) * 2, 3), dtype = numpy.int32)
+
+        x = numpy.arange(width, dtype = numpy.float32) * texel_width
+        for start in range(0, height, self._tile_rows):
+            end = min(start + self._tile_rows, height)
+            tile = slice(start * width, end * width)
+            rows = end - start
+
+            vertices[tile, 0] = numpy.tile(x, rows)
+            vertices[tile, 1] = height_data[start:end].reshape(-1)
+            vertices[tile, 2] = numpy.repeat(numpy.arange(start, end, dtype = numpy.float32) * texel_height, width)
+
+            # The normal of a height map y = h(x, z) is (-dh/dx, 1, -dh/dz). Include a row on either side of the
+            # tile, so the slopes at the edges of the tile are the same as when computed for the whole grid at once.
+            context_start = max(start - 1, 0)
+            context = height_data[context_start:min(end + 1, height)]
+            slope_z, slope_x = numpy.gradient(context, texel_height, texel_width)
+            slope_x = slope_x[start - context_start:start - context_start + rows]
+            slope_z = slope_z[start - context_start:start - context_start + rows]
+            length = numpy.sqrt(slope_x * slope_x + slope_z * slope_z + 1)
+            normals[tile, 0] = (-slope_x / length).reshape(-1)
+            normals[tile, 1] = (1 / length).reshape(-1)
+            normals[tile, 2] = (-slope_z / length).reshape(-1)
+
+            # Two triangles for every quad between this row and the next one.
+            quad_end = min(end, height - 1)
+            if quad_end > start:
+                corner = (numpy.arange(start, quad_end, dtype = numpy.int32)[:, numpy.newaxis] * width + numpy.arange(width - 1, dtype = numpy.int32)).reshape(-1)
+                quads = slice(start * (width - 1) * 2, quad_end * (width - 1) * 2)
+                quad_indices = indices[quads].reshape(-1, 2, 3)
+                quad_indices[:, 0, 0] = corner
+                quad_indices[:, 0, 1] = corner + width
+                quad_indices[:, 0, 2] = corner + width + 1
+                quad_indices[:, 1, 0] = corner + width + 1
+                quad_indices[:, 1, 1] = corner + 1
+                quad_indices[:, 1, 2] = corner
 
-        scene_node.setMeshData(mesh.build())
+            Job.yieldThread()
 
-        return scene_node
+        return vertices, normals, indices
+
+    ##  Create the triangles of a wall along an edge of the height map.
+    #
+    #   \param x The x coordinates of the points along the edge.
+    #   \param z The z coordinates of the points along the edge.
+    #   \param heights The height of the height map at every point.
+    #   \return An array of vertices, three per triangle, with two triangles between every two points.
+    def _createWall(self, x, z, heights):
+        bottom = numpy.stack((x, numpy.zeros(len(x), dtype = numpy.float32), z), axis = 1)
+        top = numpy.stack((x, heights, z), axis = 1)
+
+        vertices = numpy.empty((len(x) - 1, 6, 3), dtype = numpy.float32)
+        vertices[:, 0] = bottom[:-1]
+        vertices[:, 1] = bottom[1:]
+        vertices[:, 2] = top[1:]
+        vertices[:, 3] = top[1:]
+        vertices[:, 4] = top[:-1]
+        vertices[:, 5] = bottom[:-1]
+        return vertices.reshape(-1, 3)
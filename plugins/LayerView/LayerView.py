@@ -15,7 +15,9 @@ from UM.Preferences import Preferences
 from UM.View.RenderBatch import RenderBatch
 from UM.View.GL.OpenGL import OpenGL
 
-from cura.ConvexHullNode import ConvexHullNode
+from cura.ConvexHullShadow import ConvexHullShadow
+from cura.SceneNodeRegistry import SceneNodeRegistry
+from cura.MeshDecimator import MeshDecimator
 
 from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QApplication
@@ -89,15 +91,16 @@ class LayerView(View):
             self._selection_shader.setUniformValue("u_color", Color(32, 32, 32, 128))
 
         for node in DepthFirstIterator(scene.getRoot()):
-            # We do not want to render ConvexHullNode as it conflicts with the bottom layers.
-            # However, it is somewhat relevant when the node is selected, so do render it then.
-            if type(node) is ConvexHullNode and not Selection.isSelected(node.getWatchedNode()):
+            # We do not want to render the convex hull shadows as they conflict with the bottom layers.
+            # However, they are somewhat relevant when the node is selected, so do render those.
+            if type(node) is ConvexHullShadow:
+                node.renderWatchedNodes(renderer, Selection.getAllSelectedObjects())
                 continue
 
             if not node.render(renderer):
                 if node.getMeshData() and node.isVisible():
                     if Selection.isSelected(node):
-                        renderer.queueNode(node, transparent = True, shader = self._selection_shader)
+                        renderer.queueNode(node, transparent = True, shader = self._selection_shader, mesh = MeshDecimator.getDisplayMesh(node))
                     layer_data = node.callDecoration("getLayerData")
                     if not layer_data:
                         continue
@@ -138,14 +141,13 @@ class LayerView(View):
     currentLayerNumChanged = Signal()
 
     def calculateMaxLayers(self):
-        scene = self.getController().getScene()
         renderer = self.getRenderer() # TODO: @UnusedVariable
         self._activity = True
 
         self._old_max_layers = self._max_layers
         ## Recalculate num max layers
         new_max_layers = 0
-        for node in DepthFirstIterator(scene.getRoot()):
+        for node in SceneNodeRegistry.getInstance().getLayerDataNodes():
             layer_data = node.callDecoration("getLayerData")
             if not layer_data:
                 continue
@@ -232,10 +234,9 @@ class _CreateTopLayersJob(Job):
 
     def run(self):
         layer_data = None
-        for node in DepthFirstIterator(self._scene.getRoot()):
+        node = SceneNodeRegistry.getInstance().getLayerDataNode()
+        if node:
             layer_data = node.callDecoration("getLayerData")
-            if layer_data:
-                break
 
         if self._cancel or not layer_data:
             return
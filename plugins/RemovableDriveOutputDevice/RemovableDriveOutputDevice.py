@@ -9,6 +9,8 @@ from UM.Scene.Iterator.BreadthFirstIterator import BreadthFirstIterator
 from UM.OutputDevice.OutputDevice import OutputDevice
 from UM.OutputDevice import OutputDeviceError
 
+from . import SpoolCopyJob
+
 from UM.i18n import i18nCatalog
 catalog = i18nCatalog("cura")
 
@@ -47,6 +49,7 @@ class RemovableDriveOutputDevice(OutputDevice):
         # Just take the first file format available.
         writer = Application.getInstance().getMeshFileHandler().getWriterByMimeType(file_formats[0]["mime_type"])
         extension = file_formats[0]["extension"]
+        mode = file_formats[0].get("mode", MeshWriter.OutputMode.TextMode)
 
         if file_name is None:
             for n in BreadthFirstIterator(node):
@@ -65,9 +68,17 @@ class RemovableDriveOutputDevice(OutputDevice):
 
         try:
             Logger.log("d", "Writing to %s", file_name)
-            stream = open(file_name, "wt")
-            job = WriteMeshJob(writer, stream, node, MeshWriter.OutputMode.TextMode)
-            job.setFileName(file_name)
+            # Writers that keep their output in a spool let the spool be copied to the drive directly.
+            spooled = writer.getSpooledGCode(node, mode) if hasattr(writer, "getSpooledGCode") else None
+            if spooled:
+                job = SpoolCopyJob.SpoolCopyJob(spooled[0], spooled[1], file_name)
+            else:
+                if mode == MeshWriter.OutputMode.BinaryMode:
+                    stream = open(file_name, "wb")
+                else:
+                    stream = open(file_name, "wt", newline = "\n") # Write the same line endings as the spooled copy.
+                job = WriteMeshJob(writer, stream, node, mode)
+                job.setFileName(file_name)
             job.progress.connect(self._onProgress)
             job.finished.connect(self._onFinished)
 
@@ -108,7 +119,8 @@ class RemovableDriveOutputDevice(OutputDevice):
             message = Message(catalog.i18nc("@info:status", "Could not save to removable drive {0}: {1}").format(self.getName(), str(job.getError())))
             message.show()
             self.writeError.emit(self)
-        job.getStream().close()
+        if job.getStream():
+            job.getStream().close()
 
     def _onActionTriggered(self, message, action):
         if action == "eject":
@@ -0,0 +1,55 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import os
+
+from UM.Job import Job
+from UM.Logger import Logger
+
+##  Copies spooled g-code to a file on a removable drive.
+#
+#   The g-code is copied from the temporary file of the GCodeSpool by the operating system where possible, so it does
+#   not pass through Python and the copy does not hold the interpreter lock. Every drive gets its own job, so saving to
+#   several drives copies from the same spool at the same time. The file is synced at the end, so the g-code is on the
+#   drive when saving is reported as done.
+class SpoolCopyJob(Job):
+    ##  \param spool The GCodeSpool to copy.
+    #   \param footer Bytes to write after the g-code, like the serialised settings.
+    #   \param file_name The name of the file to write.
+    def __init__(self, spool, footer, file_name):
+        super().__init__()
+        self._spool = spool
+        self._footer = footer
+        self._file_name = file_name
+        self._progress = -1
+
+    def getFileName(self):
+        return self._file_name
+
+    ##  There is no stream to close, since the file is only opened while copying.
+    def getStream(self):
+        return None
+
+    def run(self):
+        try:
+            fd = os.open(self._file_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0))
+            try:
+                self._spool.copyTo(fd, self._onCopyProgress)
+                view = memoryview(self._footer)
+                while view:
+                    view = view[os.write(fd, view):]
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            Logger.log("e", "Could not copy g-code to %s: %s", self._file_name, str(e))
+            self.setError(e)
+            self.setResult(False)
+            return
+        self.setResult(True)
+
+    def _onCopyProgress(self, copied, total):
+        progress = int(100 * copied / total) if total else 100
+        if progress != self._progress:
+            self._progress = progress
+            self.progress.emit(self, progress)
@@ -4,12 +4,12 @@
 from UM.Extension import Extension
 from UM.Application import Application
 from UM.Preferences import Preferences
-from UM.Scene.Iterator.DepthFirstIterator import DepthFirstIterator
-from UM.Scene.SceneNode import SceneNode
 from UM.Message import Message
 from UM.i18n import i18nCatalog
 from UM.Logger import Logger
 
+from cura.SceneNodeRegistry import SceneNodeRegistry
+
 import collections
 import json
 import os.path
@@ -61,8 +61,8 @@ class SliceInfo(Extension):
 
             # Get model information (bounding boxes, hashes and transformation matrix)
             models_info = []
-            for node in DepthFirstIterator(Application.getInstance().getController().getScene().getRoot()):
-                if type(node) is SceneNode and node.getMeshData() and node.getMeshData().getVertices() is not None:
+            for node in SceneNodeRegistry.getInstance().getPrintableNodes():
+                if node.getMeshData().getVertices() is not None:
                     if not getattr(node, "_outside_buildarea", False):
                         model_info = {}
                         model_info["hash"] = node.getMeshData().getHash()
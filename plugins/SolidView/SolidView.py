@@ -11,6 +11,7 @@ from UM.View.Renderer import Renderer
 from UM.View.GL.OpenGL import OpenGL
 
 from cura.ExtrudersModel import ExtrudersModel
+from cura.MeshDecimator import MeshDecimator
 
 import math
 
@@ -76,13 +77,14 @@ class SolidView(View):
                         except ValueError:
                             pass
 
+                    display_mesh = MeshDecimator.getDisplayMesh(node)
                     if hasattr(node, "_outside_buildarea"):
                         if node._outside_buildarea:
-                            renderer.queueNode(node, shader = self._disabled_shader)
+                            renderer.queueNode(node, mesh = display_mesh, shader = self._disabled_shader)
                         else:
-                            renderer.queueNode(node, shader = self._enabled_shader, uniforms = uniforms)
+                            renderer.queueNode(node, mesh = display_mesh, shader = self._enabled_shader, uniforms = uniforms)
                     else:
-                        renderer.queueNode(node, material = self._enabled_shader, uniforms = uniforms)
+                        renderer.queueNode(node, mesh = display_mesh, material = self._enabled_shader, uniforms = uniforms)
                 if node.callDecoration("isGroup"):
                     renderer.queueNode(scene.getRoot(), mesh = node.getBoundingBoxMesh(), mode = Renderer.RenderLines)
 
@@ -8,12 +8,14 @@ import time
 import queue
 import re
 import functools
+import itertools
 import os.path
 
 from UM.Application import Application
 from UM.Logger import Logger
 from UM.PluginRegistry import PluginRegistry
 from cura.PrinterOutputDevice import PrinterOutputDevice, ConnectionState
+from cura.GCodeSpool import GCodeSpool
 
 from PyQt5.QtQml import QQmlComponent, QQmlContext
 from PyQt5.QtCore import QUrl, pyqtSlot, pyqtSignal
@@ -23,6 +25,9 @@ catalog = i18nCatalog("cura")
 
 
 class USBPrinterOutputDevice(PrinterOutputDevice):
+    ##  The minimum number of lines that were sent last which can be sent again when the printer asks for it.
+    _gcode_window_size = 1000
+
     def __init__(self, serial_port):
         super().__init__(serial_port)
         self.setName(catalog.i18nc("@item:inmenu", "USB printing"))
@@ -67,8 +72,12 @@ class USBPrinterOutputDevice(PrinterOutputDevice):
         ## Keep track where in the provided g-code the print is
         self._gcode_position = 0
 
-        # List of gcode lines to be printed
-        self._gcode = []
+        # The lines of the g-code to be printed are read from an iterator while printing. Only the lines that were
+        # read last are kept in a window, so they can be sent again when the printer asks for it.
+        self._gcode_lines = iter([])
+        self._gcode_line_count = 0
+        self._gcode_window = []
+        self._gcode_window_start = 0 # The position of the first line in the window.
 
         # Check if endstops are ever pressed (used for first run)
         self._x_min_endstop_pressed = False
@@ -135,7 +144,7 @@ class USBPrinterOutputDevice(PrinterOutputDevice):
         self._sendCommand("G90")
 
     ##  Start a print based on a g-code.
-    #   \param gcode_list List with gcode (strings).
+    #   \param gcode_list GCodeSpool or list with gcode (strings).
     def printGCode(self, gcode_list):
         if self._progress or self._connection_state != ConnectionState.connected:
             self._error_message = Message(i18n_catalog.i18nc("@info:status", "Printer is busy or not connected. Unable to start a new job."))
@@ -144,12 +153,18 @@ class USBPrinterOutputDevice(PrinterOutputDevice):
             self.writeError.emit(self)
             return
 
-        self._gcode.clear()
-        for layer in gcode_list:
-            self._gcode.extend(layer.split("\n"))
+        if isinstance(gcode_list, GCodeSpool):
+            lines = gcode_list.iterLines()
+            line_count = gcode_list.getLineCount()
+        else:
+            lines = [line for layer in gcode_list for line in layer.split("\n")]
+            line_count = len(lines)
 
         # Reset line number. If this is not done, first line is sometimes ignored
-        self._gcode.insert(0, "M110")
+        self._gcode_lines = itertools.chain(["M110"], lines)
+        self._gcode_line_count = line_count + 1
+        self._gcode_window = []
+        self._gcode_window_start = 0
         self._gcode_position = 0
         self._print_start_time_100 = None
         self._is_printing = True
@@ -459,11 +474,13 @@ class USBPrinterOutputDevice(PrinterOutputDevice):
 
     ##  Send next Gcode in the gcode list
     def _sendNextGcodeLine(self):
-        if self._gcode_position >= len(self._gcode):
+        if self._gcode_position >= self._gcode_line_count:
+            return
+        line = self._getGCodeLine(self._gcode_position)
+        if line is None:
             return
         if self._gcode_position == 100:
             self._print_start_time_100 = time.time()
-        line = self._gcode[self._gcode_position]
 
         if ";" in line:
             line = line[:line.find(";")]
@@ -482,9 +499,28 @@ class USBPrinterOutputDevice(PrinterOutputDevice):
 
         self._sendCommand("N%d%s*%d" % (self._gcode_position, line, checksum))
         self._gcode_position += 1
-        self.setProgress((self._gcode_position / len(self._gcode)) * 100)
+        self.setProgress((self._gcode_position / self._gcode_line_count) * 100)
         self.progressChanged.emit()
 
+    ##  Get a line of the g-code that is being printed, reading further lines if needed.
+    #
+    #   \param position The number of the line.
+    #   \return The line, or None if the line is not in the g-code or no longer in the window.
+    def _getGCodeLine(self, position):
+        while position >= self._gcode_window_start + len(self._gcode_window):
+            line = next(self._gcode_lines, None)
+            if line is None:
+                return None
+            self._gcode_window.append(line)
+            if len(self._gcode_window) >= 2 * self._gcode_window_size:
+                del self._gcode_window[:self._gcode_window_size]
+                self._gcode_window_start += self._gcode_window_size
+
+        if position < self._gcode_window_start:
+            Logger.log("e", "Line %s of the g-code can not be sent again, it is too long ago", position)
+            return None
+        return self._gcode_window[position - self._gcode_window_start]
+
     ##  Set the state of the print.
     #   Sent from the print monitor
     def _setJobState(self, job_state):
@@ -507,7 +543,10 @@ class USBPrinterOutputDevice(PrinterOutputDevice):
     def cancelPrint(self):
         self._gcode_position = 0
         self.setProgress(0)
-        self._gcode = []
+        self._gcode_lines = iter([])
+        self._gcode_line_count = 0
+        self._gcode_window = []
+        self._gcode_window_start = 0
 
         # Turn off temperatures, fan and steppers
         self._sendCommand("M140 S0")
@@ -31,6 +31,7 @@ Item
     property alias reloadAll: reloadAllAction;
     property alias resetAllTranslation: resetAllTranslationAction;
     property alias resetAll: resetAllAction;
+    property alias arrangeAll: arrangeAllAction;
 
     property alias addMachine: addMachineAction;
     property alias configureMachines: settingsAction;
@@ -42,6 +43,7 @@ Item
     property alias preferences: preferencesAction;
 
     property alias showEngineLog: showEngineLogAction;
+    property alias showSliceTrace: showSliceTraceAction;
     property alias documentation: documentationAction;
     property alias reportBug: reportBugAction;
     property alias about: aboutAction;
@@ -246,6 +248,15 @@ Item
         onTriggered: Printer.resetAllTranslation();
     }
 
+    Action
+    {
+        id: arrangeAllAction;
+        text: catalog.i18nc("@action:inmenu menubar:edit","&Arrange All Objects");
+        enabled: UM.Controller.toolsEnabled;
+        shortcut: "Ctrl+R";
+        onTriggered: Printer.arrangeAll();
+    }
+
     Action
     {
         id: resetAllAction;
@@ -269,6 +280,12 @@ Item
         shortcut: StandardKey.WhatsThis;
     }
 
+    Action
+    {
+        id: showSliceTraceAction;
+        text: catalog.i18nc("@action:inmenu menubar:help","Show Slice &Timings...");
+    }
+
     Action
     {
         id: configureSettingVisibilityAction
@@ -140,6 +140,7 @@ UM.MainWindow
                 MenuItem { action: Cura.Actions.deleteAll; }
                 MenuItem { action: Cura.Actions.resetAllTranslation; }
                 MenuItem { action: Cura.Actions.resetAll; }
+                MenuItem { action: Cura.Actions.arrangeAll; }
                 MenuSeparator { }
                 MenuItem { action: Cura.Actions.groupObjects;}
                 MenuItem { action: Cura.Actions.mergeObjects;}
@@ -358,6 +359,7 @@ UM.MainWindow
                 title: catalog.i18nc("@title:menu menubar:toplevel","&Help");
 
                 MenuItem { action: Cura.Actions.showEngineLog; }
+                MenuItem { action: Cura.Actions.showSliceTrace; }
                 MenuItem { action: Cura.Actions.documentation; }
                 MenuItem { action: Cura.Actions.reportBug; }
                 MenuSeparator { }
@@ -683,6 +685,7 @@ UM.MainWindow
         MenuItem { action: Cura.Actions.reloadAll; }
         MenuItem { action: Cura.Actions.resetAllTranslation; }
         MenuItem { action: Cura.Actions.resetAll; }
+        MenuItem { action: Cura.Actions.arrangeAll; }
         MenuSeparator { }
         MenuItem { action: Cura.Actions.groupObjects; }
         MenuItem { action: Cura.Actions.mergeObjects; }
@@ -735,6 +738,7 @@ UM.MainWindow
         MenuItem { action: Cura.Actions.reloadAll; }
         MenuItem { action: Cura.Actions.resetAllTranslation; }
         MenuItem { action: Cura.Actions.resetAll; }
+        MenuItem { action: Cura.Actions.arrangeAll; }
         MenuSeparator { }
         MenuItem { action: Cura.Actions.groupObjects; }
         MenuItem { action: Cura.Actions.mergeObjects; }
@@ -810,6 +814,17 @@ UM.MainWindow
         onTriggered: engineLog.visible = true;
     }
 
+    SliceTrace
+    {
+        id: sliceTrace;
+    }
+
+    Connections
+    {
+        target: Cura.Actions.showSliceTrace
+        onTriggered: sliceTrace.visible = true;
+    }
+
     AddMachineDialog
     {
         id: addMachineDialog
@@ -0,0 +1,42 @@
+import numpy
+
+from cura.Arrange import Arrange
+from cura.PolygonCollision import PolygonCollision
+
+def square(x, y, size = 20.0):
+    return numpy.array([[x, y], [x, y + size], [x + size, y + size], [x + size, y]], numpy.float64)
+
+def test_placeCentre():
+    arrange = Arrange((-100, -100), (100, 100))
+
+    translation = arrange.place(square(50, 50))
+    assert numpy.allclose(square(50, 50) + translation, square(-10, -10))
+
+def test_placeWithoutOverlap():
+    arrange = Arrange((-100, -100), (100, 100))
+    arrange.addArea(numpy.array([[-100, -100], [-100, 100], [-80, 100], [-80, -100]]))
+
+    placed = []
+    for _ in range(20):
+        translation = arrange.place(square(0, 0))
+        assert translation is not None
+        placed.append(square(0, 0) + translation)
+
+    assert not PolygonCollision(placed).intersectAll().any()
+    for points in placed:
+        assert numpy.min(points[:, 0]) >= -80
+        assert numpy.max(numpy.abs(points)) <= 100
+
+def test_placeFull():
+    arrange = Arrange((-10, -10), (10, 10))
+    assert arrange.place(square(0, 0, 15)) is not None
+    assert arrange.place(square(0, 0, 15)) is None
+    assert arrange.place(square(0, 0, 30)) is None
+
+def test_isAreaFree():
+    arrange = Arrange((-100, -100), (100, 100))
+    arrange.addArea(numpy.array([[-100, -100], [-100, 100], [-80, 100], [-80, -100]]))
+
+    assert arrange.isAreaFree(square(0, 0))
+    assert not arrange.isAreaFree(square(-90, 0))
+    assert not arrange.isAreaFree(square(90, 0)) # Not on the build plate.
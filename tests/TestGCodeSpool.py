@@ -0,0 +1,55 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from cura.GCodeSpool import GCodeSpool
+
+import os
+
+def createSpool():
+    spool = GCodeSpool()
+    spool.append(b";LAYER:0\nG1 X1\n")
+    spool.append(";LAYER:1\nG1 X2 ; é\n")
+    spool.append(b";LAYER:2\nG1 X3")
+    spool.setPrefix(";FLAVOR:Marlin\n") # The engine sends the prefix last.
+    return spool
+
+def test_layers():
+    spool = createSpool()
+
+    assert spool.getLayerCount() == 3
+    assert spool.getLayer(1) == ";LAYER:1\nG1 X2 ; é\n"
+    assert list(spool) == [";FLAVOR:Marlin\n", ";LAYER:0\nG1 X1\n", ";LAYER:1\nG1 X2 ; é\n", ";LAYER:2\nG1 X3"]
+    assert len(spool) == 4
+
+def test_blocksAndLines():
+    spool = createSpool()
+    text = "".join(spool)
+
+    assert b"".join(spool.iterBlocks(5)).decode("utf-8") == text
+    assert spool.getSize() == len(text.encode("utf-8"))
+
+    lines = list(spool.iterLines())
+    assert lines == text.split("\n")
+    assert spool.getLineCount() == len(lines)
+
+def test_empty():
+    spool = GCodeSpool()
+
+    assert not spool
+    assert list(spool.iterLines()) == []
+    assert spool.getLineCount() == 0
+
+def test_copyTo(tmpdir):
+    spool = createSpool()
+    file_name = str(tmpdir.join("copy.gcode"))
+
+    progress = []
+    fd = os.open(file_name, os.O_WRONLY | os.O_CREAT)
+    try:
+        spool.copyTo(fd, lambda copied, total: progress.append((copied, total)))
+    finally:
+        os.close(fd)
+
+    with open(file_name, "rb") as f:
+        assert f.read() == b"".join(spool.iterBlocks())
+    assert progress[-1] == (spool.getSize(), spool.getSize())
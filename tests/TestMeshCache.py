@@ -0,0 +1,69 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import os
+
+import numpy
+
+from cura.MeshCache import MeshCache
+
+def createFile(tmpdir, name, contents):
+    path = tmpdir.join(name)
+    path.write(contents)
+    return str(path)
+
+def test_putAndGet(tmpdir):
+    file_name = createFile(tmpdir, "model.stl", "model")
+    vertices = numpy.arange(9, dtype = numpy.float32).reshape((3, 3))
+    cache = MeshCache(str(tmpdir.join("cache")), 1 << 20)
+
+    assert cache.get(file_name) is None
+    cache.put(file_name, {"vertices": vertices, "normals": None})
+
+    # A new cache in the same directory finds the file again.
+    arrays = MeshCache(str(tmpdir.join("cache")), 1 << 20).get(file_name)
+    assert list(arrays.keys()) == ["vertices"]
+    assert numpy.array_equal(arrays["vertices"], vertices)
+
+def test_fileIdentity(tmpdir):
+    file_name = createFile(tmpdir, "model.stl", "model")
+    cache = MeshCache(str(tmpdir.join("cache")), 1 << 20)
+    cache.put(file_name, {"vertices": numpy.zeros((3, 3), dtype = numpy.float32)})
+
+    # Touching the file does not change its contents.
+    stat = os.stat(file_name)
+    os.utime(file_name, ns = (stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.get(file_name) is not None
+
+    # Changing the contents does, even if the size stays the same.
+    createFile(tmpdir, "model.stl", "MODEL")
+    assert cache.get(file_name) is None
+
+def test_evictLeastRecentlyUsed(tmpdir):
+    vertices = numpy.zeros((100, 3), dtype = numpy.float32)
+    cache = MeshCache(str(tmpdir.join("cache")), vertices.nbytes * 2)
+    file_names = [createFile(tmpdir, "model{0}.stl".format(index), str(index)) for index in range(3)]
+
+    cache.put(file_names[0], {"vertices": vertices})
+    cache.put(file_names[1], {"vertices": vertices})
+    cache._bundles[cache._files[file_names[0]]["hash"]]["last_used"] += 10 # Use the first file most recently.
+    cache.put(file_names[2], {"vertices": vertices})
+
+    assert cache.get(file_names[0]) is not None
+    assert cache.get(file_names[1]) is None
+    assert cache.get(file_names[2]) is not None
+    assert cache.getSize() <= vertices.nbytes * 2
+
+def test_saveIndex(tmpdir):
+    file_name = createFile(tmpdir, "model.stl", "model")
+    cache = MeshCache(str(tmpdir.join("cache")), 1 << 20)
+    cache.put(file_name, {"vertices": numpy.zeros((3, 3), dtype = numpy.float32)})
+    bundle_hash = cache._files[file_name]["hash"]
+    cache._bundles[bundle_hash]["last_used"] = 0
+    index = tmpdir.join("cache", "index.json").read()
+
+    # Getting a file only updates its last use in memory, until the index is saved.
+    assert cache.get(file_name) is not None
+    assert tmpdir.join("cache", "index.json").read() == index
+    cache.saveIndex()
+    assert MeshCache(str(tmpdir.join("cache")), 1 << 20)._bundles[bundle_hash]["last_used"] > 0
@@ -0,0 +1,61 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import numpy
+import pytest
+
+from cura.MeshFileParser import MeshFileParser, parseInWorker, takeWorkerResult
+
+# Two triangles of a unit square in the XY plane, in STL coordinates (Z up).
+triangles = numpy.array([
+    [[0, 0, 0], [1, 0, 0], [1, 1, 0]],
+    [[1, 1, 0], [0, 1, 0], [0, 0, 0]]
+], dtype = numpy.float32)
+
+def writeBinaryStl(path):
+    faces = numpy.zeros(len(triangles), dtype = MeshFileParser._binary_stl_dtype)
+    faces["vertices"] = triangles
+    with open(str(path), "wb") as f:
+        f.write(b"solid but actually binary".ljust(80, b" "))
+        f.write(numpy.array([len(triangles)], dtype = "<u4").tobytes())
+        f.write(faces.tobytes())
+
+def writeAsciiStl(path):
+    lines = ["solid square"]
+    for triangle in triangles:
+        lines.append("facet normal 0 0 1\nouter loop")
+        lines.extend("vertex {0} {1} {2}".format(*vertex) for vertex in triangle)
+        lines.append("endloop\nendfacet")
+    lines.append("endsolid square")
+    with open(str(path), "w") as f:
+        f.write("\n".join(lines))
+
+@pytest.mark.parametrize("write", [writeBinaryStl, writeAsciiStl])
+def test_parseStl(tmpdir, write):
+    path = tmpdir.join("square.stl")
+    write(path)
+
+    vertices, normals, indices = MeshFileParser.parse(str(path))
+
+    # Z up in the file is Y up in the scene, and the two corners the triangles share are welded.
+    expected = triangles.reshape((-1, 3))[:, [0, 2, 1]] * numpy.array([1, 1, -1])
+    assert len(vertices) == 4
+    assert numpy.allclose(vertices[indices].reshape((-1, 3)), expected)
+    assert numpy.allclose(normals, [[0, 1, 0]] * 4)
+
+def test_parseInvalid(tmpdir):
+    path = tmpdir.join("invalid.stl")
+    path.write("not a mesh")
+    assert MeshFileParser.parse(str(path)) is None
+
+    assert MeshFileParser.parse(str(tmpdir.join("image.png"))) is None
+
+def test_workerResult(tmpdir):
+    path = tmpdir.join("square.stl")
+    writeBinaryStl(path)
+
+    result = takeWorkerResult(parseInWorker(str(path)))
+    expected = MeshFileParser.parse(str(path))
+    assert len(result) == len(expected)
+    for array, expected_array in zip(result, expected):
+        assert numpy.array_equal(array, expected_array)
@@ -0,0 +1,53 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import numpy
+import pytest
+
+from cura.MeshSimplifier import MeshSimplifier
+
+##  Create a sphere with about 2 * rings * segments triangles, as an indexed mesh.
+def createSphere(rings, segments, radius = 10):
+    latitudes = numpy.linspace(0, numpy.pi, rings + 1)
+    longitudes = numpy.linspace(0, 2 * numpy.pi, segments, endpoint = False)
+    latitude, longitude = numpy.meshgrid(latitudes, longitudes, indexing = "ij")
+    vertices = radius * numpy.column_stack((numpy.sin(latitude).ravel() * numpy.cos(longitude).ravel(), numpy.cos(latitude).ravel(), numpy.sin(latitude).ravel() * numpy.sin(longitude).ravel()))
+
+    indices = []
+    for ring in range(rings):
+        for segment in range(segments):
+            corner = ring * segments + segment
+            right = ring * segments + (segment + 1) % segments
+            indices.append([corner, corner + segments, right])
+            indices.append([right, corner + segments, right + segments])
+    return vertices, numpy.array(indices)
+
+@pytest.mark.parametrize("triangle_budget", [10000, 1000, 100, 10])
+def test_decimateBudget(triangle_budget):
+    vertices, indices = createSphere(100, 200)
+
+    result, normals = MeshSimplifier.decimate(vertices, indices, triangle_budget)
+
+    assert len(result) % 3 == 0
+    assert len(result) // 3 <= triangle_budget
+    assert len(normals) == len(result)
+    if triangle_budget >= 100:
+        # The cell size is refined to use most of the budget, rather than leaving it mostly unused.
+        assert len(result) // 3 > triangle_budget / 4
+
+def test_decimateBoundingBox():
+    vertices, indices = createSphere(100, 200)
+    vertices *= [1, 2, 3] # Make the bounding box different along every axis.
+
+    result, normals = MeshSimplifier.decimate(vertices, indices, 500)
+
+    assert numpy.allclose(numpy.min(result, axis = 0), numpy.min(vertices, axis = 0), atol = 1e-4)
+    assert numpy.allclose(numpy.max(result, axis = 0), numpy.max(vertices, axis = 0), atol = 1e-4)
+
+def test_decimateTriangleSoup():
+    vertices, indices = createSphere(50, 100)
+    soup = vertices[indices].reshape((-1, 3))
+
+    result, normals = MeshSimplifier.decimate(soup, None, 1000)
+
+    assert 0 < len(result) // 3 <= 1000
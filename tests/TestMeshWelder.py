@@ -0,0 +1,54 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import numpy
+
+from cura.MeshWelder import MeshWelder
+
+def faceNormals(vertices, indices):
+    normals = numpy.cross(vertices[indices[:, 1]] - vertices[indices[:, 0]], vertices[indices[:, 2]] - vertices[indices[:, 0]])
+    return normals / numpy.sqrt(numpy.sum(normals * normals, axis = 1))[:, numpy.newaxis]
+
+def test_computeNormalsCube():
+    vertices = numpy.array([[0, 0, 0], [1, 0, 0], [1, 1, 0], [0, 1, 0], [0, 0, 1], [1, 0, 1], [1, 1, 1], [0, 1, 1]], dtype = numpy.float32)
+    indices = numpy.array([[0, 2, 1], [0, 3, 2], [4, 5, 6], [4, 6, 7], [0, 1, 5], [0, 5, 4], [2, 3, 7], [2, 7, 6], [1, 2, 6], [1, 6, 5], [0, 4, 7], [0, 7, 3]], dtype = numpy.int32)
+
+    result_vertices, normals, result_indices = MeshWelder.computeNormals(vertices, indices)
+
+    # Every corner of the cube is split into one vertex per side, each with the normal of its side.
+    assert len(result_vertices) == 24
+    assert numpy.allclose(result_vertices[result_indices], vertices[indices])
+    for corner in range(3):
+        assert numpy.allclose(normals[result_indices[:, corner]], faceNormals(vertices, indices))
+
+def test_computeNormalsSmooth():
+    # The side of a cylinder with 64 segments bends less than the crease angle between segments.
+    angles = numpy.linspace(0, 2 * numpy.pi, 64, endpoint = False)
+    circle = numpy.column_stack((numpy.cos(angles), numpy.sin(angles), numpy.zeros(64)))
+    vertices = numpy.concatenate((circle, circle + [0, 0, 1]))
+    indices = []
+    for segment in range(64):
+        next_segment = (segment + 1) % 64
+        indices.extend([[segment, next_segment, next_segment + 64], [segment, next_segment + 64, segment + 64]])
+    indices = numpy.array(indices)
+
+    result_vertices, normals, result_indices = MeshWelder.computeNormals(vertices, indices)
+
+    # The vertices stay welded, and point out of the cylinder.
+    assert len(result_vertices) == len(vertices)
+    assert numpy.array_equal(result_indices, indices)
+    assert numpy.all(numpy.sum(normals[:, :2] * vertices[:, :2], axis = 1) > 0.99)
+    assert numpy.allclose(normals[:, 2], 0)
+
+def test_computeNormalsFan():
+    # A flat disc with all triangles around one centre vertex, like the caps of cylinders in many STL files.
+    segments = 100000
+    angles = numpy.linspace(0, 2 * numpy.pi, segments, endpoint = False)
+    vertices = numpy.concatenate(([[0, 0, 0]], numpy.column_stack((numpy.cos(angles), numpy.zeros(segments), numpy.sin(angles)))))
+    indices = numpy.column_stack((numpy.zeros(segments), numpy.arange(segments) + 1, (numpy.arange(segments) + 1) % segments + 1)).astype(numpy.int32)
+
+    result_vertices, normals, result_indices = MeshWelder.computeNormals(vertices, indices)
+
+    assert len(result_vertices) == len(vertices)
+    assert numpy.array_equal(result_indices, indices)
+    assert numpy.allclose(numpy.abs(normals[:, 1]), 1)
@@ -0,0 +1,45 @@
+import numpy
+
+from cura.OverlapSolver import OverlapSolver
+from cura.PolygonCollision import PolygonCollision
+
+def square(x, y, size = 1.0):
+    return numpy.array([[x, y], [x, y + size], [x + size, y + size], [x + size, y]], numpy.float32)
+
+def test_solveSeparatesPair():
+    solver = OverlapSolver([square(0, 0), square(0.5, 0)], time_budget = None)
+    translations = solver.solve()
+
+    # Both hulls move apart along x by the same amount.
+    assert numpy.allclose(translations[0], -translations[1])
+    assert translations[0][0] < 0
+    assert len(solver.findOverlaps(translations)[0]) == 0
+
+def test_solveCluster():
+    hulls = [square(x * 0.3, z * 0.3) for x in range(4) for z in range(4)]
+    hulls.append(None)
+    solver = OverlapSolver(hulls, time_budget = None)
+    translations = solver.solve()
+
+    assert len(solver.findOverlaps(translations)[0]) == 0
+    assert numpy.allclose(translations[-1], [0, 0])
+    moved = [hull + translation for hull, translation in zip(hulls[:-1], translations)]
+    assert not numpy.any(PolygonCollision(moved).intersectAll())
+
+def test_solveTimeBudget():
+    # Without any time, the solver stops after the first iteration, before the cluster is solved.
+    hulls = [square(x * 0.3, z * 0.3) for x in range(4) for z in range(4)]
+    solver = OverlapSolver(hulls, time_budget = 0)
+    translations = solver.solve()
+
+    assert numpy.any(translations != 0)
+    assert len(solver.findOverlaps(translations)[0]) > 0
+
+def test_solveHeadHulls():
+    # The head hull of the first square reaches the second square, although the squares themselves do not overlap.
+    solver = OverlapSolver([square(0, 0), square(1.5, 0)], [square(-1, -1, 3), None], time_budget = None)
+    pairs, overlaps = solver.findOverlaps()
+    assert pairs.tolist() == [[0, 1]]
+
+    translations = solver.solve()
+    assert len(solver.findOverlaps(translations)[0]) == 0
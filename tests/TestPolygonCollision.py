@@ -0,0 +1,36 @@
+import numpy
+
+from cura.PolygonCollision import PolygonCollision
+
+def square(x, y, size = 1.0):
+    return numpy.array([[x, y], [x, y + size], [x + size, y + size], [x + size, y]], numpy.float32)
+
+def test_intersectPairs():
+    collision = PolygonCollision([square(0, 0), square(0.75, 0), square(5, 5), None])
+
+    hits, translations = collision.intersectPairs([0, 1, 0, 0], [1, 0, 2, 3])
+    assert list(hits) == [True, True, False, False]
+
+    # The translation vector moves the first polygon out of the second along the smallest overlap.
+    assert numpy.allclose(translations[0], [-0.25, 0])
+    assert numpy.allclose(translations[1], [0.25, 0])
+    assert numpy.allclose(translations[2], [0, 0])
+
+def test_intersectPairsTriangle():
+    triangle = numpy.array([[0, 0], [2, 0], [0, 2]], numpy.float32)
+    collision = PolygonCollision([triangle, square(1.5, 1.5)])
+
+    # Bounding boxes overlap, but the square is on the other side of the hypotenuse.
+    assert list(collision.getCandidatePairs()[0]) == [0, 1]
+    hits, _ = collision.intersectPairs([0], [1])
+    assert not hits[0]
+
+def test_intersectAll():
+    collision = PolygonCollision([square(0, 0), square(0.5, 0.5), square(3, 3)])
+    heads = PolygonCollision([square(-1, -1, 3), square(10, 10)])
+
+    hit_map = collision.intersectAll()
+    assert hit_map.tolist() == [[False, True, False], [True, False, False], [False, False, False]]
+
+    hit_map = collision.intersectAll(heads)
+    assert hit_map.tolist() == [[True, False], [True, False], [False, False]]
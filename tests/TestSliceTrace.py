@@ -0,0 +1,37 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+from cura.SliceTrace import SliceTrace
+
+import json
+
+def test_phasesAndMessages():
+    trace = SliceTrace(3)
+    with trace.phase("start_slice_job"):
+        with trace.phase("settings"):
+            pass
+    trace.beginPhase("engine")
+    trace.addMessage("cura.proto.GCodeLayer", 100, 0.5)
+    trace.addMessage("cura.proto.GCodeLayer", 50)
+    trace.addHandlingTime("cura.proto.GCodeLayer", 0.25)
+    trace.finish("done")
+
+    result = trace.toDict()
+    assert result["slice_id"] == 3
+    assert result["result"] == "done"
+    assert [phase["name"] for phase in result["phases"]] == ["start_slice_job", "settings", "engine"]
+    assert all(0 <= phase["duration"] <= result["duration"] for phase in result["phases"])
+    assert result["messages"]["cura.proto.GCodeLayer"] == {"count": 2, "bytes": 150, "handling_time": 0.75}
+
+def test_chromeTrace():
+    trace = SliceTrace(1)
+    trace.beginPhase("engine")
+    trace.endPhase("engine")
+    trace.endPhase("never_started")
+    trace.finish("cancelled")
+
+    events = json.loads(json.dumps(trace.toChromeTrace()))["traceEvents"]
+    assert [event["name"] for event in events] == ["slice 1", "engine"]
+    assert all(event["ph"] == "X" for event in events)
+    assert events[0]["args"]["result"] == "cancelled"
+    assert "engine" in trace.getSummary()
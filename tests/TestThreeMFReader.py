@@ -0,0 +1,69 @@
+# Copyright (c) 2016 Ultimaker B.V.
+# Cura is released under the terms of the AGPLv3 or higher.
+
+import importlib.util
+import os
+import zipfile
+
+import numpy
+
+# The name of the plug-in directory is not a valid module name, so the reader is loaded from its path.
+_spec = importlib.util.spec_from_file_location("ThreeMFReader", os.path.join(os.path.dirname(__file__), "..", "plugins", "3MFReader", "ThreeMFReader.py"))
+ThreeMFReader = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(ThreeMFReader)
+
+# A tetrahedron, and an object with two copies of it as components, one of which is moved by (10, 20, 30).
+model = """<?xml version="1.0" encoding="UTF-8"?>
+<model unit="millimeter" xmlns="http://schemas.microsoft.com/3dmanufacturing/core/2015/02">
+    <resources>
+        <object id="1" type="model">
+            <mesh>
+                <vertices>
+                    <vertex x="0" y="0" z="0" />
+                    <vertex x="1" y="0" z="0" />
+                    <vertex x="0" y="1" z="0" />
+                    <vertex x="0" y="0" z="1" />
+                </vertices>
+                <triangles>
+                    <triangle v1="0" v2="2" v3="1" />
+                    <triangle v1="0" v2="1" v3="3" />
+                    <triangle v1="0" v2="3" v3="2" />
+                    <triangle v1="1" v2="2" v3="3" />
+                </triangles>
+            </mesh>
+        </object>
+        <object id="2" type="model">
+            <components>
+                <component objectid="1" />
+                <component objectid="1" transform="1 0 0 0 1 0 0 0 1 10 20 30" />
+            </components>
+        </object>
+    </resources>
+    <build>
+        <item objectid="2" />
+    </build>
+</model>
+"""
+
+def getWorldBounds(node):
+    vertices = node.getMeshData().getTransformed(node.getWorldTransformation()).getVertices()
+    return numpy.min(vertices, axis = 0), numpy.max(vertices, axis = 0)
+
+def test_readComponents(tmpdir):
+    path = str(tmpdir.join("components.3mf"))
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("3D/3dmodel.model", model)
+
+    result = ThreeMFReader.ThreeMFReader().read(path)
+
+    group = result.getChildren()[0]
+    first, second = group.getChildren()
+    assert first.getMeshData() is second.getMeshData()
+
+    # Z up in the file is Y up in the scene, so the offset of (10, 20, 30) becomes (10, 30, -20).
+    minimum, maximum = getWorldBounds(first)
+    assert numpy.allclose(minimum, [0, 0, -1], atol = 1e-5)
+    assert numpy.allclose(maximum, [1, 1, 0], atol = 1e-5)
+    minimum, maximum = getWorldBounds(second)
+    assert numpy.allclose(minimum, [10, 30, -21], atol = 1e-5)
+    assert numpy.allclose(maximum, [11, 31, -20], atol = 1e-5)